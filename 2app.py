@@ -5,17 +5,41 @@ import os
 import json
 import tempfile
 import time
-import base64
-import plotly.express as px
-import plotly.graph_objects as go
+import uuid
+import weakref
 from datetime import datetime, timedelta
 from google.oauth2 import service_account
 from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-import gspread
-from gspread_dataframe import get_as_dataframe, set_with_dataframe
+from api_metrics import start_metrics_export
+from analysis_cache import column_summary, correlation, describe, frame_fingerprint, strong_correlations
+from column_stats import all_values, column_stats_cache, compute_frame_stats
+from date_columns import date_column_cache
+from dense_charts import density_caption, scatter_figure
+from export_panel import export_panel
+from filter_index import filter_indexes
+from filter_widgets import date_range_filter
+from google_clients import client_pool, get_service, open_spreadsheet, open_worksheet
+from lazy_imports import import_report, lazy_attribute, lazy_module
+from line_chart import line_chart_panel
+from paged_table import paged_table
+from perf_spans import chrome_trace, section, span, start_trace, subsection, traced, TRACE_HISTORY
+from revalidation import sheet_revalidator
+from sheet_cache import shared_sheet_cache
+from sheet_loader import get_worksheet_frame
+from streaming_stats import APPROXIMATE_STATS_ROWS, QUANTILE_RELATIVE_ACCURACY
+from type_inference import convert_column_types, type_report_frame
+
+# Heavy modules are imported by the first page that uses them, not at session start
+px = lazy_module('plotly.express')
+go = lazy_module('plotly.graph_objects')
+Flow = lazy_attribute('google_auth_oauthlib.flow', 'Flow')
+MediaFileUpload = lazy_attribute('googleapiclient.http', 'MediaFileUpload')
+get_as_dataframe = lazy_attribute('gspread_dataframe', 'get_as_dataframe')
+set_with_dataframe = lazy_attribute('gspread_dataframe', 'set_with_dataframe')
+
+# Time this rerun; the performance panel in the sidebar shows the reruns before it
+rerun_trace = start_trace("rerun")
+section("page setup")
 
 # Page configuration
 st.set_page_config(
@@ -25,6 +49,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Publish Google API metrics if API_METRICS_FILE or API_METRICS_PORT is set
+start_metrics_export()
+
 # Custom CSS for better styling
 st.markdown("""
 <style>
@@ -104,8 +131,26 @@ if 'current_worksheet' not in st.session_state:
     st.session_state.current_worksheet = None
 if 'sheets_data' not in st.session_state:
     st.session_state.sheets_data = None
+if 'sheets_revision' not in st.session_state:
+    st.session_state.sheets_revision = None
+if 'last_sync_report' not in st.session_state:
+    st.session_state.last_sync_report = None
+if 'perf_traces' not in st.session_state:
+    st.session_state.perf_traces = []
+if 'client_holder' not in st.session_state:
+    st.session_state.client_holder = uuid.uuid4().hex
+
+# Register this session with the pooled client of its credentials, so another session signing out keeps it open
+if st.session_state.credentials is not None:
+    client_pool.acquire(st.session_state.credentials, st.session_state.client_holder)
+
+# Reruns cut short by st.rerun() or st.stop() end at their last recorded activity
+for previous_trace in st.session_state.perf_traces:
+    previous_trace.finish(at_last_activity=True)
+st.session_state.perf_traces = (st.session_state.perf_traces + [rerun_trace])[-TRACE_HISTORY:]
 
 # Authentication sidebar
+section("sidebar")
 with st.sidebar:
     st.markdown("<h2 style='text-align: center;'>Google Services Dashboard</h2>", unsafe_allow_html=True)
     st.markdown("---")
@@ -199,6 +244,10 @@ with st.sidebar:
     # Logout button
     if st.session_state.authenticated:
         if st.button("Sign Out"):
+            # Close the pooled client and its connections
+            if st.session_state.credentials is not None:
+                client_pool.release(st.session_state.credentials, st.session_state.client_holder)
+            
             st.session_state.authenticated = False
             st.session_state.credentials = None
             st.session_state.user_info = None
@@ -229,6 +278,34 @@ with st.sidebar:
         page = "Login Required"
         st.info("Please authenticate to access the application")
     
+    # Timings of the previous reruns of this session
+    finished_traces = [trace for trace in st.session_state.perf_traces if trace.finished]
+    if finished_traces:
+        with st.expander("Performance"):
+            last_trace = finished_traces[-1]
+            st.caption(f"Previous rerun took {last_trace.root.duration * 1000:.0f} ms")
+            span_rows = [
+                ("\u2003" * depth + name, category, round(ms, 1), f"{share:.0%}")
+                for depth, name, category, ms, share in last_trace.rows()
+            ]
+            st.dataframe(pd.DataFrame(span_rows, columns=["Span", "Kind", "ms", "Share"]), use_container_width=True)
+            st.download_button(
+                "Export Chrome trace",
+                json.dumps(chrome_trace(finished_traces)),
+                file_name="rerun_traces.json",
+                mime="application/json"
+            )
+            imports = import_report()
+            if imports:
+                st.caption("Lazily imported modules (first use in this process)")
+                st.dataframe(
+                    pd.DataFrame(
+                        [(name, round(ms, 1), where) for name, ms, where in imports],
+                        columns=["Module", "ms", "Loaded by"]
+                    ),
+                    use_container_width=True
+                )
+    
     # Footer
     st.markdown("---")
     st.markdown("""
@@ -238,32 +315,26 @@ with st.sidebar:
     """, unsafe_allow_html=True)
 
 # Helper functions
-def load_spreadsheet_data():
+def load_spreadsheet_data(on_chunk=None):
     """Load and cache spreadsheet data"""
     if not st.session_state.current_spreadsheet or not st.session_state.current_worksheet:
         return None
     
     try:
-        # Connect to Google Sheets
-        gc = gspread.authorize(st.session_state.credentials)
-        spreadsheet = gc.open_by_key(st.session_state.current_spreadsheet)
-        worksheet = spreadsheet.worksheet(st.session_state.current_worksheet)
-        
-        # Get all values from the worksheet
-        data = worksheet.get_all_values()
+        # Served from the shared cache while the revision is unchanged; concurrent loads share one fetch
+        with span("load sheet", 'data', worksheet=st.session_state.current_worksheet):
+            df, revision, sync_report = get_worksheet_frame(
+                st.session_state.credentials,
+                st.session_state.current_spreadsheet,
+                st.session_state.current_worksheet,
+                on_chunk=on_chunk
+            )
+        st.session_state.sheets_revision = revision
+        # The frame exactly as loaded for that revision (see sheet_version)
+        st.session_state.sheets_revision_frame = None if df is None else weakref.ref(df)
+        st.session_state.last_sync_report = sync_report
         
-        if data:
-            # Convert to DataFrame
-            headers = data[0]
-            df = pd.DataFrame(data[1:], columns=headers)
-            
-            # Try to convert numeric columns
-            for col in df.columns:
-                try:
-                    df[col] = pd.to_numeric(df[col])
-                except:
-                    pass
-            
+        if df is not None:
             return df
         else:
             return pd.DataFrame()
@@ -271,6 +342,94 @@ def load_spreadsheet_data():
         st.error(f"Error loading spreadsheet data: {str(e)}")
         return None
 
+def sheet_column_stats(df):
+    """Return the column statistics of the loaded sheet (computed once per revision at load time)"""
+    version = sheet_version(df)
+    if version is None:
+        # Unversioned loads and frames replaced after an edit are not shared; keep their statistics with this session's frame
+        memo = st.session_state.get('unversioned_column_stats')
+        if memo is None or memo[0]() is not df:
+            memo = (weakref.ref(df), compute_frame_stats(df))
+            st.session_state.unversioned_column_stats = memo
+        return memo[1]
+    return column_stats_cache.get(*version, df)
+
+def sheet_date_columns(df):
+    """Return the date columns of the loaded sheet (formats detected once per revision)"""
+    # Frames replaced after an edit keep the revision, so they are checked without the shared cache
+    version = sheet_version(df) or (st.session_state.current_spreadsheet, st.session_state.current_worksheet, None)
+    return date_column_cache.date_columns(*version, df)
+
+def sheet_parsed_dates(df, column):
+    """Return a date column of the loaded sheet parsed with its detected format"""
+    version = sheet_version(df) or (st.session_state.current_spreadsheet, st.session_state.current_worksheet, None)
+    return date_column_cache.parse(*version, df, column)
+
+def sheet_version(df):
+    """Return (spreadsheet, worksheet, revision) if df is that sheet revision exactly as loaded, else None
+
+    Frames a page replaced after editing the sheet keep the old revision in
+    session state, so only the loaded object itself is identified by it.
+    """
+    loaded = st.session_state.get('sheets_revision_frame')
+    if st.session_state.sheets_revision is None or loaded is None or loaded() is not df:
+        return None
+    return (
+        st.session_state.current_spreadsheet,
+        st.session_state.current_worksheet,
+        st.session_state.sheets_revision
+    )
+
+def analysis_summary(df, column, approximate):
+    """Mean, median, std, quartiles and outlier bounds of a column, exact or from its load-time sketch"""
+    if approximate:
+        stats = sheet_column_stats(df).get(column)
+        if stats is not None and stats.get('sketch') is not None:
+            return stats['sketch'].summary()
+    return column_summary(df, column, fingerprint=frame_fingerprint(df, [column], sheet_version(df)))
+
+def refresh_stale_data():
+    """Swap in a newer revision of the loaded sheet that was refreshed in the background
+
+    Also queues the next background check, so pages render the data they have
+    instead of waiting on Google. Returns True if the data was replaced.
+    """
+    spreadsheet_id = st.session_state.current_spreadsheet
+    worksheet_name = st.session_state.current_worksheet
+    if st.session_state.sheets_data is None or not spreadsheet_id:
+        return False
+    
+    updated = False
+    # Only revisions checked with this session's own credentials are swapped in
+    latest = sheet_revalidator.latest_revision(st.session_state.credentials, spreadsheet_id, worksheet_name)
+    if latest is not None and latest != st.session_state.sheets_revision:
+        # The cache only keeps the newest revision, so an older one is never swapped back in
+        df = shared_sheet_cache.get(spreadsheet_id, worksheet_name, latest)
+        if df is not None:
+            st.session_state.sheets_data = df
+            st.session_state.sheets_revision = latest
+            st.session_state.sheets_revision_frame = weakref.ref(df)
+            st.session_state.last_sync_report = None
+            updated = True
+    
+    sheet_revalidator.schedule(st.session_state.credentials, spreadsheet_id, worksheet_name)
+    return updated
+
+def chunk_preview():
+    """Return a load callback that previews the first rows while the rest of a large sheet arrives"""
+    preview = st.empty()
+    
+    def on_chunk(rows, total_rows):
+        with preview.container():
+            st.progress(min(len(rows) / total_rows, 1.0), text=f"Loaded {len(rows)} of {total_rows} rows...")
+            st.caption("Preview of the first rows while the rest of the sheet loads")
+            # Raw chunk rows are not padded yet: fit each to the header's width
+            width = len(rows[0])
+            sample = [(row + [''] * (width - len(row)))[:width] for row in rows[1:101]]
+            st.dataframe(pd.DataFrame(sample, columns=rows[0]), use_container_width=True)
+    
+    return preview, on_chunk
+
 def spreadsheet_selector():
     """Common spreadsheet selector UI component"""
     col1, col2 = st.columns([3, 1])
@@ -291,8 +450,7 @@ def spreadsheet_selector():
                 spreadsheet_id = spreadsheet_url
             
             # Connect to Google Sheets
-            gc = gspread.authorize(st.session_state.credentials)
-            spreadsheet = gc.open_by_key(spreadsheet_id)
+            spreadsheet = open_spreadsheet(st.session_state.credentials, spreadsheet_id)
             
             # Get list of worksheets
             worksheet_list = [sheet.title for sheet in spreadsheet.worksheets()]
@@ -312,8 +470,10 @@ def spreadsheet_selector():
             if selected_sheet:
                 st.session_state.current_worksheet = selected_sheet
                 
-                # Load the data
-                df = load_spreadsheet_data()
+                # Load the data, previewing the first chunk of large sheets
+                preview, on_chunk = chunk_preview()
+                df = load_spreadsheet_data(on_chunk=on_chunk)
+                preview.empty()
                 if df is not None:
                     st.session_state.sheets_data = df
                     return True
@@ -321,8 +481,15 @@ def spreadsheet_selector():
         except Exception as e:
             st.error(f"Error accessing Google Sheets: {str(e)}")
     
-    return False
+    # Keep showing the sheet loaded earlier in this session
+    return st.session_state.sheets_data is not None
 
+def plot_chart(fig, **kwargs):
+    """Render a Plotly figure, timed as a chart span"""
+    with span("plotly_chart", 'chart', title=fig.layout.title.text or ''):
+        st.plotly_chart(fig, **kwargs)
+
+@traced("render_chart", 'chart')
 def render_chart(chart_config, df):
     """Render a chart based on configuration"""
     st.markdown(f"<h3 class='section-header'>{chart_config['title']}</h3>", unsafe_allow_html=True)
@@ -344,32 +511,19 @@ def render_chart(chart_config, df):
             text_auto='.2s'
         )
         
-        st.plotly_chart(fig, use_container_width=True)
+        plot_chart(fig, use_container_width=True)
     
     elif chart_config["type"] == "Line Chart":
-        # Sort by the x column
-        plot_df = df.sort_values(by=chart_config["x_col"])
-        
-        fig = go.Figure()
-        
-        for y_col in chart_config["y_cols"]:
-            fig.add_trace(
-                go.Scatter(
-                    x=plot_df[chart_config["x_col"]],
-                    y=plot_df[y_col],
-                    mode='lines+markers',
-                    name=y_col
-                )
-            )
-        
-        fig.update_layout(
-            title=chart_config["title"],
-            xaxis_title=chart_config["x_col"],
-            yaxis_title="Value",
-            legend_title="Variables"
+        # Downsampled per series in x order, with a zoom slider for full resolution
+        line_chart_panel(
+            df,
+            chart_config["x_col"],
+            chart_config["y_cols"],
+            chart_config["key"],
+            chart_config["title"],
+            mode='lines+markers',
+            render=plot_chart
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
     
     elif chart_config["type"] == "Pie Chart":
         # Group by the labels column and aggregate the values column
@@ -395,19 +549,20 @@ def render_chart(chart_config, df):
             title=chart_config["title"]
         )
         
-        st.plotly_chart(fig, use_container_width=True)
+        plot_chart(fig, use_container_width=True)
     
     elif chart_config["type"] == "Scatter Plot":
-        fig = px.scatter(
+        fig, mode = scatter_figure(
             df,
-            x=chart_config["x_col"],
-            y=chart_config["y_col"],
-            color=chart_config["color_col"],
-            title=chart_config["title"],
-            trendline="ols" if not chart_config["color_col"] else None
+            chart_config["x_col"],
+            chart_config["y_col"],
+            color_col=chart_config["color_col"],
+            title=chart_config["title"]
         )
         
-        st.plotly_chart(fig, use_container_width=True)
+        plot_chart(fig, use_container_width=True)
+        if mode == 'density':
+            st.caption(density_caption(chart_config["color_col"]))
     
     elif chart_config["type"] == "Heatmap":
         # Create a pivot table
@@ -429,9 +584,10 @@ def render_chart(chart_config, df):
             color_continuous_scale="Viridis"
         )
         
-        st.plotly_chart(fig, use_container_width=True)
+        plot_chart(fig, use_container_width=True)
 
 # Main content area
+section(f"page: {page}")
 if not st.session_state.authenticated:
     st.markdown("<h1 class='main-header'>Welcome to Google Services Dashboard</h1>", unsafe_allow_html=True)
     
@@ -473,10 +629,15 @@ elif page == "Google Sheets - Data Viewer":
     # Spreadsheet selector
     data_loaded = spreadsheet_selector()
     
+    # Render the loaded data right away; a newer revision is swapped in once refreshed in the background
+    if refresh_stale_data():
+        st.info("The sheet changed since it was loaded; showing the latest data.")
+    
     if data_loaded and st.session_state.sheets_data is not None:
         df = st.session_state.sheets_data
         
         # Data overview
+        subsection("Data Overview")
         st.markdown("<h2 class='page-header'>Data Overview</h2>", unsafe_allow_html=True)
         
         col1, col2, col3 = st.columns(3)
@@ -488,7 +649,25 @@ elif page == "Google Sheets - Data Viewer":
             numeric_cols = df.select_dtypes(include=['number']).columns
             st.metric("Numeric Columns", f"{len(numeric_cols)}")
         
+        sync_report = st.session_state.last_sync_report
+        if sync_report:
+            st.caption(
+                f"Incremental sync: {sync_report['rows_refetched']} rows refetched, "
+                f"{sync_report['modified']} modified, {sync_report['appended']} appended"
+                + (
+                    f"; the {sync_report['rows_not_rechecked']:,} rows above were not re-checked "
+                    f"and are refreshed by a full reload within {sync_report['syncs_until_full']} syncs"
+                    if sync_report['rows_not_rechecked'] else ""
+                )
+            )
+        
+        type_report = type_report_frame(df)
+        if not type_report.empty:
+            with st.expander("Detected Column Types"):
+                st.dataframe(type_report, use_container_width=True)
+        
         # Data preview with filters
+        subsection("Data Preview & Filtering")
         st.markdown("<h2 class='page-header'>Data Preview & Filtering</h2>", unsafe_allow_html=True)
         
         # Column selector
@@ -503,12 +682,18 @@ elif page == "Google Sheets - Data Viewer":
         
         filters = {}
         cols = st.columns(3)
+        frame_index = filter_indexes.for_frame(df)
+        column_stats = sheet_column_stats(df)
         
-        for i, col_name in enumerate(selected_columns[:3]):  # Limit to 3 filters for simplicity
+        # Widgets are built from the load-time column statistics; indexes are only built for active filters
+        for i, col_name in enumerate(selected_columns):
+            stats = column_stats.get(col_name)
+            if stats is None:
+                continue
             with cols[i % 3]:
-                if df[col_name].dtype == 'object':
-                    unique_values = df[col_name].unique().tolist()
-                    if len(unique_values) <= 10:  # Only show selector if reasonable number of options
+                if stats['kind'] in ('text', 'boolean'):
+                    unique_values = all_values(stats)
+                    if unique_values is not None and len(unique_values) <= 10:  # Only show selector if reasonable number of options
                         selected_values = st.multiselect(
                             f"Filter by {col_name}:",
                             unique_values,
@@ -516,9 +701,9 @@ elif page == "Google Sheets - Data Viewer":
                         )
                         if selected_values:
                             filters[col_name] = selected_values
-                elif df[col_name].dtype in ['int64', 'float64']:
-                    min_val = float(df[col_name].min())
-                    max_val = float(df[col_name].max())
+                elif stats['kind'] == 'numeric' and stats['min'] is not None and stats['min'] < stats['max']:
+                    min_val = float(stats['min'])
+                    max_val = float(stats['max'])
                     
                     filter_range = st.slider(
                         f"Filter by {col_name}:",
@@ -528,25 +713,23 @@ elif page == "Google Sheets - Data Viewer":
                     
                     if filter_range != (min_val, max_val):
                         filters[col_name] = filter_range
+                elif stats['kind'] == 'datetime':
+                    date_range = date_range_filter(f"Filter by {col_name}:", stats)
+                    if date_range is not None:
+                        filters[col_name] = date_range
         
-        # Apply filters
-        filtered_df = df.copy()
-        for col, filter_val in filters.items():
-            if isinstance(filter_val, list):
-                filtered_df = filtered_df[filtered_df[col].isin(filter_val)]
-            elif isinstance(filter_val, tuple) and len(filter_val) == 2:
-                filtered_df = filtered_df[(filtered_df[col] >= filter_val[0]) & 
-                                         (filtered_df[col] <= filter_val[1])]
+        # Apply filters on the per-column indexes; the table and export read the matching rows in place
+        with span("apply filters", 'data', filters=len(filters)):
+            matching_rows = frame_index.filter_rows(df, filters)
+        if matching_rows is not None:
+            st.caption(f"{len(matching_rows):,} of {len(df):,} rows match the filters")
         
-        # Display filtered data
+        # Display filtered data one page at a time
         if selected_columns:
-            st.dataframe(filtered_df[selected_columns], use_container_width=True)
+            paged_table(df, "viewer_table", rows=matching_rows, columns=selected_columns)
             
-            # Download button
-            csv = filtered_df[selected_columns].to_csv(index=False)
-            b64 = base64.b64encode(csv.encode()).decode()
-            href = f'<a href="data:file/csv;base64,{b64}" download="filtered_data.csv" class="btn">Download Filtered Data as CSV</a>'
-            st.markdown(href, unsafe_allow_html=True)
+            # Download the filtered rows; files are built only when requested
+            export_panel(df, "viewer_export", rows=matching_rows, columns=selected_columns, file_stem="filtered_data")
         else:
             st.warning("Please select at least one column to display")
 
@@ -556,6 +739,10 @@ elif page == "Google Sheets - Data Analysis":
     # Spreadsheet selector
     data_loaded = spreadsheet_selector()
     
+    # Render the loaded data right away; a newer revision is swapped in once refreshed in the background
+    if refresh_stale_data():
+        st.info("The sheet changed since it was loaded; showing the latest data.")
+    
     if data_loaded and st.session_state.sheets_data is not None:
         df = st.session_state.sheets_data
         
@@ -566,16 +753,30 @@ elif page == "Google Sheets - Data Analysis":
             st.warning("No numeric columns found in the data. Please select a different sheet with numeric data.")
         else:
             # Statistical Analysis
+            subsection("Statistical Analysis")
             st.markdown("<h2 class='page-header'>Statistical Analysis</h2>", unsafe_allow_html=True)
             
+            # Approximate mode reads medians and quartiles from sketches built at load time instead of sorting columns
+            stats_mode = st.radio(
+                "Statistics mode:",
+                ["Exact", "Approximate"],
+                index=1 if len(df) >= APPROXIMATE_STATS_ROWS else 0,
+                horizontal=True,
+                help=f"Approximate quantiles are within ±{QUANTILE_RELATIVE_ACCURACY:.0%} of the exact value; "
+                     "mean and standard deviation are exact in both modes."
+            )
+            approximate = stats_mode == "Approximate"
+            
             # Summary statistics
             st.markdown("<h3 class='section-header'>Summary Statistics</h3>", unsafe_allow_html=True)
-            st.dataframe(df[numeric_cols].describe(), use_container_width=True)
+            # Memoized by content fingerprint: computed once per dataset version, shared across sessions
+            numeric_fingerprint = frame_fingerprint(df, numeric_cols, sheet_version(df))
+            st.dataframe(describe(df, numeric_cols, fingerprint=numeric_fingerprint), use_container_width=True)
             
             # Correlation analysis
             if len(numeric_cols) > 1:
                 st.markdown("<h3 class='section-header'>Correlation Matrix</h3>", unsafe_allow_html=True)
-                corr = df[numeric_cols].corr()
+                corr = correlation(df, numeric_cols, fingerprint=numeric_fingerprint)
                 
                 # Heatmap of correlation
                 fig = px.imshow(
@@ -585,21 +786,17 @@ elif page == "Google Sheets - Data Analysis":
                     color_continuous_scale='RdBu_r',
                     title="Correlation Between Numeric Variables"
                 )
-                st.plotly_chart(fig, use_container_width=True)
+                plot_chart(fig, use_container_width=True)
                 
                 # Highlight strong correlations
-                strong_corr = corr.unstack().reset_index()
-                strong_corr.columns = ['Variable 1', 'Variable 2', 'Correlation']
-                strong_corr = strong_corr[
-                    (strong_corr['Variable 1'] != strong_corr['Variable 2']) & 
-                    (abs(strong_corr['Correlation']) > 0.5)
-                ].sort_values(by='Correlation', ascending=False)
+                strong_corr = strong_correlations(df, numeric_cols, 0.5, fingerprint=numeric_fingerprint)
                 
                 if not strong_corr.empty:
                     st.markdown("<h3 class='section-header'>Strong Correlations</h3>", unsafe_allow_html=True)
                     st.dataframe(strong_corr, use_container_width=True)
             
             # Data Visualization
+            subsection("Data Visualization")
             st.markdown("<h2 class='page-header'>Data Visualization</h2>", unsafe_allow_html=True)
             
             viz_type = st.selectbox(
@@ -623,24 +820,27 @@ elif page == "Google Sheets - Data Analysis":
                     title=f"Histogram of {hist_col}",
                     marginal="box"
                 )
-                st.plotly_chart(fig, use_container_width=True)
+                plot_chart(fig, use_container_width=True)
                 
-                # Basic statistics
+                # Basic statistics (memoized, so moving the bins slider does not recompute them)
+                summary = analysis_summary(df, hist_col, approximate)
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
-                    st.metric("Mean", f"{df[hist_col].mean():.2f}")
+                    st.metric("Mean", f"{summary['mean']:.2f}")
                 with col2:
-                    st.metric("Median", f"{df[hist_col].median():.2f}")
+                    st.metric("Median", f"{summary['median']:.2f}")
                 with col3:
-                    st.metric("Std Dev", f"{df[hist_col].std():.2f}")
+                    st.metric("Std Dev", f"{summary['std']:.2f}")
                 with col4:
-                    st.metric("IQR", f"{df[hist_col].quantile(0.75) - df[hist_col].quantile(0.25):.2f}")
+                    st.metric("IQR", f"{summary['iqr']:.2f}")
+                if 'relative_accuracy' in summary:
+                    st.caption(f"Median and IQR are approximate (quartiles within ±{summary['relative_accuracy']:.0%})")
             
             elif viz_type == "Box Plot":
                 box_col = st.selectbox("Select column for box plot:", numeric_cols)
                 
                 # Optional grouping
-                categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
+                categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
                 group_by = None
                 
                 if categorical_cols:
@@ -664,7 +864,7 @@ elif page == "Google Sheets - Data Analysis":
                         points="all"
                     )
                 
-                st.plotly_chart(fig, use_container_width=True)
+                plot_chart(fig, use_container_width=True)
             
             elif viz_type == "Scatter Plot":
                 col1, col2 = st.columns(2)
@@ -680,7 +880,7 @@ elif page == "Google Sheets - Data Analysis":
                     )
                 
                 # Optional color grouping
-                categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
+                categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
                 color_by = None
                 
                 if categorical_cols:
@@ -688,16 +888,17 @@ elif page == "Google Sheets - Data Analysis":
                     if use_color:
                         color_by = st.selectbox("Select color column:", categorical_cols)
                 
-                fig = px.scatter(
+                fig, mode = scatter_figure(
                     df,
-                    x=x_col,
-                    y=y_col,
-                    color=color_by,
-                    title=f"Scatter Plot: {y_col} vs {x_col}",
-                    trendline="ols" if not color_by else None
+                    x_col,
+                    y_col,
+                    color_col=color_by,
+                    title=f"Scatter Plot: {y_col} vs {x_col}"
                 )
                 
-                st.plotly_chart(fig, use_container_width=True)
+                plot_chart(fig, use_container_width=True)
+                if mode == 'density':
+                    st.caption(density_caption(color_by))
                 
                 # Show correlation
                 corr_val = df[[x_col, y_col]].corr().iloc[0, 1]
@@ -705,7 +906,7 @@ elif page == "Google Sheets - Data Analysis":
             
             elif viz_type == "Bar Chart":
                 # For bar charts, we need a categorical and a numeric column
-                categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
+                categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
                 
                 if not categorical_cols:
                     st.warning("No categorical columns found for bar chart. Converting a numeric column to categories.")
@@ -760,26 +961,19 @@ elif page == "Google Sheets - Data Analysis":
                 )
                 
                 fig.update_layout(xaxis_title=cat_col, yaxis_title=f"{agg_method} of {value_col}")
-                st.plotly_chart(fig, use_container_width=True)
+                plot_chart(fig, use_container_width=True)
             
             elif viz_type == "Line Chart":
                 # For line charts, we typically need a time series or sequential data
-                date_cols = []
-                
-                # Try to identify date columns
-                for col in df.columns:
-                    if df[col].dtype == 'object':
-                        try:
-                            pd.to_datetime(df[col])
-                            date_cols.append(col)
-                        except:
-                            pass
+                # Datetime columns, and text columns whose date format was detected for this sheet
+                date_cols = sheet_date_columns(df)
                 
                 if date_cols:
                     x_col = st.selectbox("Select date/time column:", date_cols)
                     
-                    # Convert to datetime
-                    df[x_col] = pd.to_datetime(df[x_col], errors='coerce')
+                    # Parsed once per revision with the detected format, then kept in the loaded frame
+                    if not pd.api.types.is_datetime64_any_dtype(df[x_col]):
+                        df[x_col] = sheet_parsed_dates(df, x_col)
                 else:
                     # If no date columns, use a numeric column as sequence
                     x_col = st.selectbox("Select sequence column:", numeric_cols)
@@ -792,45 +986,29 @@ elif page == "Google Sheets - Data Analysis":
                 )
                 
                 if y_cols:
-                    # Sort by the x column
-                    plot_df = df.sort_values(by=x_col)
-                    
-                    fig = go.Figure()
-                    
-                    for y_col in y_cols:
-                        fig.add_trace(
-                            go.Scatter(
-                                x=plot_df[x_col],
-                                y=plot_df[y_col],
-                                mode='lines+markers',
-                                name=y_col
-                            )
-                        )
-                    
-                    fig.update_layout(
-                        title=f"Line Chart over {x_col}",
-                        xaxis_title=x_col,
-                        yaxis_title="Value",
-                        legend_title="Variables"
+                    # Downsampled per series in x order, with a zoom slider for full resolution
+                    line_chart_panel(
+                        df,
+                        x_col,
+                        y_cols,
+                        "analysis_line",
+                        f"Line Chart over {x_col}",
+                        mode='lines+markers',
+                        render=plot_chart
                     )
-                    
-                    st.plotly_chart(fig, use_container_width=True)
                 else:
                     st.warning("Please select at least one column to plot")
             
             # Outlier Detection
+            subsection("Outlier Detection")
             st.markdown("<h2 class='page-header'>Outlier Detection</h2>", unsafe_allow_html=True)
             
             outlier_col = st.selectbox("Select column for outlier detection:", numeric_cols)
             
-            # Calculate IQR
-            Q1 = df[outlier_col].quantile(0.25)
-            Q3 = df[outlier_col].quantile(0.75)
-            IQR = Q3 - Q1
-            
-            # Define outliers
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
+            # Calculate IQR and define outliers (memoized per dataset version)
+            summary = analysis_summary(df, outlier_col, approximate)
+            lower_bound = summary['lower_bound']
+            upper_bound = summary['upper_bound']
             
             outliers = df[(df[outlier_col] < lower_bound) | (df[outlier_col] > upper_bound)]
             
@@ -864,7 +1042,7 @@ elif page == "Google Sheets - Data Analysis":
                     )
                 )
                 
-                st.plotly_chart(fig, use_container_width=True)
+                plot_chart(fig, use_container_width=True)
             else:
                 st.info(f"No outliers detected in {outlier_col} using the IQR method")
 
@@ -874,6 +1052,7 @@ elif page == "Google Sheets - Data Comparison":
     st.info("This page allows you to compare data across different worksheets or spreadsheets.")
     
     # First dataset
+    subsection("First Dataset")
     st.markdown("<h2 class='page-header'>First Dataset</h2>", unsafe_allow_html=True)
     
     # Spreadsheet selector for first dataset
@@ -888,8 +1067,7 @@ elif page == "Google Sheets - Data Comparison":
                 spreadsheet_id_1 = spreadsheet_url_1
             
             # Connect to Google Sheets
-            gc = gspread.authorize(st.session_state.credentials)
-            spreadsheet_1 = gc.open_by_key(spreadsheet_id_1)
+            spreadsheet_1 = open_spreadsheet(st.session_state.credentials, spreadsheet_id_1)
             
             # Get list of worksheets
             worksheet_list_1 = [sheet.title for sheet in spreadsheet_1.worksheets()]
@@ -905,27 +1083,14 @@ elif page == "Google Sheets - Data Comparison":
             )
             
             if selected_sheet_1:
-                # Get the selected worksheet
-                worksheet_1 = spreadsheet_1.worksheet(selected_sheet_1)
+                # Load the selected worksheet through the shared cache and loader
+                df_1, _, _ = get_worksheet_frame(st.session_state.credentials, spreadsheet_id_1, selected_sheet_1)
                 
-                # Get all values from the worksheet
-                data_1 = worksheet_1.get_all_values()
-                
-                if data_1:
-                    # Convert to DataFrame
-                    headers_1 = data_1[0]
-                    df_1 = pd.DataFrame(data_1[1:], columns=headers_1)
-                    
-                    # Try to convert numeric columns
-                    for col in df_1.columns:
-                        try:
-                            df_1[col] = pd.to_numeric(df_1[col])
-                        except:
-                            pass
-                    
+                if df_1 is not None:
                     st.write(f"First dataset: {len(df_1)} rows, {len(df_1.columns)} columns")
                     
                     # Second dataset
+                    subsection("Second Dataset")
                     st.markdown("<h2 class='page-header'>Second Dataset</h2>", unsafe_allow_html=True)
                     
                     # Option to use same spreadsheet or different one
@@ -961,7 +1126,7 @@ elif page == "Google Sheets - Data Comparison":
                                     spreadsheet_id_2 = spreadsheet_url_2
                                 
                                 # Connect to Google Sheets
-                                spreadsheet_2 = gc.open_by_key(spreadsheet_id_2)
+                                spreadsheet_2 = open_spreadsheet(st.session_state.credentials, spreadsheet_id_2)
                                 
                                 # Get list of worksheets
                                 worksheet_list_2 = [sheet.title for sheet in spreadsheet_2.worksheets()]
@@ -982,27 +1147,14 @@ elif page == "Google Sheets - Data Comparison":
                             selected_sheet_2 = None
                     
                     if selected_sheet_2:
-                        # Get the selected worksheet
-                        worksheet_2 = spreadsheet_2.worksheet(selected_sheet_2)
-                        
-                        # Get all values from the worksheet
-                        data_2 = worksheet_2.get_all_values()
+                        # Load the selected worksheet through the shared cache and loader
+                        df_2, _, _ = get_worksheet_frame(st.session_state.credentials, spreadsheet_2.id, selected_sheet_2)
                         
-                        if data_2:
-                            # Convert to DataFrame
-                            headers_2 = data_2[0]
-                            df_2 = pd.DataFrame(data_2[1:], columns=headers_2)
-                            
-                            # Try to convert numeric columns
-                            for col in df_2.columns:
-                                try:
-                                    df_2[col] = pd.to_numeric(df_2[col])
-                                except:
-                                    pass
-                            
+                        if df_2 is not None:
                             st.write(f"Second dataset: {len(df_2)} rows, {len(df_2.columns)} columns")
                             
                             # Comparison options
+                            subsection("Comparison Options")
                             st.markdown("<h2 class='page-header'>Comparison Options</h2>", unsafe_allow_html=True)
                             
                             comparison_type = st.radio(
@@ -1016,12 +1168,13 @@ elif page == "Google Sheets - Data Comparison":
                                 
                                 for col in df_1.columns:
                                     if col in df_2.columns:
-                                        try:
-                                            pd.to_numeric(df_1[col])
-                                            pd.to_numeric(df_2[col])
+                                        if (
+                                            pd.api.types.is_numeric_dtype(df_1[col])
+                                            and pd.api.types.is_numeric_dtype(df_2[col])
+                                            and not pd.api.types.is_bool_dtype(df_1[col])
+                                            and not pd.api.types.is_bool_dtype(df_2[col])
+                                        ):
                                             common_numeric_cols.append(col)
-                                        except:
-                                            pass
                                 
                                 if common_numeric_cols:
                                     selected_col = st.selectbox(
@@ -1067,7 +1220,7 @@ elif page == "Google Sheets - Data Comparison":
                                         yaxis_title=selected_col
                                     )
                                     
-                                    st.plotly_chart(fig, use_container_width=True)
+                                    plot_chart(fig, use_container_width=True)
                                     
                                     # Histogram comparison
                                     fig = go.Figure()
@@ -1097,7 +1250,7 @@ elif page == "Google Sheets - Data Comparison":
                                         barmode='overlay'
                                     )
                                     
-                                    st.plotly_chart(fig, use_container_width=True)
+                                    plot_chart(fig, use_container_width=True)
                                 else:
                                     st.warning("No common numeric columns found between the two datasets.")
                             
@@ -1151,7 +1304,7 @@ elif page == "Google Sheets - Data Comparison":
                                         barmode='overlay'
                                     )
                                     
-                                    st.plotly_chart(fig, use_container_width=True)
+                                    plot_chart(fig, use_container_width=True)
                                     
                                     # Show statistics side by side
                                     col1, col2 = st.columns(2)
@@ -1194,7 +1347,7 @@ elif page == "Google Sheets - Data Comparison":
                                         
                                         # Compare value counts for categorical columns
                                         for col in selected_common_cols:
-                                            if df_1[col].dtype == 'object' or df_2[col].dtype == 'object':
+                                            if df_1[col].dtype.name in ['object', 'category'] or df_2[col].dtype.name in ['object', 'category']:
                                                 st.markdown(f"**Value comparison for {col}**")
                                                 
                                                 # Get value counts
@@ -1238,7 +1391,7 @@ elif page == "Google Sheets - Data Comparison":
                                                     barmode='group'
                                                 )
                                                 
-                                                st.plotly_chart(fig, use_container_width=True)
+                                                plot_chart(fig, use_container_width=True)
                                 else:
                                     st.warning("No common columns found between the two datasets.")
                             
@@ -1282,7 +1435,7 @@ elif page == "Google Sheets - Data Comparison":
                                     
                                     # Show merge results
                                     st.success(f"Merged dataset has {len(merged_df)} rows and {len(merged_df.columns)} columns")
-                                    st.dataframe(merged_df.head(10), use_container_width=True)
+                                    paged_table(merged_df, "merge_table")
                                     
                                     # Analyze the merge
                                     if join_type == "inner":
@@ -1301,10 +1454,7 @@ elif page == "Google Sheets - Data Comparison":
                                         st.info(f"Merged dataset contains {both} rows present in both sheets, {only_left} rows only in {selected_sheet_1}, and {only_right} rows only in {selected_sheet_2}")
                                     
                                     # Option to download merged data
-                                    csv = merged_df.to_csv(index=False)
-                                    b64 = base64.b64encode(csv.encode()).decode()
-                                    href = f'<a href="data:file/csv;base64,{b64}" download="merged_data.csv" class="btn">Download Merged Data as CSV</a>'
-                                    st.markdown(href, unsafe_allow_html=True)
+                                    export_panel(merged_df, "merge_export", file_stem="merged_data")
                                 else:
                                     st.warning("No common columns found for joining the datasets.")
                         else:
@@ -1320,15 +1470,20 @@ elif page == "Google Sheets - Dashboard":
     # Spreadsheet selector
     data_loaded = spreadsheet_selector()
     
+    # Render the loaded data right away; a newer revision is swapped in once refreshed in the background
+    if refresh_stale_data():
+        st.info("The sheet changed since it was loaded; showing the latest data.")
+    
     if data_loaded and st.session_state.sheets_data is not None:
         df = st.session_state.sheets_data
         
         # Dashboard configuration
+        subsection("Dashboard Configuration")
         st.markdown("<h2 class='page-header'>Dashboard Configuration</h2>", unsafe_allow_html=True)
         
         # Identify numeric and categorical columns
         numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
-        categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
+        categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
         
         if not numeric_cols:
             st.warning("No numeric columns found in the data. Dashboard requires numeric data for visualization.")
@@ -1436,6 +1591,7 @@ elif page == "Google Sheets - Dashboard":
                     
                     charts.append({
                         "type": chart_type,
+                        "key": f"dashboard_chart_{i}",
                         "title": chart_title,
                         "x_col": x_col,
                         "y_cols": y_cols
@@ -1500,9 +1656,6 @@ elif page == "Google Sheets - Dashboard":
                         else:
                             color_col = "None"
                     
-                    charts.append({ 
-                            color_col = "None"
-                    
                     charts.append({
                         "type": chart_type,
                         "title": chart_title,
@@ -1620,6 +1773,7 @@ elif page == "Google Sheets - Data Editor":
         df = st.session_state.sheets_data.copy()
         
         # Data editor options
+        subsection("Edit Data")
         st.markdown("<h2 class='page-header'>Edit Data</h2>", unsafe_allow_html=True)
         
         edit_mode = st.radio(
@@ -1641,19 +1795,31 @@ elif page == "Google Sheets - Data Editor":
             if st.button("Save Changes to Google Sheets"):
                 try:
                     # Connect to Google Sheets
-                    gc = gspread.authorize(st.session_state.credentials)
-                    spreadsheet = gc.open_by_key(st.session_state.current_spreadsheet)
-                    worksheet = spreadsheet.worksheet(st.session_state.current_worksheet)
+                    worksheet = open_worksheet(
+                        st.session_state.credentials,
+                        st.session_state.current_spreadsheet,
+                        st.session_state.current_worksheet
+                    )
                     
                     # Clear the worksheet and update with new data
                     worksheet.clear()
                     
-                    # Convert all data to strings for gspread
-                    edited_df = edited_df.astype(str)
+                    # Convert all data to strings for gspread, keeping empty cells empty
+                    edited_df = edited_df.astype(object).where(edited_df.notna(), '').astype(str)
                     
                     # Update the worksheet
                     set_with_dataframe(worksheet, edited_df, include_index=False, include_column_header=True)
                     
+                    # Drop the shared cached copy and its statistics now that the sheet has changed
+                    shared_sheet_cache.invalidate(
+                        st.session_state.current_spreadsheet,
+                        st.session_state.current_worksheet
+                    )
+                    column_stats_cache.forget(
+                        st.session_state.current_spreadsheet,
+                        st.session_state.current_worksheet
+                    )
+                    
                     # Update the session state
                     st.session_state.sheets_data = edited_df
                     
@@ -1687,9 +1853,11 @@ elif page == "Google Sheets - Data Editor":
                     new_df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
                     
                     # Connect to Google Sheets
-                    gc = gspread.authorize(st.session_state.credentials)
-                    spreadsheet = gc.open_by_key(st.session_state.current_spreadsheet)
-                    worksheet = spreadsheet.worksheet(st.session_state.current_worksheet)
+                    worksheet = open_worksheet(
+                        st.session_state.credentials,
+                        st.session_state.current_spreadsheet,
+                        st.session_state.current_worksheet
+                    )
                     
                     # Convert all values to strings for gspread
                     row_values = [str(new_row[col]) for col in df.columns]
@@ -1697,6 +1865,16 @@ elif page == "Google Sheets - Data Editor":
                     # Append the new row
                     worksheet.append_row(row_values)
                     
+                    # Drop the shared cached copy and its statistics now that the sheet has changed
+                    shared_sheet_cache.invalidate(
+                        st.session_state.current_spreadsheet,
+                        st.session_state.current_worksheet
+                    )
+                    column_stats_cache.forget(
+                        st.session_state.current_spreadsheet,
+                        st.session_state.current_worksheet
+                    )
+                    
                     # Update the session state
                     st.session_state.sheets_data = new_df
                     
@@ -1734,9 +1912,11 @@ elif page == "Google Sheets - Data Editor":
                         new_df = df.drop(zero_based_indices).reset_index(drop=True)
                         
                         # Connect to Google Sheets
-                        gc = gspread.authorize(st.session_state.credentials)
-                        spreadsheet = gc.open_by_key(st.session_state.current_spreadsheet)
-                        worksheet = spreadsheet.worksheet(st.session_state.current_worksheet)
+                        worksheet = open_worksheet(
+                            st.session_state.credentials,
+                            st.session_state.current_spreadsheet,
+                            st.session_state.current_worksheet
+                        )
                         
                         # Clear the worksheet
                         worksheet.clear()
@@ -1744,6 +1924,16 @@ elif page == "Google Sheets - Data Editor":
                         # Update with new data
                         set_with_dataframe(worksheet, new_df, include_index=False, include_column_header=True)
                         
+                        # Drop the shared cached copy and its statistics now that the sheet has changed
+                        shared_sheet_cache.invalidate(
+                            st.session_state.current_spreadsheet,
+                            st.session_state.current_worksheet
+                        )
+                        column_stats_cache.forget(
+                            st.session_state.current_spreadsheet,
+                            st.session_state.current_worksheet
+                        )
+                        
                         # Update the session state
                         st.session_state.sheets_data = new_df
                         
@@ -1777,9 +1967,11 @@ elif page == "Google Sheets - Data Editor":
                         df[new_col_name] = default_value
                         
                         # Connect to Google Sheets
-                        gc = gspread.authorize(st.session_state.credentials)
-                        spreadsheet = gc.open_by_key(st.session_state.current_spreadsheet)
-                        worksheet = spreadsheet.worksheet(st.session_state.current_worksheet)
+                        worksheet = open_worksheet(
+                            st.session_state.credentials,
+                            st.session_state.current_spreadsheet,
+                            st.session_state.current_worksheet
+                        )
                         
                         # Get the next column letter
                         next_col = chr(65 + len(df.columns) - 1)  # A=65, B=66, etc.
@@ -1797,6 +1989,16 @@ elif page == "Google Sheets - Data Editor":
                             
                             worksheet.update_cells(cell_list)
                         
+                        # Drop the shared cached copy and its statistics now that the sheet has changed
+                        shared_sheet_cache.invalidate(
+                            st.session_state.current_spreadsheet,
+                            st.session_state.current_worksheet
+                        )
+                        column_stats_cache.forget(
+                            st.session_state.current_spreadsheet,
+                            st.session_state.current_worksheet
+                        )
+                        
                         # Update the session state
                         st.session_state.sheets_data = df
                         
@@ -1813,9 +2015,11 @@ elif page == "Google Sheets - Data Editor":
                         df[new_col_name] = default_value
                         
                         # Connect to Google Sheets
-                        gc = gspread.authorize(st.session_state.credentials)
-                        spreadsheet = gc.open_by_key(st.session_state.current_spreadsheet)
-                        worksheet = spreadsheet.worksheet(st.session_state.current_worksheet)
+                        worksheet = open_worksheet(
+                            st.session_state.credentials,
+                            st.session_state.current_spreadsheet,
+                            st.session_state.current_worksheet
+                        )
                         
                         # Get the next column letter
                         next_col = chr(65 + len(df.columns) - 1)  # A=65, B=66, etc.
@@ -1832,6 +2036,16 @@ elif page == "Google Sheets - Data Editor":
                         
                         worksheet.update_cells(cell_list)
                         
+                        # Drop the shared cached copy and its statistics now that the sheet has changed
+                        shared_sheet_cache.invalidate(
+                            st.session_state.current_spreadsheet,
+                            st.session_state.current_worksheet
+                        )
+                        column_stats_cache.forget(
+                            st.session_state.current_spreadsheet,
+                            st.session_state.current_worksheet
+                        )
+                        
                         # Update the session state
                         st.session_state.sheets_data = df
                         
@@ -1845,9 +2059,11 @@ elif page == "Google Sheets - Data Editor":
                 if st.button("Add Column") and new_col_name and formula:
                     try:
                         # Connect to Google Sheets
-                        gc = gspread.authorize(st.session_state.credentials)
-                        spreadsheet = gc.open_by_key(st.session_state.current_spreadsheet)
-                        worksheet = spreadsheet.worksheet(st.session_state.current_worksheet)
+                        worksheet = open_worksheet(
+                            st.session_state.credentials,
+                            st.session_state.current_spreadsheet,
+                            st.session_state.current_worksheet
+                        )
                         
                         # Get the next column letter
                         next_col = chr(65 + len(df.columns))  # A=65, B=66, etc.
@@ -1861,10 +2077,21 @@ elif page == "Google Sheets - Data Editor":
                             row_formula = formula.replace("2", str(i))
                             worksheet.update_cell(i, len(df.columns) + 1, row_formula)
                         
+                        # Drop the shared cached copy and its statistics now that the sheet has changed
+                        shared_sheet_cache.invalidate(
+                            st.session_state.current_spreadsheet,
+                            st.session_state.current_worksheet
+                        )
+                        column_stats_cache.forget(
+                            st.session_state.current_spreadsheet,
+                            st.session_state.current_worksheet
+                        )
+                        
                         # Refresh the data
                         updated_data = worksheet.get_all_values()
                         headers = updated_data[0]
                         updated_df = pd.DataFrame(updated_data[1:], columns=headers)
+                        updated_df, _ = convert_column_types(updated_df)
                         
                         # Update the session state
                         st.session_state.sheets_data = updated_df
@@ -1894,9 +2121,11 @@ elif page == "Google Sheets - Data Editor":
                         )
                         
                         # Connect to Google Sheets
-                        gc = gspread.authorize(st.session_state.credentials)
-                        spreadsheet = gc.open_by_key(st.session_state.current_spreadsheet)
-                        worksheet = spreadsheet.worksheet(st.session_state.current_worksheet)
+                        worksheet = open_worksheet(
+                            st.session_state.credentials,
+                            st.session_state.current_spreadsheet,
+                            st.session_state.current_worksheet
+                        )
                         
                         # Clear the worksheet
                         worksheet.clear()
@@ -1904,6 +2133,16 @@ elif page == "Google Sheets - Data Editor":
                         # Update with new data
                         set_with_dataframe(worksheet, df, include_index=False, include_column_header=True)
                         
+                        # Drop the shared cached copy and its statistics now that the sheet has changed
+                        shared_sheet_cache.invalidate(
+                            st.session_state.current_spreadsheet,
+                            st.session_state.current_worksheet
+                        )
+                        column_stats_cache.forget(
+                            st.session_state.current_spreadsheet,
+                            st.session_state.current_worksheet
+                        )
+                        
                         # Update the session state
                         st.session_state.sheets_data = df
                         
@@ -1926,9 +2165,11 @@ elif page == "Google Sheets - Data Editor":
                     new_df = df.drop(columns=cols_to_delete)
                     
                     # Connect to Google Sheets
-                    gc = gspread.authorize(st.session_state.credentials)
-                    spreadsheet = gc.open_by_key(st.session_state.current_spreadsheet)
-                    worksheet = spreadsheet.worksheet(st.session_state.current_worksheet)
+                    worksheet = open_worksheet(
+                        st.session_state.credentials,
+                        st.session_state.current_spreadsheet,
+                        st.session_state.current_worksheet
+                    )
                     
                     # Clear the worksheet
                     worksheet.clear()
@@ -1936,6 +2177,16 @@ elif page == "Google Sheets - Data Editor":
                     # Update with new data
                     set_with_dataframe(worksheet, new_df, include_index=False, include_column_header=True)
                     
+                    # Drop the shared cached copy and its statistics now that the sheet has changed
+                    shared_sheet_cache.invalidate(
+                        st.session_state.current_spreadsheet,
+                        st.session_state.current_worksheet
+                    )
+                    column_stats_cache.forget(
+                        st.session_state.current_spreadsheet,
+                        st.session_state.current_worksheet
+                    )
+                    
                     # Update the session state
                     st.session_state.sheets_data = new_df
                     
@@ -1944,6 +2195,7 @@ elif page == "Google Sheets - Data Editor":
                     st.error(f"Error deleting columns: {str(e)}")
         
         # Data preview
+        subsection("Data Preview")
         st.markdown("<h2 class='page-header'>Data Preview</h2>", unsafe_allow_html=True)
         st.dataframe(df.head(10), use_container_width=True)
 
@@ -1952,8 +2204,8 @@ elif page == "Google Calendar":
     
     if st.session_state.authenticated:
         try:
-            # Build the Calendar service
-            service = build('calendar', 'v3', credentials=st.session_state.credentials)
+            # Get the pooled Calendar service
+            service = get_service(st.session_state.credentials, 'calendar', 'v3')
             
             # Get calendar ID
             calendar_id = st.text_input("Enter Calendar ID (or 'primary' for your primary calendar):", "primary")
@@ -2024,6 +2276,7 @@ elif page == "Google Calendar":
                         
                         if view_type == "List View":
                             # Display events as a table
+                            subsection("Upcoming Events")
                             st.markdown("<h2 class='page-header'>Upcoming Events</h2>", unsafe_allow_html=True)
                             st.dataframe(events_df[['Summary', 'Start', 'End', 'Location']], use_container_width=True)
                             
@@ -2058,6 +2311,7 @@ elif page == "Google Calendar":
                                     st.markdown(event_details['Description'])
                         
                         elif view_type == "Calendar View":
+                            subsection("Calendar View")
                             st.markdown("<h2 class='page-header'>Calendar View</h2>", unsafe_allow_html=True)
                             
                             # Group events by date
@@ -2090,6 +2344,7 @@ elif page == "Google Calendar":
                                             st.markdown(event['Description'])
                         
                         elif view_type == "Timeline View":
+                            subsection("Timeline View")
                             st.markdown("<h2 class='page-header'>Timeline View</h2>", unsafe_allow_html=True)
                             
                             # Create a timeline chart
@@ -2138,7 +2393,7 @@ elif page == "Google Calendar":
                                 barmode='overlay'
                             )
                             
-                            st.plotly_chart(fig, use_container_width=True)
+                            plot_chart(fig, use_container_width=True)
                     else:
                         st.info(f"No events found between {start_date} and {end_date}.")
                 else:
@@ -2153,8 +2408,8 @@ elif page == "Google Drive":
     
     if st.session_state.authenticated:
         try:
-            # Build the Drive service
-            drive_service = build('drive', 'v3', credentials=st.session_state.credentials)
+            # Get the pooled Drive service
+            drive_service = get_service(st.session_state.credentials, 'drive', 'v3')
             
             # Tabs for different functions
             drive_tab = st.radio(
@@ -2164,6 +2419,7 @@ elif page == "Google Drive":
             )
             
             if drive_tab == "Upload Files":
+                subsection("Upload Files to Google Drive")
                 st.markdown("<h2 class='page-header'>Upload Files to Google Drive</h2>", unsafe_allow_html=True)
                 
                 # File uploader
@@ -2265,6 +2521,7 @@ elif page == "Google Drive":
                                 st.error(f"Error uploading file: {str(e)}")
             
             elif drive_tab == "Browse Files":
+                subsection("Browse Google Drive Files")
                 st.markdown("<h2 class='page-header'>Browse Google Drive Files</h2>", unsafe_allow_html=True)
                 
                 # Get folders from Drive
@@ -2382,6 +2639,7 @@ elif page == "Google Drive":
                     st.info(f"No files found in {selected_folder} matching the selected criteria.")
             
             elif drive_tab == "Search Files":
+                subsection("Search Google Drive Files")
                 st.markdown("<h2 class='page-header'>Search Google Drive Files</h2>", unsafe_allow_html=True)
                 
                 # Search query
@@ -2520,6 +2778,7 @@ elif page == "Google Drive":
                         st.info(f"No results found for '{search_query}'")
             
             elif drive_tab == "Manage Folders":
+                subsection("Manage Google Drive Folders")
                 st.markdown("<h2 class='page-header'>Manage Google Drive Folders</h2>", unsafe_allow_html=True)
                 
                 # Folder management options
@@ -2716,6 +2975,7 @@ elif page == "Google Drive":
         st.info("Please authenticate to use Google Drive features.")
 
 # Footer for all pages
+section("footer")
 st.markdown("---")
 st.markdown("""
 <div style='text-align: center; color: #666;'>
@@ -2723,3 +2983,5 @@ st.markdown("""
     <p><small>This app demonstrates integration with Google Sheets, Calendar, and Drive.</small></p>
 </div>
 """, unsafe_allow_html=True)
+
+rerun_trace.finish()
@@ -0,0 +1,135 @@
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from single_flight import SingleFlight
+
+# Statistics kept across all sessions (each is small: a summary table or a few numbers)
+ANALYSIS_CACHE_ENTRIES = 256
+
+
+def frame_fingerprint(df, columns, version=None):
+    """Return a content fingerprint of some columns of a frame
+
+    `version` identifies data that cannot change without a new value, e.g.
+    (spreadsheet, worksheet, Drive revision) of a frame exactly as loaded;
+    then only the shape, names and types of the columns are added to it.
+    Without a version every value is hashed, so any edit changes the
+    fingerprint.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((len(df), list(columns))).encode())
+    for column in columns:
+        digest.update(str(df[column].dtype).encode())
+    if version is not None:
+        digest.update(repr(version).encode())
+        return digest.hexdigest()
+    for column in columns:
+        digest.update(pd.util.hash_pandas_object(df[column], index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """Memoizes statistics by content fingerprint, so each is computed once per dataset version
+
+    Sessions viewing the same sheet revision hold equal frames and share
+    entries. Cached results are shared: callers must not modify them.
+    """
+
+    def __init__(self, max_entries=ANALYSIS_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._computing = SingleFlight()
+        self._lock = threading.Lock()
+
+    def get(self, name, df, columns, compute, *args, fingerprint=None):
+        """Return compute(df, columns, *args), reusing the result for equal data
+
+        Pass the frame_fingerprint() of the columns when asking for several
+        statistics of the same columns, to fingerprint them only once.
+        """
+        columns = list(columns)
+        key = (name, fingerprint or frame_fingerprint(df, columns), args)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        result, _ = self._computing.do(key, compute, df, columns, *args)
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def stats(self):
+        """Return cache counters for display"""
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+def _describe(df, columns):
+    return df[columns].describe()
+
+
+def _correlation(df, columns):
+    return df[columns].corr()
+
+
+def _strong_correlations(df, columns, threshold, fingerprint=None):
+    corr = analysis_cache.get('corr', df, columns, _correlation, fingerprint=fingerprint)
+    strong_corr = corr.unstack().reset_index()
+    strong_corr.columns = ['Variable 1', 'Variable 2', 'Correlation']
+    return strong_corr[
+        (strong_corr['Variable 1'] != strong_corr['Variable 2']) &
+        (abs(strong_corr['Correlation']) > threshold)
+    ].sort_values(by='Correlation', ascending=False)
+
+
+def _column_summary(df, columns):
+    series = df[columns[0]]
+    q1, median, q3 = series.quantile([0.25, 0.5, 0.75]).tolist()
+    return {
+        'mean': series.mean(),
+        'median': median,
+        'std': series.std(),
+        'q1': q1,
+        'q3': q3,
+        'iqr': q3 - q1,
+        'lower_bound': q1 - 1.5 * (q3 - q1),
+        'upper_bound': q3 + 1.5 * (q3 - q1)
+    }
+
+
+# Shared by every session served by this process
+analysis_cache = AnalysisCache()
+
+
+def describe(df, columns, fingerprint=None):
+    """df[columns].describe(), memoized"""
+    return analysis_cache.get('describe', df, columns, _describe, fingerprint=fingerprint)
+
+
+def correlation(df, columns, fingerprint=None):
+    """df[columns].corr(), memoized"""
+    return analysis_cache.get('corr', df, columns, _correlation, fingerprint=fingerprint)
+
+
+def strong_correlations(df, columns, threshold=0.5, fingerprint=None):
+    """Pairs of distinct columns whose correlation exceeds the threshold in absolute value, memoized"""
+    fingerprint = fingerprint or frame_fingerprint(df, columns)
+    compute = functools.partial(_strong_correlations, fingerprint=fingerprint)
+    return analysis_cache.get('strong_corr', df, columns, compute, threshold, fingerprint=fingerprint)
+
+
+def column_summary(df, column, fingerprint=None):
+    """Mean, median, std, quartiles, IQR and 1.5 x IQR outlier bounds of a column, memoized"""
+    return analysis_cache.get('summary', df, [column], _column_summary, fingerprint=fingerprint)
@@ -0,0 +1,263 @@
+import os
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from perf_spans import current_section_name
+
+# Upper bounds in seconds of the request latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Where the Prometheus text exposition is published; both are optional
+METRICS_FILE_ENV = 'API_METRICS_FILE'
+METRICS_PORT_ENV = 'API_METRICS_PORT'
+
+# Seconds between rewrites of the metrics file
+METRICS_WRITE_INTERVAL = 15
+
+# Page label of calls made outside a traced page (warm-up, background refreshes)
+BACKGROUND_PAGE = 'background'
+
+# (HTTP method or None for any, path pattern, API method name), first match wins
+_METHOD_PATTERNS = [
+    ('GET', r'/v4/spreadsheets/[^/]+/values:batchGet', 'spreadsheets.values.batchGet'),
+    ('POST', r'/v4/spreadsheets/[^/]+/values:batchUpdate', 'spreadsheets.values.batchUpdate'),
+    ('POST', r'/v4/spreadsheets/[^/]+/values:batchClear', 'spreadsheets.values.batchClear'),
+    ('POST', r'/v4/spreadsheets/[^/]+/values/.+:append', 'spreadsheets.values.append'),
+    ('POST', r'/v4/spreadsheets/[^/]+/values/.+:clear', 'spreadsheets.values.clear'),
+    ('PUT', r'/v4/spreadsheets/[^/]+/values/.+', 'spreadsheets.values.update'),
+    ('GET', r'/v4/spreadsheets/[^/]+/values/.+', 'spreadsheets.values.get'),
+    ('POST', r'/v4/spreadsheets/[^/]+:batchUpdate', 'spreadsheets.batchUpdate'),
+    ('GET', r'/v4/spreadsheets/[^/]+', 'spreadsheets.get'),
+    ('POST', r'/v4/spreadsheets', 'spreadsheets.create'),
+    (None, r'/upload/drive/v3/files.*', 'files.create'),
+    ('GET', r'/drive/v3/files', 'files.list'),
+    ('POST', r'/drive/v3/files', 'files.create'),
+    ('GET', r'/drive/v3/files/[^/]+/export', 'files.export'),
+    ('POST', r'/drive/v3/files/[^/]+/copy', 'files.copy'),
+    ('GET', r'/drive/v3/files/[^/]+', 'files.get'),
+    ('PATCH', r'/drive/v3/files/[^/]+', 'files.update'),
+    ('DELETE', r'/drive/v3/files/[^/]+', 'files.delete'),
+    (None, r'/drive/v3/files/[^/]+/permissions.*', 'permissions'),
+    ('GET', r'/drive/v3/about', 'about.get'),
+    ('GET', r'/calendar/v3/users/me/calendarList', 'calendarList.list'),
+    ('GET', r'/calendar/v3/calendars/[^/]+/events', 'events.list'),
+    ('POST', r'/calendar/v3/calendars/[^/]+/events', 'events.insert'),
+    ('GET', r'/calendar/v3/calendars/[^/]+/events/[^/]+', 'events.get'),
+    ('PATCH', r'/calendar/v3/calendars/[^/]+/events/[^/]+', 'events.patch'),
+    ('PUT', r'/calendar/v3/calendars/[^/]+/events/[^/]+', 'events.update'),
+    ('DELETE', r'/calendar/v3/calendars/[^/]+/events/[^/]+', 'events.delete'),
+    ('GET', r'/oauth2/v2/userinfo', 'userinfo.get')
+]
+_METHOD_PATTERNS = [(method, re.compile(pattern), name) for method, pattern, name in _METHOD_PATTERNS]
+
+
+def api_method(http_method, path):
+    """Return the API method name of a request path, e.g. spreadsheets.values.get"""
+    for method, pattern, name in _METHOD_PATTERNS:
+        if (method is None or method == http_method) and pattern.fullmatch(path):
+            return name
+    # Unknown paths share one label to keep the number of series bounded
+    return f"other.{http_method.lower()}"
+
+
+def current_page():
+    """Return the page the current call is made from, from the rerun's timing sections"""
+    name = current_section_name()
+    if name is None:
+        return BACKGROUND_PAGE
+    return name[len('page: '):] if name.startswith('page: ') else name
+
+
+class _Histogram:
+    # Bucket counts are cumulative, as Prometheus expects
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+
+
+class ApiMetrics:
+    """Counts Google API requests, latency, payload bytes, retries and errors per API method and page"""
+
+    def __init__(self):
+        self._requests = {}
+        self._errors = {}
+        self._retries = {}
+        self._bytes = {}
+        self._quota_wait = {}
+        self._latency = {}
+        self._lock = threading.Lock()
+
+    def record(self, api, method, page, status, seconds, sent_bytes=0, received_bytes=0, retry=False, quota_wait=0.0):
+        """Record one HTTP attempt; status is the HTTP status code, or 'exception' if none arrived"""
+        series = (api, method, page)
+        with self._lock:
+            code_series = series + (str(status),)
+            self._requests[code_series] = self._requests.get(code_series, 0) + 1
+            if status == 'exception' or status >= 400:
+                self._errors[code_series] = self._errors.get(code_series, 0) + 1
+            if retry:
+                self._retries[series] = self._retries.get(series, 0) + 1
+            for direction, size in (('sent', sent_bytes), ('received', received_bytes)):
+                byte_series = series + (direction,)
+                self._bytes[byte_series] = self._bytes.get(byte_series, 0) + size
+            self._quota_wait[series] = self._quota_wait.get(series, 0.0) + quota_wait
+            self._latency.setdefault(series, _Histogram()).observe(seconds)
+
+    def snapshot(self):
+        """Return per-method totals for display: {(api, method, page): {...}}"""
+        with self._lock:
+            totals = {}
+            for (api, method, page, code), count in self._requests.items():
+                entry = totals.setdefault((api, method, page), {'requests': 0, 'errors': 0, 'retries': 0, 'seconds': 0.0})
+                entry['requests'] += count
+            for (api, method, page, code), count in self._errors.items():
+                totals[(api, method, page)]['errors'] += count
+            for series, count in self._retries.items():
+                totals[series]['retries'] += count
+            for series, histogram in self._latency.items():
+                totals[series]['seconds'] += histogram.sum
+            return totals
+
+    def render_prometheus(self):
+        """Return the metrics in the Prometheus text exposition format"""
+        def labels(names, values):
+            return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+        series_names = ('api', 'method', 'page')
+        lines = []
+        with self._lock:
+            lines += [
+                '# HELP google_api_requests_total Google API HTTP attempts by response code.',
+                '# TYPE google_api_requests_total counter'
+            ]
+            for key, value in sorted(self._requests.items()):
+                lines.append(f"google_api_requests_total{{{labels(series_names + ('code',), key)}}} {value}")
+
+            lines += [
+                '# HELP google_api_errors_total Google API attempts that failed or returned an error status.',
+                '# TYPE google_api_errors_total counter'
+            ]
+            for key, value in sorted(self._errors.items()):
+                lines.append(f"google_api_errors_total{{{labels(series_names + ('code',), key)}}} {value}")
+
+            lines += [
+                '# HELP google_api_retries_total Google API attempts that were retries of a throttled or failed attempt.',
+                '# TYPE google_api_retries_total counter'
+            ]
+            for key, value in sorted(self._retries.items()):
+                lines.append(f"google_api_retries_total{{{labels(series_names, key)}}} {value}")
+
+            lines += [
+                '# HELP google_api_payload_bytes_total Request and response body bytes.',
+                '# TYPE google_api_payload_bytes_total counter'
+            ]
+            for key, value in sorted(self._bytes.items()):
+                lines.append(f"google_api_payload_bytes_total{{{labels(series_names + ('direction',), key)}}} {value}")
+
+            lines += [
+                '# HELP google_api_quota_wait_seconds_total Time spent waiting for the local quota scheduler.',
+                '# TYPE google_api_quota_wait_seconds_total counter'
+            ]
+            for key, value in sorted(self._quota_wait.items()):
+                lines.append(f"google_api_quota_wait_seconds_total{{{labels(series_names, key)}}} {value:.6f}")
+
+            lines += [
+                '# HELP google_api_request_duration_seconds Latency of Google API HTTP attempts.',
+                '# TYPE google_api_request_duration_seconds histogram'
+            ]
+            for key, histogram in sorted(self._latency.items()):
+                base = labels(series_names, key)
+                for bound, count in zip(LATENCY_BUCKETS, histogram.buckets):
+                    lines.append(f'google_api_request_duration_seconds_bucket{{{base},le="{bound}"}} {count}')
+                lines.append(f'google_api_request_duration_seconds_bucket{{{base},le="+Inf"}} {histogram.count}')
+                lines.append(f"google_api_request_duration_seconds_sum{{{base}}} {histogram.sum:.6f}")
+                lines.append(f"google_api_request_duration_seconds_count{{{base}}} {histogram.count}")
+
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus_file(self, path):
+        """Atomically replace `path` with the current metrics"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(self.render_prometheus())
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Shared by every session served by this process
+api_metrics = ApiMetrics()
+
+_exporter_lock = threading.Lock()
+_exporter_started = False
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = api_metrics.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _write_loop(path, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            api_metrics.write_prometheus_file(path)
+        except OSError:
+            pass
+
+
+def start_metrics_export(path=None, port=None, interval=METRICS_WRITE_INTERVAL):
+    """Publish the metrics to a file and/or a local /metrics endpoint once per process
+
+    Defaults come from API_METRICS_FILE and API_METRICS_PORT; nothing is
+    started when neither is set. Returns True if an exporter is running.
+    """
+    global _exporter_started
+
+    path = path or os.environ.get(METRICS_FILE_ENV)
+    port = port or os.environ.get(METRICS_PORT_ENV)
+
+    with _exporter_lock:
+        if _exporter_started:
+            return True
+        if not path and not port:
+            return False
+
+        if path:
+            threading.Thread(target=_write_loop, args=(path, interval), name='api-metrics-file', daemon=True).start()
+        if port:
+            server = ThreadingHTTPServer(('127.0.0.1', int(port)), _MetricsHandler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name='api-metrics-http', daemon=True).start()
+        _exporter_started = True
+    return True
@@ -3,18 +3,41 @@ import pandas as pd
 import os
 import json
 import tempfile
-import base64
-import plotly.express as px
 from datetime import datetime, timedelta
 import pickle
+import uuid
+import weakref
 from pathlib import Path
-from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-import gspread
-from gspread_dataframe import get_as_dataframe, set_with_dataframe
+from api_metrics import api_metrics, start_metrics_export
+from column_stats import all_values, column_stats_cache, compute_frame_stats
+from dense_charts import density_caption, scatter_figure
+from export_panel import export_panel
+from filter_index import filter_indexes
+from filter_widgets import date_range_filter
+from google_clients import client_pool, get_service, open_spreadsheet
+from lazy_imports import import_report, lazy_attribute, lazy_module
+from line_chart import line_chart_panel
+from paged_table import paged_table
+from perf_spans import section, start_trace
+from quota_scheduler import quota_scheduler
+from revalidation import sheet_revalidator
+from sheet_cache import shared_sheet_cache, get_spreadsheet_revision
+from sheet_loader import get_worksheet_frame, worksheet_loads
+from type_inference import type_report_frame
+from warmup import start_warmup, warmup_credentials, warmup_running, warmup_status
+
+# Heavy modules are imported by the first page that uses them, not at session start
+px = lazy_module('plotly.express')
+InstalledAppFlow = lazy_attribute('google_auth_oauthlib.flow', 'InstalledAppFlow')
+MediaFileUpload = lazy_attribute('googleapiclient.http', 'MediaFileUpload')
+get_as_dataframe = lazy_attribute('gspread_dataframe', 'get_as_dataframe')
+set_with_dataframe = lazy_attribute('gspread_dataframe', 'set_with_dataframe')
+
+# Label this rerun's Google API calls with the page that makes them (see api_metrics)
+start_trace("rerun")
+section("page setup")
 
 # Page configuration
 st.set_page_config(page_title="Real Estate Dashboard", page_icon="🏠", layout="wide")
@@ -65,6 +88,27 @@ if 'auth_method' not in st.session_state:
     st.session_state.auth_method = "Service Account"
 if 'token_path' not in st.session_state:
     st.session_state.token_path = None
+if 'sheets_revision' not in st.session_state:
+    st.session_state.sheets_revision = None
+if 'last_sync_report' not in st.session_state:
+    st.session_state.last_sync_report = None
+if 'client_holder' not in st.session_state:
+    st.session_state.client_holder = uuid.uuid4().hex
+
+# Register this session with the pooled client of its credentials, so another session signing out keeps it open
+if st.session_state.credentials is not None:
+    client_pool.acquire(st.session_state.credentials, st.session_state.client_holder)
+
+# Prefetch the predefined spreadsheets in the background, once per server process.
+# Uses the configured warm-up service account, or the first service account to sign in.
+if not warmup_running():
+    warmup_creds = warmup_credentials(SCOPES)
+    if warmup_creds is None and st.session_state.auth_method == "Service Account":
+        warmup_creds = st.session_state.credentials
+    start_warmup(SPREADSHEETS, warmup_creds)
+
+# Publish Google API metrics if API_METRICS_FILE or API_METRICS_PORT is set
+start_metrics_export()
 
 # Helper functions
 def save_uploaded_file(uploaded_file):
@@ -125,7 +169,7 @@ def authenticate_oauth(client_secrets_path):
                 pickle.dump(creds, token)
         
         # Get user info
-        service = build('oauth2', 'v2', credentials=creds)
+        service = get_service(creds, 'oauth2', 'v2')
         user_info = service.userinfo().get().execute()
         
         st.session_state.authenticated = True
@@ -143,49 +187,100 @@ def authenticate_oauth(client_secrets_path):
 def load_spreadsheet_data(spreadsheet_id, worksheet_name=None):
     """Load data from a Google Spreadsheet"""
     try:
-        gc = gspread.authorize(st.session_state.credentials)
-        spreadsheet = gc.open_by_key(spreadsheet_id)
-        
-        # If worksheet name is not provided, use the first one
-        if not worksheet_name:
-            worksheet = spreadsheet.sheet1
-        else:
-            worksheet = spreadsheet.worksheet(worksheet_name)
-        
-        # Get all values
-        data = worksheet.get_all_values()
+        # Served from the shared cache while the revision is unchanged; concurrent loads share one fetch
+        df, revision, sync_report = get_worksheet_frame(
+            st.session_state.credentials,
+            spreadsheet_id,
+            worksheet_name
+        )
+        st.session_state.sheets_revision = revision
+        # The frame exactly as loaded for that revision (see sheet_version)
+        st.session_state.sheets_revision_frame = None if df is None else weakref.ref(df)
+        st.session_state.last_sync_report = sync_report
         
-        if not data:
+        if df is None:
             return None, "No data found in the spreadsheet."
         
-        # First row contains headers
-        headers = data[0]
-        
-        # Create DataFrame
-        df = pd.DataFrame(data[1:], columns=headers)
-        
-        # Try to convert numeric columns
-        for col in df.columns:
-            try:
-                df[col] = pd.to_numeric(df[col])
-            except:
-                pass
-        
         return df, None
     except Exception as e:
         return None, f"Error loading spreadsheet data: {str(e)}"
 
+def sheet_column_stats(df):
+    """Return the column statistics of the loaded sheet (computed once per revision at load time)"""
+    version = sheet_version(df)
+    if version is None:
+        # Unversioned loads and frames replaced after an edit are not shared; keep their statistics with this session's frame
+        memo = st.session_state.get('unversioned_column_stats')
+        if memo is None or memo[0]() is not df:
+            memo = (weakref.ref(df), compute_frame_stats(df))
+            st.session_state.unversioned_column_stats = memo
+        return memo[1]
+    return column_stats_cache.get(*version, df)
+
+def sheet_version(df):
+    """Return (spreadsheet, worksheet, revision) if df is that sheet revision exactly as loaded, else None"""
+    loaded = st.session_state.get('sheets_revision_frame')
+    if st.session_state.sheets_revision is None or loaded is None or loaded() is not df:
+        return None
+    return (
+        st.session_state.current_spreadsheet,
+        st.session_state.current_worksheet,
+        st.session_state.sheets_revision
+    )
+
+def refresh_stale_data():
+    """Swap in a newer revision of the loaded sheet that was refreshed in the background
+
+    Also queues the next background check, so pages render the data they have
+    instead of waiting on Google. Returns True if the data was replaced.
+    """
+    spreadsheet_id = st.session_state.current_spreadsheet
+    worksheet_name = st.session_state.current_worksheet
+    if st.session_state.sheets_data is None or not spreadsheet_id:
+        return False
+    
+    updated = False
+    # Only revisions checked with this session's own credentials are swapped in
+    latest = sheet_revalidator.latest_revision(st.session_state.credentials, spreadsheet_id, worksheet_name)
+    if latest is not None and latest != st.session_state.sheets_revision:
+        # The cache only keeps the newest revision, so an older one is never swapped back in
+        df = shared_sheet_cache.get(spreadsheet_id, worksheet_name, latest)
+        if df is not None:
+            st.session_state.sheets_data = df
+            st.session_state.sheets_revision = latest
+            st.session_state.sheets_revision_frame = weakref.ref(df)
+            st.session_state.last_sync_report = None
+            updated = True
+    
+    sheet_revalidator.schedule(st.session_state.credentials, spreadsheet_id, worksheet_name)
+    return updated
+
 def get_worksheet_names(spreadsheet_id):
     """Get all worksheet names from a spreadsheet"""
     try:
-        gc = gspread.authorize(st.session_state.credentials)
-        spreadsheet = gc.open_by_key(spreadsheet_id)
-        return [sheet.title for sheet in spreadsheet.worksheets()], None
+        # Worksheet lists only change with the spreadsheet revision
+        revision = get_spreadsheet_revision(st.session_state.credentials, spreadsheet_id)
+        if revision is not None:
+            titles = shared_sheet_cache.get_worksheet_titles(spreadsheet_id, revision)
+            if titles is not None:
+                return titles, None
+        
+        spreadsheet = open_spreadsheet(st.session_state.credentials, spreadsheet_id)
+        titles = [sheet.title for sheet in spreadsheet.worksheets()]
+        
+        if revision is not None:
+            shared_sheet_cache.put_worksheet_titles(spreadsheet_id, revision, titles)
+        
+        return titles, None
     except Exception as e:
         return None, f"Error getting worksheet names: {str(e)}"
 
 def sign_out():
     """Sign out and clear session state"""
+    # Close the pooled client and its connections
+    if st.session_state.credentials is not None:
+        client_pool.release(st.session_state.credentials, st.session_state.client_holder)
+    
     st.session_state.authenticated = False
     st.session_state.credentials = None
     st.session_state.user_info = None
@@ -203,6 +298,7 @@ def sign_out():
     return "Signed out successfully. Please refresh the page."
 
 # Sidebar for authentication and navigation
+section("sidebar")
 with st.sidebar:
     st.title("Real Estate Dashboard")
     st.divider()
@@ -277,6 +373,7 @@ with st.sidebar:
             st.rerun()
 
 # Main content area
+section(f"page: {page}" if st.session_state.authenticated else "page: Welcome")
 if not st.session_state.authenticated:
     # Welcome page for unauthenticated users
     st.title("Welcome to Real Estate Dashboard")
@@ -344,6 +441,52 @@ elif page == "Dashboard":
         st.metric("User", st.session_state.user_info.get('email', 'Unknown') if st.session_state.authenticated else "None")
     with col3:
         st.metric("Last Updated", datetime.now().strftime("%Y-%m-%d %H:%M"))
+    
+    # Background prefetch status
+    status = warmup_status()
+    if status['last_run']:
+        prefetched = ", ".join(status['loaded']) or "none"
+        st.caption(f"Prefetched: {prefetched} (last refresh {status['last_run'].strftime('%H:%M:%S')})")
+        for key, error in status['errors'].items():
+            st.caption(f"Prefetch of {key} failed: {error}")
+    elif status['started']:
+        st.caption("Prefetching predefined spreadsheets...")
+    
+    # Google API quota usage of this server process
+    quota = quota_scheduler.stats()
+    if quota['requests']:
+        st.caption(
+            f"API requests: {quota['requests']} ({quota['throttled']} throttled locally, "
+            f"{quota['rate_limited_responses']} rate-limited by Google, {quota['retries']} retried)"
+        )
+    
+    loads = worksheet_loads.stats()
+    if loads['executed']:
+        st.caption(f"Sheet loads: {loads['executed']} fetched, {loads['coalesced']} joined an in-flight fetch")
+    
+    api_calls = api_metrics.snapshot()
+    if api_calls:
+        with st.expander("API calls by method"):
+            st.dataframe(pd.DataFrame([
+                {
+                    'API': api,
+                    'Method': method,
+                    'Page': call_page,
+                    'Requests': totals['requests'],
+                    'Errors': totals['errors'],
+                    'Retries': totals['retries'],
+                    'Avg (ms)': round(totals['seconds'] / totals['requests'] * 1000, 1)
+                }
+                for (api, method, call_page), totals in sorted(api_calls.items())
+            ]), use_container_width=True)
+    
+    imports = import_report()
+    if imports:
+        with st.expander("Module import times"):
+            st.dataframe(pd.DataFrame(
+                [(name, round(ms, 1), where) for name, ms, where in imports],
+                columns=["Module", "ms", "Loaded by"]
+            ), use_container_width=True)
 
 elif page == "Google Sheets":
     st.title("Google Sheets Data Viewer")
@@ -451,6 +594,10 @@ elif page == "Google Sheets":
                 else:
                     st.session_state.sheets_data = df
             
+            # Render the loaded data right away; a newer revision is swapped in once refreshed in the background
+            if refresh_stale_data():
+                st.info("The sheet changed since it was loaded; showing the latest data.")
+            
             # Display data if available
             if st.session_state.sheets_data is not None:
                 df = st.session_state.sheets_data
@@ -466,6 +613,23 @@ elif page == "Google Sheets":
                     numeric_cols = df.select_dtypes(include=['number']).columns
                     st.metric("Numeric Columns", f"{len(numeric_cols)}")
                 
+                sync_report = st.session_state.last_sync_report
+                if sync_report:
+                    st.caption(
+                        f"Incremental sync: {sync_report['rows_refetched']} rows refetched, "
+                        f"{sync_report['modified']} modified, {sync_report['appended']} appended"
+                        + (
+                            f"; the {sync_report['rows_not_rechecked']:,} rows above were not re-checked "
+                            f"and are refreshed by a full reload within {sync_report['syncs_until_full']} syncs"
+                            if sync_report['rows_not_rechecked'] else ""
+                        )
+                    )
+                
+                type_report = type_report_frame(df)
+                if not type_report.empty:
+                    with st.expander("Detected Column Types"):
+                        st.dataframe(type_report, use_container_width=True)
+                
                 # Data tabs
                 data_tab1, data_tab2, data_tab3 = st.tabs(["Data Preview", "Visualization", "Export"])
                 
@@ -474,28 +638,38 @@ elif page == "Google Sheets":
                     with st.expander("Filter Options"):
                         filter_col = st.selectbox("Filter by column:", ["None"] + df.columns.tolist())
                         
-                        filtered_df = df
+                        filtered_rows = None
                         if filter_col != "None":
-                            if df[filter_col].dtype == 'object':
+                            # Options and ranges come from the load-time column statistics, not a column scan
+                            stats = sheet_column_stats(df).get(filter_col)
+                            if stats['kind'] == 'datetime':
+                                date_range = date_range_filter("Date range:", stats)
+                                if date_range is not None:
+                                    filtered_rows = filter_indexes.for_frame(df).filter_rows(df, {filter_col: date_range})
+                            elif stats['kind'] in ('text', 'boolean'):
+                                options = all_values(stats)
+                                if options is None:
+                                    options = [value for value, _ in stats['top']]
+                                    st.caption(f"Showing the {len(options)} most frequent of about {stats['distinct']:,} values")
                                 filter_values = st.multiselect(
                                     "Select values:", 
-                                    options=sorted(df[filter_col].unique()),
+                                    options=sorted(options, key=str),
                                     default=[]
                                 )
                                 if filter_values:
-                                    filtered_df = df[df[filter_col].isin(filter_values)]
-                            else:
+                                    filtered_rows = df[filter_col].isin(filter_values).to_numpy().nonzero()[0]
+                            elif stats['kind'] == 'numeric' and stats['min'] is not None and stats['min'] < stats['max']:
                                 min_val, max_val = st.slider(
                                     "Value range:",
-                                    min_value=float(df[filter_col].min()),
-                                    max_value=float(df[filter_col].max()),
-                                    value=(float(df[filter_col].min()), float(df[filter_col].max()))
+                                    min_value=float(stats['min']),
+                                    max_value=float(stats['max']),
+                                    value=(float(stats['min']), float(stats['max']))
                                 )
-                                filtered_df = df[(df[filter_col] >= min_val) & (df[filter_col] <= max_val)]
+                                filtered_rows = ((df[filter_col] >= min_val) & (df[filter_col] <= max_val)).to_numpy().nonzero()[0]
                     
-                    # Data preview
+                    # Data preview, one page at a time
                     st.subheader("Data Preview")
-                    st.dataframe(filtered_df, use_container_width=True)
+                    paged_table(df, "preview_table", rows=filtered_rows)
                 
                 with data_tab2:
                     # Visualization options
@@ -508,7 +682,7 @@ elif page == "Google Sheets":
                         )
                         
                         if viz_type == "Bar Chart":
-                            categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
+                            categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
                             if categorical_cols:
                                 x_col = st.selectbox("Category (X-axis):", categorical_cols)
                                 y_col = st.selectbox("Value (Y-axis):", numeric_cols)
@@ -522,8 +696,7 @@ elif page == "Google Sheets":
                             x_col = st.selectbox("X-axis:", df.columns.tolist())
                             y_col = st.selectbox("Y-axis:", numeric_cols)
                             
-                            fig = px.line(df.sort_values(x_col), x=x_col, y=y_col, title=f"{y_col} over {x_col}")
-                            st.plotly_chart(fig, use_container_width=True)
+                            line_chart_panel(df, x_col, [y_col], "dashboard_line", f"{y_col} over {x_col}", y_title=y_col)
                         
                         elif viz_type == "Scatter Plot":
                             x_col = st.selectbox("X-axis:", numeric_cols)
@@ -532,17 +705,17 @@ elif page == "Google Sheets":
                                 y_col = st.selectbox("Y-axis:", y_cols)
                                 color_col = st.selectbox("Color by (optional):", ["None"] + df.columns.tolist())
                                 
-                                if color_col != "None":
-                                    fig = px.scatter(df, x=x_col, y=y_col, color=color_col, title=f"{y_col} vs {x_col}")
-                                else:
-                                    fig = px.scatter(df, x=x_col, y=y_col, title=f"{y_col} vs {x_col}")
+                                color_col = None if color_col == "None" else color_col
+                                fig, mode = scatter_figure(df, x_col, y_col, color_col=color_col, title=f"{y_col} vs {x_col}", trendline=False)
                                 
                                 st.plotly_chart(fig, use_container_width=True)
+                                if mode == 'density':
+                                    st.caption(density_caption(color_col))
                             else:
                                 st.warning("Need at least two numeric columns for scatter plot.")
                         
                         elif viz_type == "Pie Chart":
-                            categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
+                            categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
                             if categorical_cols:
                                 names_col = st.selectbox("Categories:", categorical_cols)
                                 values_col = st.selectbox("Values:", numeric_cols)
@@ -564,35 +737,14 @@ elif page == "Google Sheets":
                 with data_tab3:
                     st.subheader("Export Data")
                     
-                    export_format = st.radio("Export format:", ["CSV", "Excel", "JSON"])
-                    
-                    if export_format == "CSV":
-                        csv = df.to_csv(index=False)
-                        b64 = base64.b64encode(csv.encode()).decode()
-                        href = f'<a href="data:file/csv;base64,{b64}" download="data.csv" class="btn">Download CSV</a>'
-                        st.markdown(href, unsafe_allow_html=True)
-                    
-                    elif export_format == "Excel":
-                        output = tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx')
-                        df.to_excel(output.name, index=False)
-                        with open(output.name, "rb") as f:
-                            excel_data = f.read()
-                        b64 = base64.b64encode(excel_data).decode()
-                        href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="data.xlsx" class="btn">Download Excel</a>'
-                        st.markdown(href, unsafe_allow_html=True)
-                        os.unlink(output.name)
-                    
-                    elif export_format == "JSON":
-                        json_str = df.to_json(orient='records')
-                        b64 = base64.b64encode(json_str.encode()).decode()
-                        href = f'<a href="data:file/json;base64,{b64}" download="data.json" class="btn">Download JSON</a>'
-                        st.markdown(href, unsafe_allow_html=True)
+                    # Files are written chunk by chunk, and only when a download is requested
+                    export_panel(df, "sheet_export", file_stem="data")
 
 elif page == "Google Calendar":
     st.title("Google Calendar Events")
     
     try:
-        service = build('calendar', 'v3', credentials=st.session_state.credentials)
+        service = get_service(st.session_state.credentials, 'calendar', 'v3')
         
         # Calendar selection
         calendars_result = service.calendarList().list().execute()
@@ -697,7 +849,7 @@ elif page == "Google Drive":
     st.title("Google Drive File Manager")
     
     try:
-        drive_service = build('drive', 'v3', credentials=st.session_state.credentials)
+        drive_service = get_service(st.session_state.credentials, 'drive', 'v3')
         
         drive_tab1, drive_tab2, drive_tab3 = st.tabs(["Browse Files", "Upload Files", "Search Files"])
         
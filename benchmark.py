@@ -0,0 +1,373 @@
+"""Benchmarks of the sheet data pipeline, from fetch to export, on synthetic worksheets
+
+    python benchmark.py run --sizes 1000 10000 100000 1000000 --output benchmark_report.json
+    python benchmark.py compare baseline.json benchmark_report.json --threshold 0.10
+
+Each stage is timed on the same synthetic worksheet (mixed text, currency,
+percent, date, category and numeric columns) and the median of several runs
+is written to a JSON report. `compare` lines up two reports stage by stage
+and exits non-zero when any stage got slower than the threshold.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from analysis_cache import describe, frame_fingerprint, strong_correlations
+from exports import arrow_chunks, csv_chunks, csv_gzip_chunks, excel_chunks, json_chunks, ndjson_chunks
+from fake_google_server import FakeGoogleState, start_fake_server, synthetic_rows
+from filter_index import filter_indexes
+from type_inference import convert_column_types
+
+REPORT_SCHEMA_VERSION = 1
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+DEFAULT_REPEATS = 3
+
+# Slower stages are skipped above these sizes to keep full runs practical
+EXCEL_MAX_ROWS = 100000
+CHART_MAX_ROWS = 200000
+
+# Relative slowdown reported as a regression by `compare`, ignoring changes smaller than the noise floor
+DEFAULT_THRESHOLD = 0.10
+MIN_REGRESSION_SECONDS = 0.005
+
+STAGES = [
+    'fetch', 'convert', 'filter', 'analysis', 'analysis_cached', 'charts',
+    'export_csv', 'export_csv_gzip', 'export_excel', 'export_json', 'export_ndjson', 'export_arrow'
+]
+
+
+def _optional_module(name):
+    try:
+        return __import__(name)
+    except ImportError:
+        return None
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def environment():
+    """Describe the interpreter and libraries a report was produced with"""
+    versions = {'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__}
+    for name in ('plotly', 'gspread', 'openpyxl', 'statsmodels', 'pyarrow'):
+        module = _optional_module(name)
+        versions[name] = getattr(module, '__version__', None) if module else None
+    return {
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'versions': versions
+    }
+
+
+def time_stage(fn, repeats):
+    """Run fn `repeats` times and return the list of wall-clock durations in seconds"""
+    durations = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+# Stages
+
+def fetch_stage(values, latency):
+    """Return a callable fetching the worksheet from the fake server, or a skip reason"""
+    if _optional_module('gspread') is None:
+        return "gspread is not installed"
+
+    from google.auth.credentials import AnonymousCredentials
+
+    from chunked_fetch import fetch_all_values
+    from google_clients import EMULATOR_HOST_ENV, open_worksheet
+    from quota_scheduler import quota_scheduler
+
+    state = FakeGoogleState()
+    spreadsheet_id = state.add_spreadsheet(title='Benchmark', worksheets={'Sheet1': values})
+    server = start_fake_server(state, latency=latency)
+    os.environ[EMULATOR_HOST_ENV] = server.base_url
+
+    # Measure the pipeline, not the local quota; the fake server has none
+    unlimited = {api: (1e9, 1e9) for api in quota_scheduler.project_rates}
+    quota_scheduler.project_rates = unlimited
+    quota_scheduler.user_rates = unlimited
+
+    credentials = AnonymousCredentials()
+
+    def run():
+        worksheet = open_worksheet(credentials, spreadsheet_id, 'Sheet1')
+        data = fetch_all_values(worksheet)
+        assert len(data) == len(values)
+
+    return run
+
+
+def convert_stage(values):
+    def run():
+        df = pd.DataFrame(values[1:], columns=values[0])
+        convert_column_types(df)
+    return run
+
+
+def filter_stage(df):
+    """Apply the Data Viewer's categorical and numeric range filters through the frame's filter index
+
+    The index is built once before timing, as the first rerun after a load does;
+    each run is what a later filter change costs.
+    """
+    numeric_col = next(col for col in df.columns if pd.api.types.is_numeric_dtype(df[col]))
+    low, high = df[numeric_col].quantile([0.25, 0.75])
+    filters = {
+        col: df[col].dropna().unique().tolist()[:2]
+        for col in df.columns if df[col].dtype.name in ['object', 'category'] and df[col].nunique() <= 10
+    }
+    filters[numeric_col] = (low, high)
+    frame_index = filter_indexes.for_frame(df)
+    frame_index.filter_rows(df, filters)
+
+    def run():
+        frame_index.filter_rows(df, filters)
+    return run
+
+
+def analysis_stage(df):
+    """Compute the Analysis page's summary statistics and correlations through the analysis cache
+
+    Each run fingerprints the columns as a new sheet revision, so describe()
+    and corr() miss the cache and are computed every time.
+    """
+    numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
+    revisions = itertools.count()
+
+    def run():
+        fingerprint = frame_fingerprint(df, numeric_cols, version=('benchmark', next(revisions)))
+        describe(df, numeric_cols, fingerprint=fingerprint)
+        strong_correlations(df, numeric_cols, fingerprint=fingerprint)
+    return run
+
+
+def analysis_cached_stage(df):
+    """Rerun the Analysis page on an unversioned frame whose statistics are already cached
+
+    The first computation happens before timing; each run hashes every value
+    of the columns to fingerprint them and reuses the cached results.
+    """
+    numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
+
+    def run():
+        fingerprint = frame_fingerprint(df, numeric_cols)
+        describe(df, numeric_cols, fingerprint=fingerprint)
+        strong_correlations(df, numeric_cols, fingerprint=fingerprint)
+
+    run()
+    return run
+
+
+def chart_stage(df):
+    """Build the figures render_chart produces, without rendering them"""
+    if _optional_module('plotly') is None:
+        return "plotly is not installed"
+    if len(df) > CHART_MAX_ROWS:
+        return f"skipped above {CHART_MAX_ROWS} rows"
+
+    import plotly.express as px
+
+    from dense_charts import line_figure, scatter_figure
+
+    numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
+    categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
+    date_cols = [col for col in df.columns if pd.api.types.is_datetime64_any_dtype(df[col])]
+    x_cat = next(col for col in categorical_cols if df[col].nunique() <= 20)
+    y_col, z_col = numeric_cols[0], numeric_cols[-1]
+
+    def run():
+        grouped = df.groupby(x_cat, observed=True)[y_col].sum().reset_index()
+        grouped = grouped.sort_values(y_col, ascending=False).head(15)
+        px.bar(grouped, x=x_cat, y=y_col, text_auto='.2s')
+
+        line_x = date_cols[0] if date_cols else numeric_cols[0]
+        line_figure(df, line_x, [col for col in numeric_cols if col != line_x][:2], mode='lines+markers')
+
+        px.pie(df.groupby(x_cat, observed=True)[y_col].sum().reset_index(), names=x_cat, values=y_col)
+        scatter_figure(df, y_col, z_col)
+
+        pivot = df.pivot_table(index=x_cat, columns=categorical_cols[-1], values=z_col, aggfunc="mean", observed=True)
+        px.imshow(pivot, color_continuous_scale="Viridis")
+    return run
+
+
+def _drain(chunks):
+    """Consume an export the way spool_export does, without keeping it"""
+    return sum(len(chunk) for chunk in chunks)
+
+
+def export_stage(chunks, df):
+    return lambda: _drain(chunks(df))
+
+
+def export_excel_stage(df):
+    if _optional_module('openpyxl') is None:
+        return "openpyxl is not installed"
+    if len(df) > EXCEL_MAX_ROWS:
+        return f"skipped above {EXCEL_MAX_ROWS} rows"
+    return export_stage(excel_chunks, df)
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeats=DEFAULT_REPEATS, stages=STAGES, columns=10, latency=0.0, seed=0, log=print):
+    """Time every stage for every size and return the report as a dict"""
+    results = []
+    for rows in sizes:
+        log(f"Generating {rows} rows x {columns} columns...")
+        values = synthetic_rows(rows, columns, seed=seed)
+        df, _ = convert_column_types(pd.DataFrame(values[1:], columns=values[0]))
+
+        builders = {
+            'fetch': lambda: fetch_stage(values, latency),
+            'convert': lambda: convert_stage(values),
+            'filter': lambda: filter_stage(df),
+            'analysis': lambda: analysis_stage(df),
+            'analysis_cached': lambda: analysis_cached_stage(df),
+            'charts': lambda: chart_stage(df),
+            'export_csv': lambda: export_stage(csv_chunks, df),
+            'export_csv_gzip': lambda: export_stage(csv_gzip_chunks, df),
+            'export_excel': lambda: export_excel_stage(df),
+            'export_json': lambda: export_stage(json_chunks, df),
+            'export_ndjson': lambda: export_stage(ndjson_chunks, df),
+            'export_arrow': lambda: export_stage(arrow_chunks, df)
+        }
+
+        for stage in stages:
+            result = {'stage': stage, 'rows': rows}
+            run = builders[stage]()
+            if isinstance(run, str):
+                result['skipped'] = run
+                log(f"  {stage:<15} skipped: {run}")
+            else:
+                durations = time_stage(run, repeats)
+                median = statistics.median(durations)
+                result.update({
+                    'median_seconds': median,
+                    'min_seconds': min(durations),
+                    'runs_seconds': durations,
+                    'rows_per_second': rows / median if median else None
+                })
+                log(f"  {stage:<15} {median * 1000:10.1f} ms (min {min(durations) * 1000:.1f} ms)")
+            results.append(result)
+
+    return {
+        'schema_version': REPORT_SCHEMA_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'environment': environment(),
+        'config': {'sizes': list(sizes), 'repeats': repeats, 'columns': columns, 'latency_seconds': latency, 'seed': seed},
+        'results': results
+    }
+
+
+def compare_reports(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Return (rows, regressions) comparing the median time of each stage and size in two reports"""
+    baseline_results = {(r['stage'], r['rows']): r for r in baseline['results']}
+    rows = []
+    regressions = []
+    for result in current['results']:
+        key = (result['stage'], result['rows'])
+        before = baseline_results.get(key)
+        if before is None or 'median_seconds' not in before or 'median_seconds' not in result:
+            continue
+        change = result['median_seconds'] / before['median_seconds'] - 1 if before['median_seconds'] else 0.0
+        row = {
+            'stage': key[0],
+            'rows': key[1],
+            'baseline_seconds': before['median_seconds'],
+            'current_seconds': result['median_seconds'],
+            'change': change,
+            'regression': change > threshold and result['median_seconds'] - before['median_seconds'] > MIN_REGRESSION_SECONDS
+        }
+        rows.append(row)
+        if row['regression']:
+            regressions.append(row)
+    return rows, regressions
+
+
+def _print_comparison(baseline, current, threshold):
+    if baseline['environment']['versions'] != current['environment']['versions']:
+        print("Warning: the reports were produced with different library versions")
+    if baseline['environment']['machine'] != current['environment']['machine']:
+        print("Warning: the reports were produced on different machines")
+
+    rows, regressions = compare_reports(baseline, current, threshold)
+    print(f"{'stage':<15} {'rows':>9} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for row in rows:
+        flag = '  REGRESSION' if row['regression'] else ''
+        print(
+            f"{row['stage']:<15} {row['rows']:>9} {row['baseline_seconds'] * 1000:>12.1f} "
+            f"{row['current_seconds'] * 1000:>12.1f} {row['change']:>+8.1%}{flag}"
+        )
+    print(f"{len(regressions)} regression(s) above {threshold:.0%}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the benchmarks and write a JSON report')
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    run_parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS)
+    run_parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    run_parser.add_argument('--columns', type=int, default=10)
+    run_parser.add_argument('--latency-ms', type=float, default=0.0, help='latency of the fake server in the fetch stage')
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--output', default='benchmark_report.json')
+    run_parser.add_argument('--baseline', help='compare the new report against this one when done')
+    run_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+
+    compare_parser = commands.add_parser('compare', help='compare two JSON reports')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        report = run_benchmarks(args.sizes, args.repeats, args.stages, args.columns, args.latency_ms / 1000, args.seed)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+        if not args.baseline:
+            return 0
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        current = report
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+
+    regressions = _print_comparison(baseline, current, args.threshold)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
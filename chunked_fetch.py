@@ -0,0 +1,92 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from google_clients import CONNECTION_POOL_SIZE
+from lazy_imports import lazy_attribute
+
+absolute_range_name = lazy_attribute('gspread.utils', 'absolute_range_name')
+
+# Sheets with more grid rows than this are fetched in parallel chunks
+CHUNKED_FETCH_MIN_ROWS = 20000
+
+# Rows requested per range
+CHUNK_ROWS = 10000
+
+# Concurrent range requests per worksheet (bounded by the HTTP pool size)
+MAX_WORKERS = min(4, CONNECTION_POOL_SIZE)
+
+
+def grid_row_count(worksheet):
+    """Return the current number of grid rows, which pooled handles may hold stale"""
+    metadata = worksheet.spreadsheet.fetch_sheet_metadata(params={'fields': 'sheets.properties'})
+    for sheet in metadata.get('sheets', []):
+        properties = sheet.get('properties', {})
+        if properties.get('sheetId') == worksheet.id:
+            return properties.get('gridProperties', {}).get('rowCount', worksheet.row_count)
+    return worksheet.row_count
+
+
+def _chunk_ranges(worksheet, total_rows, chunk_rows):
+    """Return (start_row, end_row, A1 range) tuples covering the worksheet"""
+    ranges = []
+    for start_row in range(1, total_rows + 1, chunk_rows):
+        end_row = min(start_row + chunk_rows - 1, total_rows)
+        ranges.append((start_row, end_row, absolute_range_name(worksheet.title, f"{start_row}:{end_row}")))
+    return ranges
+
+
+def _fetch_range(worksheet, start_row, end_row, range_name):
+    """Fetch one row range, padded so blank rows keep their position"""
+    response = worksheet.spreadsheet.values_batch_get(
+        ranges=[range_name],
+        params={'majorDimension': 'ROWS', 'valueRenderOption': 'FORMATTED_VALUE'}
+    )
+    value_ranges = response.get('valueRanges', [])
+    rows = value_ranges[0].get('values', []) if value_ranges else []
+
+    # The API drops trailing empty rows of a range
+    rows.extend([] for _ in range(end_row - start_row + 1 - len(rows)))
+    return rows
+
+
+def iter_value_chunks(worksheet, total_rows=None, chunk_rows=CHUNK_ROWS, max_workers=MAX_WORKERS):
+    """Yield (start_row, rows) for a worksheet in row order while later chunks are still in flight"""
+    if total_rows is None:
+        total_rows = grid_row_count(worksheet)
+    ranges = _chunk_ranges(worksheet, total_rows, chunk_rows)
+    if not ranges:
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Run each range in a copy of the caller's context so its request priority carries over
+        futures = [
+            (start_row, executor.submit(
+                contextvars.copy_context().run, _fetch_range, worksheet, start_row, end_row, range_name
+            ))
+            for start_row, end_row, range_name in ranges
+        ]
+        for start_row, future in futures:
+            yield start_row, future.result()
+
+
+def fetch_all_values(worksheet, on_chunk=None, chunk_rows=CHUNK_ROWS, max_workers=MAX_WORKERS):
+    """Return all values of a worksheet like get_all_values(), fetching large sheets in parallel chunks
+
+    on_chunk(rows, total_rows) is called after each chunk arrives with the rows
+    assembled so far (header first), so callers can render a preview.
+    """
+    if worksheet.row_count <= CHUNKED_FETCH_MIN_ROWS:
+        return worksheet.get_all_values()
+
+    total_rows = grid_row_count(worksheet)
+    rows = []
+    for _, chunk in iter_value_chunks(worksheet, total_rows, chunk_rows, max_workers):
+        rows.extend(chunk)
+        if on_chunk is not None:
+            on_chunk(rows, total_rows)
+
+    # Match get_all_values(): no trailing blank rows, every row the same width
+    while rows and not any(rows[-1]):
+        rows.pop()
+    width = max((len(row) for row in rows), default=0)
+    return [row + [''] * (width - len(row)) for row in rows]
@@ -0,0 +1,149 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from streaming_stats import sketch_column
+
+# HyperLogLog register index bits: 4096 registers, about 1.6% standard error
+HLL_PRECISION = 12
+
+# Columns estimated to have at most this many distinct values are counted exactly
+EXACT_DISTINCT_LIMIT = 2000
+
+# Most frequent values kept per column
+TOP_VALUES = 100
+
+# Rows sampled to find the frequent values of high-cardinality columns
+TOP_SAMPLE_ROWS = 50000
+
+
+def approximate_distinct(series):
+    """Estimate the number of distinct non-missing values with HyperLogLog"""
+    values = series.dropna()
+    if values.empty:
+        return 0
+    hashes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+    m = 1 << HLL_PRECISION
+    registers = hashes >> np.uint64(64 - HLL_PRECISION)
+    # Position of the first set bit in the next 52 bits (exact in float64)
+    remainder = (hashes << np.uint64(HLL_PRECISION)) >> np.uint64(12)
+    bit_length = np.frexp(remainder.astype(np.float64))[1]
+    rank = np.where(remainder == 0, 53, 53 - bit_length).astype(np.uint8)
+
+    maxima = np.zeros(m, dtype=np.uint8)
+    np.maximum.at(maxima, registers.astype(np.intp), rank)
+
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.ldexp(1.0, -maxima.astype(np.int64)))
+    empty = int(np.count_nonzero(maxima == 0))
+    if estimate <= 2.5 * m and empty:
+        # Linear counting is more accurate for small cardinalities
+        estimate = m * np.log(m / empty)
+    return int(round(estimate))
+
+
+def _plain(value):
+    """Return a value as a plain Python object (numpy scalars unwrapped)"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _kind(series):
+    if pd.api.types.is_bool_dtype(series):
+        return 'boolean'
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime'
+    if pd.api.types.is_numeric_dtype(series):
+        return 'numeric'
+    return 'text'
+
+
+def compute_column_stats(series):
+    """Return distinct count, frequent values, missing count, min/max and (numeric) sketch of one column"""
+    kind = _kind(series)
+    rows = len(series)
+    missing = int(series.isna().sum())
+    stats = {'kind': kind, 'rows': rows, 'missing': missing, 'min': None, 'max': None}
+
+    if kind in ('numeric', 'datetime') and missing < rows:
+        stats['min'] = _plain(series.min())
+        stats['max'] = _plain(series.max())
+    # Running moments and a quantile sketch for approximate analysis statistics
+    stats['sketch'] = sketch_column(series) if kind == 'numeric' else None
+
+    distinct = approximate_distinct(series)
+    if distinct <= EXACT_DISTINCT_LIMIT:
+        counts = series.value_counts(dropna=True)
+        stats['distinct'] = len(counts)
+        stats['distinct_exact'] = True
+        stats['top'] = [(_plain(value), int(count)) for value, count in counts.head(TOP_VALUES).items()]
+    else:
+        # Frequent values from a sample, counts scaled to the whole column
+        sample = series.sample(TOP_SAMPLE_ROWS, random_state=0) if rows > TOP_SAMPLE_ROWS else series
+        counts = sample.value_counts(dropna=True).head(TOP_VALUES)
+        scale = rows / len(sample)
+        stats['distinct'] = distinct
+        stats['distinct_exact'] = False
+        stats['top'] = [(_plain(value), int(round(count * scale))) for value, count in counts.items()]
+    return stats
+
+
+def compute_frame_stats(df):
+    """Return {column: stats} for every column of a frame"""
+    stats = {}
+    for i, column in enumerate(df.columns):
+        if column in stats:
+            # Duplicate header: the first column of that name wins, as with df[column]
+            continue
+        stats[column] = compute_column_stats(df.iloc[:, i])
+    return stats
+
+
+def all_values(stats):
+    """Return every distinct value of a column if the stats hold them all, else None"""
+    if stats['distinct_exact'] and stats['distinct'] <= len(stats['top']):
+        return [value for value, _ in stats['top']]
+    return None
+
+
+class ColumnStatsCache:
+    """Column statistics of loaded worksheets, computed once per worksheet revision
+
+    Kept next to the frames rather than in df.attrs, which pandas deep-copies
+    on every operation. Only the newest revision of each worksheet is kept.
+    Unversioned loads (revision None) are never stored: nothing would tell an
+    edited sheet apart from the one cached, and entries are shared by every session.
+    Callers ask only for the frame exactly as loaded for a revision; frames a
+    session replaced after editing keep that revision but not its values.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def put(self, spreadsheet_id, worksheet_name, revision, df):
+        """Compute and store the statistics of one revision of a worksheet"""
+        stats = compute_frame_stats(df)
+        if revision is not None:
+            with self._lock:
+                self._entries[(spreadsheet_id, worksheet_name)] = (revision, df.shape, stats)
+        return stats
+
+    def get(self, spreadsheet_id, worksheet_name, revision, df):
+        """Return the statistics of a worksheet revision, computing them if this revision has none yet"""
+        with self._lock:
+            entry = self._entries.get((spreadsheet_id, worksheet_name))
+        # The shape is a last guard against a caller passing a frame it changed locally
+        if revision is not None and entry is not None and entry[0] == revision and entry[1] == df.shape:
+            return entry[2]
+        return self.put(spreadsheet_id, worksheet_name, revision, df)
+
+    def forget(self, spreadsheet_id, worksheet_name=None):
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == spreadsheet_id and worksheet_name in (None, k[1])]:
+                del self._entries[key]
+
+
+# Shared by every session served by this process
+column_stats_cache = ColumnStatsCache()
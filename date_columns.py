@@ -0,0 +1,77 @@
+import threading
+
+import pandas as pd
+
+from type_inference import convert_column, detect_date_format
+
+
+def _is_text(series):
+    return series.dtype == 'object' or pd.api.types.is_string_dtype(series)
+
+
+class DateColumnCache:
+    """Date formats and parsed date columns of loaded worksheets
+
+    The format found for each (spreadsheet, worksheet, column) is remembered
+    and tried first when a new revision is checked, and columns are parsed
+    with it once per revision, so reruns neither guess formats nor reparse.
+    Only the newest revision of each column is kept. Unversioned loads
+    (revision None) are never cached: nothing would tell an edited sheet
+    apart from the one cached, and entries are shared by every session.
+    Callers pass a revision only for the frame exactly as loaded for it.
+    """
+
+    def __init__(self):
+        # (spreadsheet, worksheet, column) -> (revision, format or None)
+        self._formats = {}
+        # (spreadsheet, worksheet, column) -> (revision, parsed Series)
+        self._parsed = {}
+        self._lock = threading.Lock()
+
+    def date_format(self, spreadsheet_id, worksheet_name, revision, df, column):
+        """Return the date format of a text column, or None if it does not hold dates"""
+        key = (spreadsheet_id, worksheet_name, column)
+        with self._lock:
+            entry = self._formats.get(key)
+        if entry is not None and revision is not None and entry[0] == revision:
+            return entry[1]
+
+        date_format = detect_date_format(df[column], preferred=entry[1] if entry else None)
+        if revision is not None:
+            with self._lock:
+                self._formats[key] = (revision, date_format)
+        return date_format
+
+    def date_columns(self, spreadsheet_id, worksheet_name, revision, df):
+        """Return the columns that hold datetimes or text in a known date format"""
+        columns = []
+        for column in df.columns[~df.columns.duplicated(keep=False)]:
+            series = df[column]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                columns.append(column)
+            elif _is_text(series) and self.date_format(spreadsheet_id, worksheet_name, revision, df, column):
+                columns.append(column)
+        return columns
+
+    def parse(self, spreadsheet_id, worksheet_name, revision, df, column):
+        """Return a date column parsed with its detected format in one vectorized pass"""
+        series = df[column]
+        if not _is_text(series):
+            return series
+        key = (spreadsheet_id, worksheet_name, column)
+        with self._lock:
+            entry = self._parsed.get(key)
+        # The parsed column is assigned back by index, so it must be for these very rows
+        if entry is not None and revision is not None and entry[0] == revision and entry[1].index.equals(series.index):
+            return entry[1]
+
+        date_format = self.date_format(spreadsheet_id, worksheet_name, revision, df, column)
+        parsed = convert_column(series.astype(str).str.strip(), 'date', {'format': date_format})
+        if revision is not None:
+            with self._lock:
+                self._parsed[key] = (revision, parsed)
+        return parsed
+
+
+# Shared by every session served by this process
+date_column_cache = DateColumnCache()
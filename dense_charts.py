@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+
+from filter_index import filter_indexes
+from lazy_imports import lazy_module
+
+px = lazy_module('plotly.express')
+go = lazy_module('plotly.graph_objects')
+
+# Scatter plots with more points than this are drawn as a density heatmap
+DENSITY_MIN_POINTS = 5000
+
+# Grid cells along each axis of a density heatmap
+DENSITY_BINS = 150
+
+# Points kept per line chart series: about two per horizontal pixel of a wide chart
+LINE_CHART_POINTS = 2000
+
+
+def _numeric_pairs(df, x_col, y_col):
+    """Return the x and y values of rows where both are finite numbers"""
+    x = df[x_col].to_numpy(dtype='float64', na_value=np.nan)
+    y = df[y_col].to_numpy(dtype='float64', na_value=np.nan)
+    finite = np.isfinite(x) & np.isfinite(y)
+    return x[finite], y[finite]
+
+
+def linear_trendline(x, y):
+    """Return (slope, intercept, r_squared) of the least-squares line through the points, or None"""
+    if len(x) < 2:
+        return None
+    x_mean = x.mean()
+    y_mean = y.mean()
+    dx = x - x_mean
+    dy = y - y_mean
+    sxx = float(np.dot(dx, dx))
+    if sxx == 0:
+        return None
+    sxy = float(np.dot(dx, dy))
+    syy = float(np.dot(dy, dy))
+    slope = sxy / sxx
+    r_squared = sxy * sxy / (sxx * syy) if syy else 1.0
+    return slope, float(y_mean - slope * x_mean), r_squared
+
+
+def bin_points(x, y, bins=DENSITY_BINS):
+    """Count points per cell of a bins x bins grid; return (counts[y, x], x centers, y centers)"""
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    return counts.T, (x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2
+
+
+def _add_trendline(fig, x, y):
+    fit = linear_trendline(x, y)
+    if fit is None:
+        return
+    slope, intercept, r_squared = fit
+    ends = np.array([x.min(), x.max()])
+    fig.add_trace(go.Scatter(
+        x=ends,
+        y=slope * ends + intercept,
+        mode='lines',
+        name=f"OLS trend (R² = {r_squared:.3f})",
+        line=dict(color='red', width=2),
+        hovertemplate=f"y = {slope:.4g}·x + {intercept:.4g}<br>R² = {r_squared:.3f}<extra></extra>"
+    ))
+
+
+def scatter_figure(df, x_col, y_col, color_col=None, title=None, trendline=True, density_min_points=DENSITY_MIN_POINTS):
+    """Return (figure, mode) for a scatter plot of two columns
+
+    Up to `density_min_points` points are drawn individually; above that the
+    points are binned on the server and drawn as a density heatmap, so the
+    browser receives a fixed-size grid instead of every row. The optional
+    trendline is an ordinary least-squares fit computed in closed form.
+    mode is 'points' or 'density'.
+    """
+    numeric = pd.api.types.is_numeric_dtype(df[x_col]) and pd.api.types.is_numeric_dtype(df[y_col])
+    if not numeric:
+        return px.scatter(df, x=x_col, y=y_col, color=color_col, title=title), 'points'
+
+    x, y = _numeric_pairs(df, x_col, y_col)
+    if len(x) <= density_min_points:
+        fig = px.scatter(df, x=x_col, y=y_col, color=color_col, title=title)
+        if trendline and not color_col:
+            _add_trendline(fig, x, y)
+        return fig, 'points'
+
+    counts, x_centers, y_centers = bin_points(x, y)
+    fig = go.Figure(go.Heatmap(
+        z=np.where(counts > 0, counts, np.nan),
+        x=x_centers,
+        y=y_centers,
+        colorscale='Viridis',
+        colorbar=dict(title="Points"),
+        hoverongaps=False,
+        hovertemplate=f"{x_col}: %{{x:.4g}}<br>{y_col}: %{{y:.4g}}<br>Points: %{{z}}<extra></extra>"
+    ))
+    if trendline:
+        _add_trendline(fig, x, y)
+    fig.update_layout(title=title, xaxis_title=x_col, yaxis_title=y_col)
+    return fig, 'density'
+
+
+def density_caption(color_col=None):
+    """Explain a density heatmap under the chart"""
+    caption = f"More than {DENSITY_MIN_POINTS:,} points: showing how many fall in each cell of a {DENSITY_BINS} x {DENSITY_BINS} grid."
+    if color_col:
+        caption += f" Coloring by {color_col} is not available in this view."
+    return caption
+
+
+def lttb(x, y, threshold):
+    """Return the positions of `threshold` points that keep the shape of a line (largest-triangle-three-buckets)
+
+    x must be sorted. The first and last points are always kept; every bucket
+    in between keeps the point forming the largest triangle with the point
+    kept before it and the average of the next bucket, which preserves peaks
+    and troughs that plain sampling drops.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = x - x[0]
+    every = (n - 2) / (threshold - 2)
+    bounds = np.floor(np.arange(threshold - 1) * every).astype(np.int64) + 1
+    bounds = np.append(bounds[:-1], [n - 1, n])
+    # Running sums give the average of any bucket in constant time
+    x_sums = np.concatenate(([0.0], np.cumsum(x)))
+    y_sums = np.concatenate(([0.0], np.cumsum(y)))
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, stop, next_stop = bounds[i], bounds[i + 1], bounds[i + 2]
+        avg_x = (x_sums[next_stop] - x_sums[stop]) / (next_stop - stop)
+        avg_y = (y_sums[next_stop] - y_sums[stop]) / (next_stop - stop)
+        areas = np.abs((x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+def _x_axis(series):
+    """Return the kind of an x column ('datetime', 'numeric' or 'category')"""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime'
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return 'numeric'
+    return 'category'
+
+
+def _axis_values(values, kind):
+    """Return x values as float64 positions on the axis"""
+    if kind == 'datetime':
+        return values.to_numpy(dtype='datetime64[ns]').view('int64').astype('float64')
+    if kind == 'numeric':
+        return values.to_numpy(dtype='float64', na_value=np.nan)
+    return np.arange(len(values), dtype='float64')
+
+
+def x_bounds(df, x_col):
+    """Return the (min, max) of a numeric or datetime x column, or None if it cannot be zoomed"""
+    series = df[x_col]
+    kind = _x_axis(series)
+    if kind == 'category':
+        return None
+    order, valid = filter_indexes.for_frame(df).sort_order(df, x_col)
+    if valid == 0:
+        return None
+    low, high = series.iloc[order[0]], series.iloc[order[valid - 1]]
+    if low == high:
+        return None
+    if kind == 'datetime':
+        return low.to_pydatetime(), high.to_pydatetime()
+    return float(low), float(high)
+
+
+def line_series(df, x_col, y_cols, x_range=None, max_points=LINE_CHART_POINTS):
+    """Return ([(y_col, x values, y values)], points shown, points in range) for a line chart
+
+    Rows are taken in x order from the cached sort order of the column, limited
+    to `x_range` (inclusive, in the units of x_bounds()), and each series is
+    reduced to `max_points` with LTTB, so a narrow range is drawn at full resolution.
+    """
+    kind = _x_axis(df[x_col])
+    order, valid = filter_indexes.for_frame(df).sort_order(df, x_col)
+    rows = order[:valid]
+    x_values = df[x_col].iloc[rows]
+    axis = _axis_values(x_values, kind)
+
+    if x_range is not None and kind != 'category':
+        # Slider bounds are floats for numeric columns (even integer ones) and datetimes for dates
+        bounds = pd.to_datetime(pd.Series(list(x_range))) if kind == 'datetime' else pd.Series(list(x_range), dtype='float64')
+        low, high = _axis_values(bounds, kind)
+        start = np.searchsorted(axis, low, side='left')
+        stop = np.searchsorted(axis, high, side='right')
+        rows, x_values, axis = rows[start:stop], x_values.iloc[start:stop], axis[start:stop]
+
+    series = []
+    shown = total = 0
+    for y_col in y_cols:
+        y = df[y_col].iloc[rows].to_numpy(dtype='float64', na_value=np.nan)
+        points = np.flatnonzero(np.isfinite(y))
+        points = points[lttb(axis[points], y[points], max_points)]
+        series.append((y_col, x_values.iloc[points], y[points]))
+        shown += len(points)
+        total += int(np.isfinite(y).sum())
+    return series, shown, total
+
+
+def line_figure(df, x_col, y_cols, x_range=None, mode='lines', max_points=LINE_CHART_POINTS):
+    """Return (figure, points shown, points in range) with one downsampled line trace per column
+
+    Markers are only drawn when every point is shown.
+    """
+    series, shown, total = line_series(df, x_col, y_cols, x_range, max_points)
+    fig = go.Figure()
+    for y_col, x, y in series:
+        fig.add_trace(go.Scatter(x=x, y=y, mode=mode if shown == total else 'lines', name=y_col))
+    return fig, shown, total
@@ -0,0 +1,87 @@
+import hashlib
+
+import streamlit as st
+
+from exports import EXPORT_FORMATS, spool_export
+
+# st.download_button builds data from a callable only when clicked from Streamlit 1.52 on
+DEFERRED_DOWNLOADS = tuple(int(part) for part in st.__version__.split('.')[:2]) >= (1, 52)
+
+
+def _export_signature(df, rows, columns):
+    """Identify the data an export was prepared from, so a stale file is never offered"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str((id(df), df.shape, None if columns is None else list(columns))).encode())
+    if rows is not None:
+        digest.update(rows.tobytes())
+    return digest.hexdigest()
+
+
+def _spooled_bytes(chunks, df, rows, columns):
+    """Return a callable writing the export when the download is clicked"""
+    def build():
+        file, _ = spool_export(chunks(df, rows, columns))
+        with file:
+            return file.read()
+    return build
+
+
+def export_panel(df, key, rows=None, columns=None, file_stem="data", formats=None):
+    """Offer a DataFrame for download, building the file only when asked for
+
+    The file is produced chunk by chunk (see exports.py) into a spooled
+    temporary file when the download button is clicked, so nothing is kept
+    per session. Streamlit versions before 1.52 need the data up front: there
+    "Prepare download" spools the file and keeps it in st.session_state under
+    `key` until the data or format changes.
+    """
+    formats = formats or list(EXPORT_FORMATS)
+
+    format_col, button_col = st.columns([3, 2])
+    with format_col:
+        label = st.selectbox("Export format:", formats, key=f"{key}_format")
+    extension, mime, chunks = EXPORT_FORMATS[label]
+
+    if DEFERRED_DOWNLOADS:
+        with button_col:
+            st.download_button(
+                f"Download {label}",
+                _spooled_bytes(chunks, df, rows, columns),
+                file_name=f"{file_stem}.{extension}",
+                mime=mime,
+                key=f"{key}_download"
+            )
+        return
+
+    state_key = f"{key}_prepared"
+    signature = _export_signature(df, rows, columns)
+    prepared = st.session_state.get(state_key)
+    if prepared is not None and (prepared['label'] != label or prepared['signature'] != signature):
+        prepared['file'].close()
+        prepared = st.session_state[state_key] = None
+
+    with button_col:
+        if prepared is None and st.button("Prepare download", key=f"{key}_prepare"):
+            try:
+                with st.spinner(f"Writing {label}..."):
+                    file, size = spool_export(chunks(df, rows, columns))
+            except Exception as e:
+                st.error(f"Could not export {label}: {str(e)}")
+            else:
+                prepared = st.session_state[state_key] = {
+                    'label': label,
+                    'signature': signature,
+                    'file': file,
+                    'size': size
+                }
+
+        if prepared is not None:
+            # Older versions accept neither callables nor spooled files, so the file is read on each render
+            prepared['file'].seek(0)
+            st.download_button(
+                f"Download {label} ({prepared['size'] / 1024:,.0f} KB)",
+                prepared['file'].read(),
+                file_name=f"{file_stem}.{extension}",
+                mime=mime,
+                key=f"{key}_download"
+            )
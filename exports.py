@@ -0,0 +1,174 @@
+import io
+import tempfile
+import zlib
+
+import pandas as pd
+import pyarrow as pa
+
+from lazy_imports import lazy_module
+
+openpyxl = lazy_module('openpyxl')
+
+# Rows converted per chunk; bounds the memory an export needs on top of the frame
+EXPORT_CHUNK_ROWS = 20000
+
+# Rows in an Excel worksheet, including the header
+EXCEL_MAX_ROWS = 1048576
+
+# Arrow types of object columns by pandas.api.types.infer_dtype; other kinds are written as text
+_OBJECT_COLUMN_TYPES = {
+    'string': pa.string(),
+    'empty': pa.string(),
+    'integer': pa.int64(),
+    'floating': pa.float64(),
+    'mixed-integer-float': pa.float64(),
+    'boolean': pa.bool_()
+}
+
+# Prepared files are kept in memory up to this size, then spill to a temporary file
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+
+def _chunks(df, rows=None, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield consecutive row slices of a frame, limited to `rows` positions and `columns`"""
+    total = len(df) if rows is None else len(rows)
+    for start in range(0, total, chunk_rows):
+        window = slice(start, start + chunk_rows) if rows is None else rows[start:start + chunk_rows]
+        chunk = df.iloc[window]
+        yield chunk if columns is None else chunk[list(columns)]
+
+
+def csv_chunks(df, rows=None, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield a CSV export as UTF-8 byte chunks"""
+    header = True
+    for chunk in _chunks(df, rows, columns, chunk_rows):
+        yield chunk.to_csv(index=False, header=header).encode()
+        header = False
+    if header:
+        # No rows: still write the header line
+        yield pd.DataFrame(columns=list(df.columns if columns is None else columns)).to_csv(index=False).encode()
+
+
+def gzip_chunks(chunks):
+    """Compress a stream of byte chunks into one gzip stream"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def csv_gzip_chunks(df, rows=None, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield a gzip-compressed CSV export"""
+    return gzip_chunks(csv_chunks(df, rows, columns, chunk_rows))
+
+
+def json_chunks(df, rows=None, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield a JSON array of records (the layout of DataFrame.to_json(orient='records'))"""
+    yield b'['
+    first = True
+    for chunk in _chunks(df, rows, columns, chunk_rows):
+        if len(chunk) == 0:
+            continue
+        records = chunk.to_json(orient='records')[1:-1]
+        yield (records if first else ',' + records).encode()
+        first = False
+    yield b']'
+
+
+def ndjson_chunks(df, rows=None, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield newline-delimited JSON, one record per line"""
+    for chunk in _chunks(df, rows, columns, chunk_rows):
+        if len(chunk):
+            yield chunk.to_json(orient='records', lines=True).rstrip('\n').encode() + b'\n'
+
+
+def _arrow_schema(df, columns):
+    """Return the Arrow schema of an export and the columns that must be written as text"""
+    columns = list(df.columns if columns is None else columns)
+    schema = pa.Schema.from_pandas(df.iloc[:0][columns], preserve_index=False)
+    text_columns = []
+    for i, column in enumerate(columns):
+        if df[column].dtype != object:
+            continue
+        # Object columns are typed from all of their values, not just the first chunk
+        arrow_type = _OBJECT_COLUMN_TYPES.get(pd.api.types.infer_dtype(df[column], skipna=True))
+        if arrow_type is None:
+            # Cells of mixed types have no single column type
+            text_columns.append(column)
+            arrow_type = pa.string()
+        schema = schema.set(i, pa.field(str(column), arrow_type))
+    return schema, text_columns
+
+
+def _as_text(df, text_columns):
+    if not text_columns:
+        return df
+    return df.assign(**{column: df[column].map(lambda v: None if _is_missing(v) else str(v)) for column in text_columns})
+
+
+def arrow_chunks(df, rows=None, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield an Arrow IPC file (readable with pandas.read_feather or pyarrow), one record batch per chunk"""
+    if pd.Index(df.columns if columns is None else columns).duplicated().any():
+        raise ValueError("Columns with duplicate names cannot be exported to Arrow")
+    schema, text_columns = _arrow_schema(df, columns)
+    sink = io.BytesIO()
+    with pa.ipc.new_file(sink, schema) as writer:
+        for chunk in _chunks(df, rows, columns, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(_as_text(chunk, text_columns), schema=schema, preserve_index=False))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()
+
+
+def excel_chunks(df, rows=None, columns=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield an .xlsx workbook written row by row with openpyxl's write-only mode"""
+    total = len(df) if rows is None else len(rows)
+    if total >= EXCEL_MAX_ROWS:
+        raise ValueError(f"Excel worksheets hold at most {EXCEL_MAX_ROWS - 1:,} data rows; export {total:,} rows as CSV or Arrow")
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append([str(column) for column in (df.columns if columns is None else columns)])
+    for chunk in _chunks(df, rows, columns, chunk_rows):
+        for values in chunk.itertuples(index=False, name=None):
+            sheet.append([None if _is_missing(value) else value for value in values])
+
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while True:
+            block = output.read(1024 * 1024)
+            if not block:
+                break
+            yield block
+
+
+def _is_missing(value):
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+# Label -> (file extension, MIME type, chunk generator)
+EXPORT_FORMATS = {
+    "CSV": ('csv', 'text/csv', csv_chunks),
+    "CSV (gzip)": ('csv.gz', 'application/gzip', csv_gzip_chunks),
+    "JSON": ('json', 'application/json', json_chunks),
+    "NDJSON": ('ndjson', 'application/x-ndjson', ndjson_chunks),
+    "Arrow": ('arrow', 'application/vnd.apache.arrow.file', arrow_chunks),
+    "Excel": ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', excel_chunks)
+}
+
+
+def spool_export(chunks, max_memory=SPOOL_MAX_BYTES):
+    """Write export chunks to a file that stays in memory only while small; return (file, size)"""
+    output = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    size = 0
+    for chunk in chunks:
+        output.write(chunk)
+        size += len(chunk)
+    output.seek(0)
+    return output, size
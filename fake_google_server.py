@@ -0,0 +1,802 @@
+"""Local stand-in for the Sheets v4, Drive v3 and Calendar v3 endpoints used by the apps
+
+Start it, point the apps at it and sign in with the generated service account:
+
+    python fake_google_server.py --port 8765 --rows 100000 --latency-ms 80 --rate-limit 0.02 \\
+        --service-account fake_service_account.json
+    GOOGLE_API_EMULATOR_HOST=http://127.0.0.1:8765 streamlit run app.py
+
+Every *.googleapis.com request of the pooled clients is sent to the emulator
+(google_clients.emulator_url), and the service account's token_uri points at
+its /token endpoint, so no real API quota is used.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+# Spreadsheets the apps offer as presets, seeded so warm-up and preset buttons work offline
+PRESET_SPREADSHEETS = {
+    '1t80HNEgDIBFElZqodlvfaEuRj-bPlS4-R8T9kdLBtFk': 'Grant Information',
+    '1BWz_FnYdzZyyl4WafSgoZV9rLHC91XOjstDcgwn_k6Y': 'Real Estate Properties',
+    '1Om-RVVChe1GItsY4YaN_K95iM44vTpoxpSXzwTnOdAo': 'Agent Information'
+}
+
+SPREADSHEET_MIME_TYPE = 'application/vnd.google-apps.spreadsheet'
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+# Default and maximum page sizes, matching the real APIs
+DRIVE_PAGE_SIZE = (100, 1000)
+CALENDAR_PAGE_SIZE = (250, 2500)
+
+_CITIES = ['Austin', 'Dallas', 'Houston', 'Miami', 'Denver', 'Phoenix', 'Seattle', 'Atlanta']
+_STREETS = ['Oak', 'Maple', 'Cedar', 'Pine', 'Elm', 'Lake', 'Hill', 'Park']
+_STATUSES = ['Active', 'Pending', 'Sold', 'Withdrawn']
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _rfc3339(moment):
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.') + f"{moment.microsecond // 1000:03d}Z"
+
+
+def _parse_rfc3339(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def synthetic_rows(rows, columns=10, seed=0):
+    """Return a header plus `rows` rows of listing-like data with mixed column types"""
+    rng = random.Random(seed)
+    header = ['ID', 'Address', 'City', 'Price', 'Bedrooms', 'Bathrooms', 'SqFt', 'Listed Date', 'Status', 'Commission']
+    header += [f"Metric {i}" for i in range(len(header), columns)]
+    header = header[:columns]
+
+    start = datetime(2020, 1, 1)
+    values = [header]
+    for i in range(rows):
+        row = [
+            f"P{i + 1:07d}",
+            f"{rng.randint(1, 9999)} {rng.choice(_STREETS)} St",
+            rng.choice(_CITIES),
+            f"${rng.randint(80, 2500) * 1000:,}",
+            str(rng.randint(1, 6)),
+            str(rng.choice([1, 1.5, 2, 2.5, 3, 4])),
+            str(rng.randint(500, 6000)),
+            (start + timedelta(days=rng.randint(0, 1800))).strftime('%Y-%m-%d'),
+            rng.choice(_STATUSES),
+            f"{rng.choice([2, 2.5, 3, 3.5, 4])}%"
+        ]
+        row += [f"{rng.gauss(100, 25):.2f}" for _ in range(len(row), columns)]
+        values.append(row[:columns])
+    return values
+
+
+def _column_index(letters):
+    index = 0
+    for char in letters.upper():
+        index = index * 26 + ord(char) - 64
+    return index
+
+
+def _column_letters(index):
+    letters = ''
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def parse_a1(range_name):
+    """Split an A1 range into (sheet title or None, first row, first col, last row, last col), 1-based
+
+    Missing bounds are None, e.g. "'Sheet1'!2:10" leaves both columns open.
+    """
+    sheet_title = None
+    cells = range_name
+    if '!' in range_name:
+        sheet_title, cells = range_name.rsplit('!', 1)
+    elif not re.fullmatch(r'[A-Za-z]*\d*(:[A-Za-z]*\d*)?', range_name):
+        sheet_title, cells = range_name, ''
+
+    if sheet_title is not None and sheet_title.startswith("'") and sheet_title.endswith("'"):
+        sheet_title = sheet_title[1:-1].replace("''", "'")
+
+    if not cells:
+        return sheet_title, None, None, None, None
+
+    bounds = []
+    for part in cells.split(':'):
+        match = re.fullmatch(r'([A-Za-z]*)(\d*)', part)
+        if match is None:
+            raise ValueError(f"Unable to parse range: {range_name}")
+        col = _column_index(match.group(1)) if match.group(1) else None
+        row = int(match.group(2)) if match.group(2) else None
+        bounds.append((row, col))
+
+    (first_row, first_col), (last_row, last_col) = bounds[0], bounds[-1]
+    if len(bounds) == 1:
+        # A single cell, row or column
+        last_row, last_col = first_row, first_col
+    return sheet_title, first_row, first_col, last_row, last_col
+
+
+class FakeApiError(Exception):
+    def __init__(self, status, message, reason='badRequest'):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+
+
+class FakeGoogleState:
+    """In-memory spreadsheets, Drive files and calendars served by the fake server"""
+
+    def __init__(self):
+        self.spreadsheets = {}
+        self.files = {}
+        self.calendars = {}
+        self.uploads = {}
+        self.lock = threading.RLock()
+
+    # Seeding
+
+    def add_spreadsheet(self, spreadsheet_id=None, title='Spreadsheet', worksheets=None, parent='root'):
+        """Add a spreadsheet from {worksheet title: rows} and register it as a Drive file"""
+        spreadsheet_id = spreadsheet_id or uuid.uuid4().hex
+        sheets = []
+        for index, (sheet_title, rows) in enumerate((worksheets or {'Sheet1': []}).items()):
+            width = max((len(row) for row in rows), default=0)
+            sheets.append({
+                'sheetId': index,
+                'title': sheet_title,
+                'rows': [list(row) for row in rows],
+                'rowCount': max(len(rows), 1000),
+                'columnCount': max(width, 26)
+            })
+        with self.lock:
+            self.spreadsheets[spreadsheet_id] = {'title': title, 'sheets': sheets}
+            self.add_file(title, SPREADSHEET_MIME_TYPE, parent=parent, file_id=spreadsheet_id)
+        return spreadsheet_id
+
+    def add_file(self, name, mime_type='text/plain', parent='root', content=b'', file_id=None):
+        """Add a Drive file or folder"""
+        file_id = file_id or uuid.uuid4().hex
+        now = _rfc3339(_now())
+        with self.lock:
+            self.files[file_id] = {
+                'id': file_id,
+                'name': name,
+                'mimeType': mime_type,
+                'parents': [parent] if parent else [],
+                'createdTime': now,
+                'modifiedTime': now,
+                'version': '1',
+                'size': str(len(content)),
+                'trashed': False,
+                'webViewLink': f"https://drive.google.com/file/d/{file_id}/view",
+                'content': content
+            }
+        return file_id
+
+    def add_calendar(self, summary, events=0, calendar_id=None, primary=False, seed=0):
+        """Add a calendar with `events` synthetic events spread around today"""
+        calendar_id = calendar_id or f"{uuid.uuid4().hex}@group.calendar.google.com"
+        rng = random.Random(seed)
+        start = _now().replace(minute=0, second=0, microsecond=0) - timedelta(days=30)
+        items = []
+        for i in range(events):
+            begins = start + timedelta(hours=rng.randint(0, 24 * 120))
+            items.append({
+                'id': uuid.uuid4().hex,
+                'status': 'confirmed',
+                'summary': f"{rng.choice(['Showing', 'Closing', 'Open House', 'Client Call'])} #{i + 1}",
+                'location': f"{rng.randint(1, 9999)} {rng.choice(_STREETS)} St, {rng.choice(_CITIES)}",
+                'description': 'Synthetic event',
+                'start': {'dateTime': _rfc3339(begins)},
+                'end': {'dateTime': _rfc3339(begins + timedelta(hours=1))},
+                'htmlLink': f"https://calendar.google.com/event?eid={i}"
+            })
+        items.sort(key=lambda event: event['start']['dateTime'])
+        with self.lock:
+            self.calendars[calendar_id] = {
+                'id': calendar_id,
+                'summary': summary,
+                'primary': primary,
+                'accessRole': 'owner',
+                'events': items
+            }
+        return calendar_id
+
+    def seed(self, rows=1000, columns=10, worksheets=1, extra_spreadsheets=0, files=200, folders=10, events=500, seed=0):
+        """Fill the state with the preset spreadsheets plus synthetic sheets, files and events"""
+        rng = random.Random(seed)
+        spreadsheet_ids = list(PRESET_SPREADSHEETS) + [None] * extra_spreadsheets
+        titles = list(PRESET_SPREADSHEETS.values()) + [f"Synthetic Sheet {i + 1}" for i in range(extra_spreadsheets)]
+        for n, (spreadsheet_id, title) in enumerate(zip(spreadsheet_ids, titles)):
+            sheets = {
+                ('Sheet1' if i == 0 else f"Sheet{i + 1}"): synthetic_rows(rows, columns, seed=seed + n * 100 + i)
+                for i in range(worksheets)
+            }
+            self.add_spreadsheet(spreadsheet_id, title, sheets)
+
+        folder_ids = ['root'] + [self.add_file(f"Folder {i + 1}", FOLDER_MIME_TYPE) for i in range(folders)]
+        extensions = [('pdf', 'application/pdf'), ('csv', 'text/csv'), ('png', 'image/png'), ('txt', 'text/plain')]
+        for i in range(files):
+            extension, mime_type = rng.choice(extensions)
+            self.add_file(
+                f"document_{i + 1}.{extension}",
+                mime_type,
+                parent=rng.choice(folder_ids),
+                content=b'x' * rng.randint(100, 100000)
+            )
+
+        self.add_calendar('Primary', events, calendar_id='primary', primary=True, seed=seed)
+        self.add_calendar('Showings', events // 2, seed=seed + 1)
+
+    # Sheets
+
+    def spreadsheet(self, spreadsheet_id):
+        spreadsheet = self.spreadsheets.get(spreadsheet_id)
+        if spreadsheet is None:
+            raise FakeApiError(404, f"Requested entity was not found: {spreadsheet_id}", 'notFound')
+        return spreadsheet
+
+    def worksheet(self, spreadsheet_id, title):
+        spreadsheet = self.spreadsheet(spreadsheet_id)
+        if title is None:
+            return spreadsheet['sheets'][0]
+        for sheet in spreadsheet['sheets']:
+            if sheet['title'] == title:
+                return sheet
+        raise FakeApiError(400, f"Unable to parse range: {title}")
+
+    def touch(self, spreadsheet_id):
+        """Bump the Drive revision of a file after a write"""
+        entry = self.files.get(spreadsheet_id)
+        if entry is not None:
+            entry['version'] = str(int(entry['version']) + 1)
+            entry['modifiedTime'] = _rfc3339(_now())
+
+    def metadata(self, spreadsheet_id):
+        spreadsheet = self.spreadsheet(spreadsheet_id)
+        return {
+            'spreadsheetId': spreadsheet_id,
+            'properties': {'title': spreadsheet['title'], 'locale': 'en_US', 'timeZone': 'Etc/GMT'},
+            'sheets': [
+                {
+                    'properties': {
+                        'sheetId': sheet['sheetId'],
+                        'title': sheet['title'],
+                        'index': index,
+                        'sheetType': 'GRID',
+                        'gridProperties': {'rowCount': sheet['rowCount'], 'columnCount': sheet['columnCount']}
+                    }
+                }
+                for index, sheet in enumerate(spreadsheet['sheets'])
+            ],
+            'spreadsheetUrl': f"https://docs.google.com/spreadsheets/d/{spreadsheet_id}/edit"
+        }
+
+    def _bounds(self, spreadsheet_id, range_name):
+        # A bare sheet title such as Sheet1 also reads as a cell reference; the sheet wins
+        titles = [sheet['title'] for sheet in self.spreadsheet(spreadsheet_id)['sheets']]
+        if '!' not in range_name and range_name.strip("'").replace("''", "'") in titles:
+            range_name = f"{range_name}!A:ZZZ" if range_name.startswith("'") else f"'{range_name}'!A:ZZZ"
+        sheet_title, first_row, first_col, last_row, last_col = parse_a1(range_name)
+        sheet = self.worksheet(spreadsheet_id, sheet_title)
+        return (
+            sheet,
+            (first_row or 1) - 1,
+            (first_col or 1) - 1,
+            last_row or sheet['rowCount'],
+            last_col or sheet['columnCount']
+        )
+
+    def get_values(self, spreadsheet_id, range_name):
+        """Return a ValueRange; trailing empty rows and cells are dropped like the real API"""
+        sheet, r0, c0, r1, c1 = self._bounds(spreadsheet_id, range_name)
+        values = []
+        for row in sheet['rows'][r0:r1]:
+            cells = [str(cell) for cell in row[c0:c1]]
+            while cells and cells[-1] == '':
+                cells.pop()
+            values.append(cells)
+        while values and not values[-1]:
+            values.pop()
+
+        response = {
+            'range': f"'{sheet['title']}'!{_column_letters(c0 + 1)}{r0 + 1}:{_column_letters(c1)}{r1}",
+            'majorDimension': 'ROWS'
+        }
+        if values:
+            response['values'] = values
+        return response
+
+    def update_values(self, spreadsheet_id, range_name, values):
+        sheet, r0, c0, _, _ = self._bounds(spreadsheet_id, range_name)
+        rows = sheet['rows']
+        for i, row_values in enumerate(values):
+            while len(rows) <= r0 + i:
+                rows.append([])
+            row = rows[r0 + i]
+            if len(row) < c0 + len(row_values):
+                row.extend([''] * (c0 + len(row_values) - len(row)))
+            for j, value in enumerate(row_values):
+                row[c0 + j] = '' if value is None else str(value)
+        sheet['rowCount'] = max(sheet['rowCount'], len(rows))
+        sheet['columnCount'] = max(sheet['columnCount'], max((len(row) for row in rows), default=0))
+        self.touch(spreadsheet_id)
+
+        width = max((len(row) for row in values), default=0)
+        return {
+            'spreadsheetId': spreadsheet_id,
+            'updatedRange': f"'{sheet['title']}'!{_column_letters(c0 + 1)}{r0 + 1}:{_column_letters(c0 + max(width, 1))}{r0 + max(len(values), 1)}",
+            'updatedRows': len(values),
+            'updatedColumns': width,
+            'updatedCells': sum(len(row) for row in values)
+        }
+
+    def append_values(self, spreadsheet_id, range_name, values):
+        sheet, _, c0, _, _ = self._bounds(spreadsheet_id, range_name)
+        last = len(sheet['rows'])
+        while last and not any(sheet['rows'][last - 1]):
+            last -= 1
+        target = f"'{sheet['title']}'!{_column_letters(c0 + 1)}{last + 1}"
+        return {
+            'spreadsheetId': spreadsheet_id,
+            'tableRange': f"'{sheet['title']}'!A1:{_column_letters(sheet['columnCount'])}{last}",
+            'updates': self.update_values(spreadsheet_id, target, values)
+        }
+
+    def clear_values(self, spreadsheet_id, range_name):
+        sheet, r0, c0, r1, c1 = self._bounds(spreadsheet_id, range_name)
+        for row in sheet['rows'][r0:r1]:
+            for j in range(c0, min(c1, len(row))):
+                row[j] = ''
+        while sheet['rows'] and not any(sheet['rows'][-1]):
+            sheet['rows'].pop()
+        self.touch(spreadsheet_id)
+        return {'spreadsheetId': spreadsheet_id, 'clearedRange': range_name}
+
+    def batch_update(self, spreadsheet_id, requests):
+        """Apply the structural requests gspread sends (resize, add and delete sheets); others are accepted as no-ops"""
+        spreadsheet = self.spreadsheet(spreadsheet_id)
+        replies = []
+        for request in requests:
+            reply = {}
+            if 'updateSheetProperties' in request:
+                properties = request['updateSheetProperties']['properties']
+                sheet = next(s for s in spreadsheet['sheets'] if s['sheetId'] == properties.get('sheetId', 0))
+                grid = properties.get('gridProperties', {})
+                if 'rowCount' in grid:
+                    sheet['rowCount'] = grid['rowCount']
+                    del sheet['rows'][grid['rowCount']:]
+                if 'columnCount' in grid:
+                    sheet['columnCount'] = grid['columnCount']
+                    for row in sheet['rows']:
+                        del row[grid['columnCount']:]
+                if 'title' in properties:
+                    sheet['title'] = properties['title']
+            elif 'addSheet' in request:
+                properties = request['addSheet'].get('properties', {})
+                sheet = {
+                    'sheetId': max((s['sheetId'] for s in spreadsheet['sheets']), default=-1) + 1,
+                    'title': properties.get('title', f"Sheet{len(spreadsheet['sheets']) + 1}"),
+                    'rows': [],
+                    'rowCount': properties.get('gridProperties', {}).get('rowCount', 1000),
+                    'columnCount': properties.get('gridProperties', {}).get('columnCount', 26)
+                }
+                spreadsheet['sheets'].append(sheet)
+                reply = {'addSheet': {'properties': {
+                    'sheetId': sheet['sheetId'],
+                    'title': sheet['title'],
+                    'index': len(spreadsheet['sheets']) - 1,
+                    'sheetType': 'GRID',
+                    'gridProperties': {'rowCount': sheet['rowCount'], 'columnCount': sheet['columnCount']}
+                }}}
+            elif 'deleteSheet' in request:
+                sheet_id = request['deleteSheet']['sheetId']
+                spreadsheet['sheets'] = [s for s in spreadsheet['sheets'] if s['sheetId'] != sheet_id]
+            replies.append(reply)
+        self.touch(spreadsheet_id)
+        return {'spreadsheetId': spreadsheet_id, 'replies': replies}
+
+    # Drive
+
+    def public_file(self, entry):
+        return {key: value for key, value in entry.items() if key not in ('content', 'trashed')}
+
+    def get_file(self, file_id):
+        entry = self.files.get(file_id)
+        if entry is None:
+            raise FakeApiError(404, f"File not found: {file_id}.", 'notFound')
+        return entry
+
+    def list_files(self, query=None, order_by=None):
+        matches = [entry for entry in self.files.values() if _matches_query(entry, query)]
+        if order_by:
+            for clause in reversed(order_by.split(',')):
+                field, _, direction = clause.strip().partition(' ')
+                matches.sort(key=lambda entry: str(entry.get(field, '')).lower(), reverse=direction == 'desc')
+        return matches
+
+    def create_file(self, metadata, content=b''):
+        parents = metadata.get('parents') or ['root']
+        file_id = self.add_file(
+            metadata.get('name', 'Untitled'),
+            metadata.get('mimeType', 'application/octet-stream'),
+            parent=parents[0],
+            content=content
+        )
+        return self.files[file_id]
+
+    def update_file(self, file_id, metadata, add_parents=None, remove_parents=None):
+        entry = self.get_file(file_id)
+        for key in ('name', 'mimeType', 'description', 'starred', 'trashed'):
+            if key in metadata:
+                entry[key] = metadata[key]
+        if remove_parents:
+            entry['parents'] = [p for p in entry['parents'] if p not in remove_parents.split(',')]
+        if add_parents:
+            entry['parents'] += [p for p in add_parents.split(',') if p not in entry['parents']]
+        self.touch(file_id)
+        return entry
+
+    # Calendar
+
+    def calendar(self, calendar_id):
+        calendar = self.calendars.get(calendar_id)
+        if calendar is None and calendar_id != 'primary':
+            calendar = next((c for c in self.calendars.values() if c['summary'] == calendar_id), None)
+        if calendar is None:
+            raise FakeApiError(404, 'Not Found', 'notFound')
+        return calendar
+
+    def list_events(self, calendar_id, time_min=None, time_max=None, query=None):
+        events = self.calendar(calendar_id)['events']
+        if time_min:
+            start = _parse_rfc3339(time_min)
+            events = [e for e in events if _parse_rfc3339(e['end']['dateTime']) > start]
+        if time_max:
+            end = _parse_rfc3339(time_max)
+            events = [e for e in events if _parse_rfc3339(e['start']['dateTime']) < end]
+        if query:
+            needle = query.lower()
+            events = [e for e in events if needle in e['summary'].lower() or needle in e.get('location', '').lower()]
+        return events
+
+
+def _matches_query(entry, query):
+    """Evaluate the subset of the Drive query language the apps use (and-joined clauses)"""
+    if not query:
+        return not entry['trashed']
+    for clause in re.split(r'\s+and\s+', query.strip()):
+        clause = clause.strip().strip('()')
+        match = re.fullmatch(r"'([^']*)'\s+in\s+parents", clause)
+        if match:
+            if match.group(1) not in entry['parents']:
+                return False
+            continue
+        match = re.fullmatch(r"(\w+)\s*(=|!=|contains)\s*'((?:[^'\\]|\\.)*)'", clause)
+        if match:
+            field, operator, value = match.group(1), match.group(2), match.group(3).replace("\\'", "'")
+            actual = entry.get('name' if field == 'fullText' else field, '')
+            if operator == '=' and actual != value:
+                return False
+            if operator == '!=' and actual == value:
+                return False
+            if operator == 'contains' and value.lower() not in str(actual).lower():
+                return False
+            continue
+        match = re.fullmatch(r"trashed\s*=\s*(true|false)", clause)
+        if match and entry['trashed'] != (match.group(1) == 'true'):
+            return False
+    return True
+
+
+def _page(items, params, sizes):
+    """Slice a list by pageToken/pageSize (or maxResults), returning (page, next page token)"""
+    default_size, max_size = sizes
+    size = params.get('pageSize') or params.get('maxResults') or default_size
+    size = max(1, min(int(size), max_size))
+    offset = int(params.get('pageToken') or 0)
+    next_offset = offset + size
+    return items[offset:next_offset], (str(next_offset) if next_offset < len(items) else None)
+
+
+class FakeServerConfig:
+    """Latency and failure injection settings of a running fake server"""
+
+    def __init__(self, latency=0.0, jitter=0.0, rate_limit=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.rate_limited = 0
+        self.lock = threading.Lock()
+
+
+class FakeGoogleHandler(BaseHTTPRequestHandler):
+    """Routes Sheets, Drive, Calendar, OAuth2 user info and token requests to a FakeGoogleState"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FakeGoogle/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_PATCH(self):
+        self._dispatch('PATCH')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def _dispatch(self, method):
+        parts = urlsplit(self.path)
+        path = unquote(parts.path)
+        params = {key: values if key == 'ranges' else values[-1] for key, values in parse_qs(parts.query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+
+        config = self.server.config
+        with config.lock:
+            config.requests += 1
+            delay = config.latency + config.random.uniform(0, config.jitter)
+            throttled = path != '/token' and config.random.random() < config.rate_limit
+            if throttled:
+                config.rate_limited += 1
+        if delay:
+            time.sleep(delay)
+
+        if throttled:
+            self._send_error(FakeApiError(429, 'Quota exceeded for quota metric (injected by fake server)', 'rateLimitExceeded'))
+            return
+
+        try:
+            with self.server.state.lock:
+                status, payload, headers = self._route(method, path, params, body)
+        except FakeApiError as e:
+            self._send_error(e)
+            return
+        except (KeyError, ValueError, StopIteration) as e:
+            self._send_error(FakeApiError(400, str(e)))
+            return
+        self._send_json(status, payload, headers)
+
+    def _route(self, method, path, params, body):
+        state = self.server.state
+
+        if path == '/token' and method == 'POST':
+            return 200, {'access_token': f"fake-{uuid.uuid4().hex}", 'expires_in': 3600, 'token_type': 'Bearer'}, {}
+
+        if path == '/oauth2/v2/userinfo':
+            return 200, {'id': '1', 'email': 'fake.user@example.com', 'name': 'Fake User', 'picture': ''}, {}
+
+        match = re.fullmatch(r'/v4/spreadsheets/([^/:]+)(?:(:batchUpdate)|/values(:batchGet|:batchUpdate)|/values/(.+?)(:append|:clear)?)?', path)
+        if match:
+            return self._route_sheets(method, params, body, *match.groups())
+
+        match = re.fullmatch(r'/(upload/)?drive/v3/files(?:/([^/]+))?', path)
+        if match:
+            return self._route_drive(method, params, body, bool(match.group(1)), match.group(2))
+
+        if path == '/calendar/v3/users/me/calendarList':
+            items = [
+                {key: value for key, value in calendar.items() if key != 'events'}
+                for calendar in state.calendars.values()
+            ]
+            page, next_token = _page(items, params, CALENDAR_PAGE_SIZE)
+            return 200, _with_token({'kind': 'calendar#calendarList', 'items': page}, next_token), {}
+
+        match = re.fullmatch(r'/calendar/v3/calendars/([^/]+)/events', path)
+        if match and method == 'GET':
+            events = state.list_events(match.group(1), params.get('timeMin'), params.get('timeMax'), params.get('q'))
+            page, next_token = _page(events, params, CALENDAR_PAGE_SIZE)
+            return 200, _with_token({'kind': 'calendar#events', 'items': page}, next_token), {}
+        if match and method == 'POST':
+            event = json.loads(body or b'{}')
+            event.setdefault('id', uuid.uuid4().hex)
+            event.setdefault('status', 'confirmed')
+            event.setdefault('htmlLink', f"https://calendar.google.com/event?eid={event['id']}")
+            calendar = state.calendar(match.group(1))
+            calendar['events'].append(event)
+            calendar['events'].sort(key=lambda e: e.get('start', {}).get('dateTime', ''))
+            return 200, event, {}
+
+        raise FakeApiError(404, f"Not emulated: {method} {path}", 'notFound')
+
+    def _route_sheets(self, method, params, body, spreadsheet_id, batch_update, values_batch, range_name, values_action):
+        state = self.server.state
+        payload = json.loads(body or b'{}')
+
+        if batch_update and method == 'POST':
+            return 200, state.batch_update(spreadsheet_id, payload.get('requests', [])), {}
+        if values_batch == ':batchGet':
+            ranges = params.get('ranges', [])
+            return 200, {
+                'spreadsheetId': spreadsheet_id,
+                'valueRanges': [state.get_values(spreadsheet_id, r) for r in ranges]
+            }, {}
+        if values_batch == ':batchUpdate':
+            responses = [state.update_values(spreadsheet_id, d['range'], d.get('values', [])) for d in payload.get('data', [])]
+            return 200, {
+                'spreadsheetId': spreadsheet_id,
+                'totalUpdatedCells': sum(r['updatedCells'] for r in responses),
+                'responses': responses
+            }, {}
+        if range_name and values_action == ':append':
+            return 200, state.append_values(spreadsheet_id, range_name, payload.get('values', [])), {}
+        if range_name and values_action == ':clear':
+            return 200, state.clear_values(spreadsheet_id, range_name), {}
+        if range_name and method == 'PUT':
+            return 200, state.update_values(spreadsheet_id, range_name, payload.get('values', [])), {}
+        if range_name:
+            return 200, state.get_values(spreadsheet_id, range_name), {}
+        return 200, state.metadata(spreadsheet_id), {}
+
+    def _route_drive(self, method, params, body, upload, file_id):
+        state = self.server.state
+
+        if upload and params.get('uploadType') == 'resumable' and method == 'POST':
+            upload_id = uuid.uuid4().hex
+            state.uploads[upload_id] = json.loads(body or b'{}')
+            location = f"https://www.googleapis.com/upload/drive/v3/files?uploadType=resumable&upload_id={upload_id}"
+            return 200, {}, {'Location': location}
+        if upload and 'upload_id' in params:
+            metadata = state.uploads.pop(params['upload_id'], {})
+            return 200, state.public_file(state.create_file(metadata, body)), {}
+        if upload and method == 'POST':
+            metadata, content = _parse_multipart(self.headers.get('Content-Type', ''), body)
+            return 200, state.public_file(state.create_file(metadata, content)), {}
+
+        if file_id is None and method == 'GET':
+            files = state.list_files(params.get('q'), params.get('orderBy'))
+            page, next_token = _page(files, params, DRIVE_PAGE_SIZE)
+            return 200, _with_token({'kind': 'drive#fileList', 'files': [state.public_file(f) for f in page]}, next_token), {}
+        if file_id is None and method == 'POST':
+            return 200, state.public_file(state.create_file(json.loads(body or b'{}'))), {}
+        if method == 'GET':
+            return 200, state.public_file(state.get_file(file_id)), {}
+        if method == 'PATCH':
+            entry = state.update_file(file_id, json.loads(body or b'{}'), params.get('addParents'), params.get('removeParents'))
+            return 200, state.public_file(entry), {}
+        if method == 'DELETE':
+            state.get_file(file_id)
+            del state.files[file_id]
+            return 204, None, {}
+        raise FakeApiError(405, f"Method not allowed: {method}")
+
+    def _send_json(self, status, payload, headers):
+        data = b'' if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, error):
+        payload = {'error': {
+            'code': error.status,
+            'message': str(error),
+            'status': 'RESOURCE_EXHAUSTED' if error.status == 429 else 'FAILED_PRECONDITION',
+            'errors': [{'message': str(error), 'domain': 'global', 'reason': error.reason}]
+        }}
+        headers = {'Retry-After': '1'} if error.status == 429 else {}
+        self._send_json(error.status, payload, headers)
+
+
+def _with_token(response, next_token):
+    if next_token:
+        response['nextPageToken'] = next_token
+    return response
+
+
+def _parse_multipart(content_type, body):
+    """Split a multipart/related upload into (metadata, content)"""
+    message = BytesParser(policy=default_policy).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    parts = list(message.iter_parts()) if message.is_multipart() else []
+    metadata = json.loads(parts[0].get_content()) if parts else {}
+    content = parts[1].get_payload(decode=True) if len(parts) > 1 else b''
+    return metadata, content
+
+
+def start_fake_server(state=None, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, rate_limit=0.0, seed=None, verbose=False):
+    """Start the fake server in a daemon thread and return it; server.base_url is its address"""
+    server = ThreadingHTTPServer((host, port), FakeGoogleHandler)
+    server.daemon_threads = True
+    server.state = state if state is not None else FakeGoogleState()
+    server.config = FakeServerConfig(latency, jitter, rate_limit, seed)
+    server.verbose = verbose
+    server.base_url = f"http://{host}:{server.server_address[1]}"
+
+    thread = threading.Thread(target=server.serve_forever, name='fake-google-server', daemon=True)
+    thread.start()
+    return server
+
+
+def write_service_account(path, base_url, email='fake-service-account@fake-project.iam.gserviceaccount.com'):
+    """Write a service account key whose token_uri points at the fake server"""
+    import rsa
+
+    _, private_key = rsa.newkeys(2048)
+    key = {
+        'type': 'service_account',
+        'project_id': 'fake-project',
+        'private_key_id': uuid.uuid4().hex,
+        'private_key': private_key.save_pkcs1().decode(),
+        'client_email': email,
+        'client_id': '1',
+        'auth_uri': f"{base_url}/auth",
+        'token_uri': f"{base_url}/token"
+    }
+    with open(path, 'w') as f:
+        json.dump(key, f, indent=2)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rows', type=int, default=1000, help='rows per seeded worksheet')
+    parser.add_argument('--columns', type=int, default=10, help='columns per seeded worksheet')
+    parser.add_argument('--worksheets', type=int, default=1, help='worksheets per seeded spreadsheet')
+    parser.add_argument('--extra-spreadsheets', type=int, default=0, help='synthetic spreadsheets besides the presets')
+    parser.add_argument('--files', type=int, default=200, help='synthetic Drive files')
+    parser.add_argument('--folders', type=int, default=10, help='synthetic Drive folders')
+    parser.add_argument('--events', type=int, default=500, help='synthetic events in the primary calendar')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='fixed latency added to every request')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='random extra latency of up to this much')
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='probability of answering 429 RESOURCE_EXHAUSTED')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--service-account', help='write a service account key for the fake server to this path')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args()
+
+    state = FakeGoogleState()
+    state.seed(args.rows, args.columns, args.worksheets, args.extra_spreadsheets, args.files, args.folders, args.events, args.seed)
+    server = start_fake_server(
+        state, args.host, args.port,
+        latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000, rate_limit=args.rate_limit,
+        seed=args.seed, verbose=args.verbose
+    )
+
+    print(f"Fake Google APIs listening on {server.base_url}")
+    print(f"  export GOOGLE_API_EMULATOR_HOST={server.base_url}")
+    if args.service_account:
+        write_service_account(args.service_account, server.base_url)
+        print(f"  service account key: {args.service_account} (also usable as WARMUP_SERVICE_ACCOUNT_FILE)")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# Categorical columns with at most this many distinct values keep one packed row bitmap per value
+BITMAP_MAX_CATEGORIES = 64
+
+
+class NumericIndex:
+    """Row positions of a numeric column sorted by value, for range filters"""
+
+    kind = 'numeric'
+
+    def __init__(self, series):
+        values = series.to_numpy(dtype='float64', na_value=np.nan)
+        self.order = np.argsort(values, kind='stable')
+        sorted_values = values[self.order]
+        # NaN sorts last and never matches a range
+        self.valid = len(values) - int(np.isnan(values).sum())
+        self.sorted_values = sorted_values[:self.valid]
+        self.min = float(self.sorted_values[0]) if self.valid else None
+        self.max = float(self.sorted_values[-1]) if self.valid else None
+
+    def _position(self, value):
+        return value
+
+    def packed_mask(self, n_rows, value_range):
+        low, high = (self._position(value) for value in value_range)
+        start = np.searchsorted(self.sorted_values, low, side='left')
+        stop = np.searchsorted(self.sorted_values, high, side='right')
+        mask = np.zeros(n_rows, dtype=bool)
+        mask[self.order[start:stop]] = True
+        return np.packbits(mask)
+
+
+class DatetimeIndex(NumericIndex):
+    """Row positions of a datetime column sorted by time, for date range filters
+
+    Times are kept as nanoseconds since the epoch (UTC for time zone aware
+    columns); range bounds may be dates, datetimes or Timestamps, and naive
+    bounds are read in the column's time zone.
+    """
+
+    kind = 'datetime'
+
+    def __init__(self, series):
+        self.tz = getattr(series.dtype, 'tz', None)
+        times = series.to_numpy(dtype='datetime64[ns]')
+        missing = np.isnat(times)
+        # Exact int64 nanoseconds: float64 would round bounds like 23:59:59.999999999 to the next day
+        values = times.view('int64')
+        # NaT sorts last and never matches a range
+        self.order = np.lexsort((values, missing))
+        self.valid = len(values) - int(missing.sum())
+        self.sorted_values = values[self.order[:self.valid]]
+        self.min = int(self.sorted_values[0]) if self.valid else None
+        self.max = int(self.sorted_values[-1]) if self.valid else None
+
+    def _position(self, value):
+        value = pd.Timestamp(value)
+        if self.tz is not None and value.tzinfo is None:
+            value = value.tz_localize(self.tz)
+        return value.value
+
+
+class CategoryIndex:
+    """Distinct values of a column with the rows holding each, for membership filters"""
+
+    kind = 'category'
+
+    def __init__(self, series):
+        codes, uniques = pd.factorize(series)
+        self.codes = codes
+        self.values = list(uniques)
+        self._positions = {value: i for i, value in enumerate(self.values)}
+        self.bitmaps = None
+        if len(self.values) <= BITMAP_MAX_CATEGORIES:
+            self.bitmaps = [np.packbits(codes == i) for i in range(len(self.values))]
+
+    def packed_mask(self, n_rows, selected):
+        positions = [self._positions[value] for value in selected if value in self._positions]
+        if self.bitmaps is not None:
+            packed = np.zeros((n_rows + 7) // 8, dtype=np.uint8)
+            for position in positions:
+                np.bitwise_or(packed, self.bitmaps[position], out=packed)
+            return packed
+
+        # Too many values for a bitmap each: look every row's code up in a selection table
+        # (the extra last slot catches missing values, coded -1)
+        selected_codes = np.zeros(len(self.values) + 1, dtype=bool)
+        selected_codes[positions] = True
+        return np.packbits(selected_codes[self.codes])
+
+
+class FrameIndex:
+    """Per-column filter indexes of one DataFrame, each built the first time it is used"""
+
+    def __init__(self, n_rows):
+        self.n_rows = n_rows
+        self._columns = {}
+        self._sort_orders = {}
+        self._lock = threading.Lock()
+
+    def column(self, df, name):
+        """Return the NumericIndex, DatetimeIndex or CategoryIndex of a column"""
+        series = df[name]
+        with self._lock:
+            entry = self._columns.get(name)
+        # Pages convert columns in place (e.g. to datetime); rebuild when the type changed
+        if entry is not None and entry[0] == series.dtype:
+            return entry[1]
+
+        if pd.api.types.is_datetime64_any_dtype(series):
+            index = DatetimeIndex(series)
+        elif pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+            index = CategoryIndex(series)
+        else:
+            index = NumericIndex(series)
+
+        with self._lock:
+            self._columns[name] = (series.dtype, index)
+        return index
+
+    def sort_order(self, df, name):
+        """Return (row positions ordered by a column, number of non-missing rows); missing values come last"""
+        series = df[name]
+        with self._lock:
+            entry = self._sort_orders.get(name)
+        if entry is not None and entry[0] == series.dtype:
+            return entry[1]
+
+        index = self.column(df, name)
+        if isinstance(index, NumericIndex):
+            result = (index.order, index.valid)
+        else:
+            try:
+                codes, _ = pd.factorize(series, sort=True)
+            except TypeError:
+                # Mixed types that do not compare with each other sort by their text
+                codes, _ = pd.factorize(series.astype(str), sort=True)
+            missing = codes < 0
+            codes = np.where(missing, np.iinfo(codes.dtype).max, codes)
+            result = (np.argsort(codes, kind='stable'), len(codes) - int(missing.sum()))
+
+        with self._lock:
+            self._sort_orders[name] = (series.dtype, result)
+        return result
+
+    def ordered_rows(self, df, rows=None, sort_by=None, ascending=True):
+        """Return the positions of `rows` (all rows if None) sorted by a column, or None for all rows unsorted"""
+        if sort_by is None:
+            return rows
+
+        order, valid = self.sort_order(df, sort_by)
+        if not ascending:
+            order = np.concatenate([order[:valid][::-1], order[valid:]])
+        if rows is None:
+            return order
+
+        selected = np.zeros(self.n_rows, dtype=bool)
+        selected[rows] = True
+        return order[selected[order]]
+
+    def filter_rows(self, df, filters):
+        """Return the positions of rows matching every filter, or None when nothing is filtered
+
+        `filters` maps column names to a list of accepted values or a
+        (low, high) range; the frame itself is never copied.
+        """
+        packed = None
+        for name, condition in filters.items():
+            index = self.column(df, name)
+            if index is None:
+                continue
+            mask = index.packed_mask(self.n_rows, condition)
+            packed = mask if packed is None else np.bitwise_and(packed, mask, out=packed)
+
+        if packed is None:
+            return None
+        return np.flatnonzero(np.unpackbits(packed, count=self.n_rows))
+
+
+class FilterIndexCache:
+    """Hands out the FrameIndex of a DataFrame for as long as the frame is alive"""
+
+    def __init__(self):
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def for_frame(self, df):
+        key = id(df)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None:
+                weakref.finalize(df, self._forget, key)
+            if index is None or index.n_rows != len(df):
+                index = FrameIndex(len(df))
+                self._indexes[key] = index
+            return index
+
+    def _forget(self, key):
+        with self._lock:
+            self._indexes.pop(key, None)
+
+
+# Shared by every session served by this process
+filter_indexes = FilterIndexCache()
@@ -0,0 +1,21 @@
+import pandas as pd
+import streamlit as st
+
+
+def date_range_filter(label, stats, key=None):
+    """Render a date range picker from a datetime column's statistics
+
+    Returns the inclusive (start, end) Timestamps to filter on, covering whole
+    days, or None while the full range (or only a start date) is selected.
+    Naive bounds are read in the column's time zone by the filter index.
+    """
+    if stats['min'] is None or stats['min'] >= stats['max']:
+        return None
+    min_date = pd.Timestamp(stats['min']).date()
+    max_date = pd.Timestamp(stats['max']).date()
+
+    date_range = st.date_input(label, value=(min_date, max_date), min_value=min_date, max_value=max_date, key=key)
+    if not isinstance(date_range, (tuple, list)) or len(date_range) != 2 or tuple(date_range) == (min_date, max_date):
+        return None
+    start, end = date_range
+    return pd.Timestamp(start), pd.Timestamp(end) + pd.Timedelta(days=1) - pd.Timedelta(1, 'ns')
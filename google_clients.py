@@ -0,0 +1,349 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit, urlunsplit
+
+from google.auth.transport.requests import AuthorizedSession, Request
+from requests.adapters import HTTPAdapter
+
+from api_metrics import api_method, api_metrics, current_page
+from lazy_imports import lazy_attribute, lazy_module
+from perf_spans import span
+from quota_scheduler import api_for_url, backoff_delay, MAX_RETRIES, parse_retry_after, quota_scheduler, should_retry
+
+# Imported when the first client or service is created, not at app start-up
+gspread = lazy_module('gspread')
+httplib2 = lazy_module('httplib2')
+api_errors = lazy_module('googleapiclient.errors')
+build = lazy_attribute('googleapiclient.discovery', 'build')
+
+# Refresh access tokens this long before they expire
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+# How long Spreadsheet and Worksheet handles are reused before reopening
+HANDLE_TTL_SECONDS = 300
+
+# Keep-alive connections kept per client (shared by concurrent fetches)
+CONNECTION_POOL_SIZE = 16
+
+# Timeout in seconds for Drive, Calendar and other discovery-based API calls
+SERVICE_TIMEOUT = 60
+
+# Base URL of a local API emulator (see fake_google_server.py) that replaces *.googleapis.com
+EMULATOR_HOST_ENV = 'GOOGLE_API_EMULATOR_HOST'
+
+
+def credential_key(credentials):
+    """Return a stable identity for a credentials object
+
+    Service accounts are identified by email. User credentials by a digest of
+    their refresh token, or of their access token when they cannot refresh.
+    Credentials that carry none of these (e.g. anonymous ones for the
+    emulator) are identified by their type alone.
+    """
+    if credentials is None:
+        return None
+    email = getattr(credentials, 'service_account_email', None)
+    if email:
+        return (type(credentials).__name__, email)
+    secret = getattr(credentials, 'refresh_token', None) or getattr(credentials, 'token', None)
+    if secret:
+        return (type(credentials).__name__, hashlib.sha256(secret.encode()).hexdigest())
+    return (type(credentials).__name__, None)
+
+
+def ensure_fresh_token(credentials):
+    """Refresh credentials that are missing a token or close to expiry"""
+    expiry = getattr(credentials, 'expiry', None)
+    expiring = expiry is not None and expiry - TOKEN_REFRESH_MARGIN <= datetime.utcnow()
+    if not credentials.valid or expiring:
+        credentials.refresh(Request())
+
+
+def emulator_url(url, emulator_host=None):
+    """Rewrite a googleapis.com URL to the configured API emulator, if any"""
+    if emulator_host is None:
+        emulator_host = os.environ.get(EMULATOR_HOST_ENV)
+    if not emulator_host:
+        return url
+    parts = urlsplit(url)
+    if not parts.netloc.endswith('googleapis.com'):
+        return url
+    if '://' not in emulator_host:
+        emulator_host = f"http://{emulator_host}"
+    target = urlsplit(emulator_host)
+    return urlunsplit((target.scheme, target.netloc, parts.path, parts.query, parts.fragment))
+
+
+def _http_session(client):
+    """Return the requests session behind a gspread client"""
+    # gspread 6 keeps the session on client.http_client, gspread 5 on the client
+    http_client = getattr(client, 'http_client', client)
+    return getattr(http_client, 'session', None)
+
+
+class SchedulingAdapter(HTTPAdapter):
+    """Connection-pooling adapter that admits every request through the quota scheduler
+
+    Throttled (429) and transient server errors are retried with jittered
+    exponential backoff; the last response is returned if retries run out.
+    Every attempt is recorded in api_metrics by API method and page.
+    """
+
+    def __init__(self, user_key, scheduler=quota_scheduler, **kwargs):
+        self.user_key = user_key
+        self.scheduler = scheduler
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        api = api_for_url(request.url)
+        path = urlsplit(request.url).path
+        method = api_method(request.method, path)
+        request.url = emulator_url(request.url)
+        with span(f"{request.method} {api}", 'api', path=path) as api_span:
+            return self._send_with_retries(request, api, method, api_span, **kwargs)
+
+    def _send_with_retries(self, request, api, method, api_span, **kwargs):
+        page = current_page()
+        attempt = 0
+        waited = 0.0
+        while True:
+            quota_wait = self.scheduler.acquire(self.user_key, api)
+            waited += quota_wait
+            started = time.perf_counter()
+            try:
+                response = super().send(request, **kwargs)
+            except Exception:
+                api_metrics.record(
+                    api, method, page, 'exception', time.perf_counter() - started,
+                    sent_bytes=_body_size(request.body), retry=attempt > 0, quota_wait=quota_wait
+                )
+                raise
+            api_metrics.record(
+                api, method, page, response.status_code, time.perf_counter() - started,
+                sent_bytes=_body_size(request.body),
+                received_bytes=_response_size(response, kwargs.get('stream')),
+                retry=attempt > 0,
+                quota_wait=quota_wait
+            )
+            if api_span is not None:
+                api_span.args.update(status=response.status_code, attempts=attempt + 1, quota_wait_ms=round(waited * 1000, 1))
+            if not should_retry(request.method, response.status_code):
+                return response
+
+            if response.status_code == 429:
+                self.scheduler.report_rate_limited(self.user_key, api)
+            if attempt >= MAX_RETRIES:
+                self.scheduler.record_failure()
+                return response
+
+            delay = backoff_delay(attempt, parse_retry_after(response.headers.get('Retry-After')))
+            response.close()
+            self.scheduler.record_retry()
+            time.sleep(delay)
+            attempt += 1
+
+
+def _body_size(body):
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode())
+    try:
+        return len(body)
+    except TypeError:
+        # Streamed upload bodies have no length up front
+        return 0
+
+
+def _response_size(response, stream):
+    length = response.headers.get('Content-Length')
+    if length and length.isdigit():
+        return int(length)
+    # Non-streamed bodies are read in full by the session anyway
+    return 0 if stream else len(response.content)
+
+
+def _mount_scheduler(session, credentials):
+    """Route a session's HTTPS calls through an enlarged, quota-aware connection pool"""
+    adapter = SchedulingAdapter(
+        credential_key(credentials),
+        pool_connections=CONNECTION_POOL_SIZE,
+        pool_maxsize=CONNECTION_POOL_SIZE
+    )
+    session.mount('https://', adapter)
+
+
+class SessionHttp:
+    """httplib2-compatible transport that sends API calls through a pooled requests session"""
+
+    def __init__(self, session, timeout=SERVICE_TIMEOUT):
+        self.session = session
+        self.timeout = timeout
+
+    def request(self, uri, method='GET', body=None, headers=None, redirections=5, connection_type=None):
+        response = self.session.request(
+            method,
+            uri,
+            data=body,
+            headers=headers,
+            timeout=self.timeout,
+            allow_redirects=redirections > 0
+        )
+        info = dict(response.headers)
+        info['status'] = response.status_code
+        return httplib2.Response(info), response.content
+
+
+class ClientPool:
+    """Hands out one gspread client, API services and spreadsheet handles per credential
+
+    Sessions signed in with the same credential share them; each session
+    registers with acquire() so that release() only closes them once the last
+    of those sessions signs out.
+    """
+
+    def __init__(self):
+        self._clients = {}
+        self._services = {}
+        self._handles = {}
+        self._holders = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, credentials, holder):
+        """Record that a session (any hashable `holder`) uses the pooled objects of these credentials"""
+        with self._lock:
+            self._holders.setdefault(credential_key(credentials), set()).add(holder)
+
+    def client(self, credentials):
+        """Return the shared gspread client for these credentials"""
+        key = credential_key(credentials)
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None:
+                client = gspread.authorize(credentials)
+                session = _http_session(client)
+                if session is not None:
+                    _mount_scheduler(session, credentials)
+                entry = (credentials, client)
+                self._clients[key] = entry
+
+        # Refresh outside the lock so one slow token call does not block other users
+        ensure_fresh_token(entry[0])
+        return entry[1]
+
+    def session(self, credentials):
+        """Return the keep-alive HTTP session shared by all APIs for these credentials"""
+        session = _http_session(self.client(credentials))
+        if session is None:
+            session = AuthorizedSession(credentials)
+            _mount_scheduler(session, credentials)
+        return session
+
+    def service(self, credentials, api, version):
+        """Return a memoized googleapiclient service built from the bundled discovery document"""
+        service_key = (credential_key(credentials), api, version)
+        with self._lock:
+            service = self._services.get(service_key)
+        if service is not None:
+            return service
+
+        http = SessionHttp(self.session(credentials))
+        try:
+            service = build(api, version, http=http, cache_discovery=False, static_discovery=True)
+        except api_errors.UnknownApiNameOrVersion:
+            # Not every API ships a bundled document; fetch it once and memoize
+            service = build(api, version, http=http, cache_discovery=False, static_discovery=False)
+
+        with self._lock:
+            service = self._services.setdefault(service_key, service)
+        return service
+
+    def spreadsheet(self, credentials, spreadsheet_id):
+        """Return a cached Spreadsheet handle"""
+        handle_key = (credential_key(credentials), spreadsheet_id, None)
+        handle = self._cached_handle(handle_key)
+        if handle is None:
+            handle = self.client(credentials).open_by_key(spreadsheet_id)
+            self._store_handle(handle_key, handle)
+        return handle
+
+    def worksheet(self, credentials, spreadsheet_id, worksheet_name=None):
+        """Return a cached Worksheet handle, the first sheet when no name is given"""
+        handle_key = (credential_key(credentials), spreadsheet_id, worksheet_name or '')
+        handle = self._cached_handle(handle_key)
+        if handle is None:
+            spreadsheet = self.spreadsheet(credentials, spreadsheet_id)
+            if worksheet_name:
+                handle = spreadsheet.worksheet(worksheet_name)
+            else:
+                handle = spreadsheet.sheet1
+            self._store_handle(handle_key, handle)
+        return handle
+
+    def forget_spreadsheet(self, spreadsheet_id):
+        """Drop cached handles for a spreadsheet (e.g. after worksheets change)"""
+        with self._lock:
+            for key in [k for k in self._handles if k[1] == spreadsheet_id]:
+                del self._handles[key]
+
+    def release(self, credentials, holder):
+        """Let a session stop using these credentials; the client and handles are dropped after the last one"""
+        key = credential_key(credentials)
+        with self._lock:
+            holders = self._holders.get(key, set())
+            holders.discard(holder)
+            if holders:
+                # Other sessions signed in with the same credential still use them
+                return
+            self._holders.pop(key, None)
+            entry = self._clients.pop(key, None)
+            for service_key in [k for k in self._services if k[0] == key]:
+                del self._services[service_key]
+            for handle_key in [k for k in self._handles if k[0] == key]:
+                del self._handles[handle_key]
+
+        if entry is not None:
+            session = _http_session(entry[1])
+            if session is not None:
+                session.close()
+
+    def _cached_handle(self, handle_key):
+        with self._lock:
+            entry = self._handles.get(handle_key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[1] > HANDLE_TTL_SECONDS:
+                del self._handles[handle_key]
+                return None
+            return entry[0]
+
+    def _store_handle(self, handle_key, handle):
+        with self._lock:
+            self._handles[handle_key] = (handle, time.monotonic())
+
+
+# Shared by every session served by this process
+client_pool = ClientPool()
+
+
+def get_gspread_client(credentials):
+    """Return the pooled gspread client for these credentials"""
+    return client_pool.client(credentials)
+
+
+def get_service(credentials, api, version):
+    """Return the pooled googleapiclient service for an API, e.g. ('drive', 'v3')"""
+    return client_pool.service(credentials, api, version)
+
+
+def open_spreadsheet(credentials, spreadsheet_id):
+    """Return a pooled Spreadsheet handle"""
+    return client_pool.spreadsheet(credentials, spreadsheet_id)
+
+
+def open_worksheet(credentials, spreadsheet_id, worksheet_name=None):
+    """Return a pooled Worksheet handle"""
+    return client_pool.worksheet(credentials, spreadsheet_id, worksheet_name)
@@ -0,0 +1,178 @@
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+from chunked_fetch import absolute_range_name, grid_row_count
+from sheet_cache import shared_sheet_cache
+from type_inference import apply_type_report
+
+# Trailing rows re-read on every sync to catch edits to recent entries
+SYNC_TAIL_ROWS = 500
+
+# Every Nth sync is a full reload, as a backstop for edits the checks below cannot see
+FULL_SYNC_EVERY = 20
+
+# Sheets smaller than this are simply reloaded in full
+INCREMENTAL_MIN_ROWS = 2000
+
+_sync_states = {}
+_sync_lock = threading.Lock()
+
+
+def hash_rows(rows, width):
+    """Return one 64-bit hash per row, padding rows to the header width first"""
+    hashes = np.empty(len(rows), dtype=np.uint64)
+    for i, row in enumerate(rows):
+        padded = list(row) + [''] * (width - len(row))
+        digest = hashlib.blake2b('\x1f'.join(padded).encode(), digest_size=8).digest()
+        hashes[i] = int.from_bytes(digest, 'little')
+    return hashes
+
+
+def _file_version(revision):
+    """Return the Drive file version of a revision marker ("version:modifiedTime"), or None"""
+    version = str(revision or '').split(':', 1)[0]
+    return int(version) if version.isdigit() else None
+
+
+def remember_rows(spreadsheet_id, worksheet_name, values, revision=None):
+    """Record the header, per-row hashes and revision of a full load as the baseline for later syncs"""
+    if not values:
+        forget_rows(spreadsheet_id, worksheet_name)
+        return
+
+    header = list(values[0])
+    with _sync_lock:
+        _sync_states[(spreadsheet_id, worksheet_name)] = {
+            'header': header,
+            'row_hashes': hash_rows(values[1:], len(header)),
+            'revision': revision,
+            'syncs_since_full': 0
+        }
+
+
+def forget_rows(spreadsheet_id, worksheet_name=None):
+    """Drop the sync baseline of a worksheet, or of every worksheet of a spreadsheet"""
+    with _sync_lock:
+        for key in [k for k in _sync_states if k[0] == spreadsheet_id and (worksheet_name is None or k[1] == worksheet_name)]:
+            del _sync_states[key]
+
+
+def _fetch_header_and_tail(worksheet, first_row, last_row):
+    """Fetch the header row and a trailing row range in a single request"""
+    response = worksheet.spreadsheet.values_batch_get(
+        ranges=[
+            absolute_range_name(worksheet.title, "1:1"),
+            absolute_range_name(worksheet.title, f"{first_row}:{last_row}")
+        ],
+        params={'majorDimension': 'ROWS', 'valueRenderOption': 'FORMATTED_VALUE'}
+    )
+    value_ranges = response.get('valueRanges', [])
+    header_rows = value_ranges[0].get('values', []) if len(value_ranges) > 0 else []
+    tail_rows = value_ranges[1].get('values', []) if len(value_ranges) > 1 else []
+    return (header_rows[0] if header_rows else []), tail_rows
+
+
+def sync_worksheet(worksheet, spreadsheet_id, worksheet_name, df, revision=None):
+    """Bring a previously loaded worksheet DataFrame up to date by refetching only its recent rows
+
+    Re-reads the header, the last SYNC_TAIL_ROWS known rows and anything
+    appended after them, compares per-row hashes with the last load and
+    rebuilds only the changed tail of the DataFrame.
+
+    Rows above the trailing window are not re-read, so the patch is only
+    trusted when the re-read rows account for the whole change: the Drive file
+    version moved by exactly one write since the baseline, that write shows up
+    in the window, and it does not reach the window's first row (where it may
+    continue above). Anything else is a full reload. A single batch update can
+    still edit rows above the window as well, which only the scheduled full
+    reload picks up; the report counts those rows as not re-checked.
+
+    Returns (df, report) on success, or (None, reason) when a full reload is
+    needed (no baseline, changed header, deleted rows, a change the window
+    does not account for or a scheduled full sync).
+    """
+    with _sync_lock:
+        state = _sync_states.get((spreadsheet_id, worksheet_name))
+
+    if state is None:
+        return None, "no baseline"
+    if state['syncs_since_full'] + 1 >= FULL_SYNC_EVERY:
+        return None, "scheduled full reload"
+
+    header = state['header']
+    known_rows = len(state['row_hashes'])
+    if known_rows < INCREMENTAL_MIN_ROWS or len(df) != known_rows:
+        return None, "sheet too small or cached copy out of step"
+
+    # Each write bumps the file version; with several, one may lie above the window
+    old_version, new_version = _file_version(state['revision']), _file_version(revision)
+    if old_version is None or new_version is None or new_version - old_version != 1:
+        return None, "more than one change since the last sync"
+
+    window_start = max(0, known_rows - SYNC_TAIL_ROWS)
+    last_row = max(grid_row_count(worksheet), known_rows + 1)
+    remote_header, tail_rows = _fetch_header_and_tail(worksheet, window_start + 2, last_row)
+
+    if remote_header + [''] * (len(header) - len(remote_header)) != header:
+        return None, "header changed"
+    if any(len(row) > len(header) for row in tail_rows):
+        return None, "columns added"
+
+    # The API drops trailing blank rows; fewer rows than before means rows were deleted
+    window_rows = known_rows - window_start
+    if len(tail_rows) < window_rows:
+        return None, "rows deleted"
+
+    tail_hashes = hash_rows(tail_rows, len(header))
+    modified = int((tail_hashes[:window_rows] != state['row_hashes'][window_start:]).sum())
+    appended = len(tail_rows) - window_rows
+
+    if not modified and not appended:
+        return None, "changed outside the re-read rows"
+    if window_start > 0 and tail_hashes[0] != state['row_hashes'][window_start]:
+        return None, "change reaches above the re-read rows"
+
+    # One write can also touch rows above the window (a batch update that edits and appends);
+    # the report says how many rows were taken on trust until the next full reload
+    report = {
+        'rows_refetched': len(tail_rows),
+        'modified': modified,
+        'appended': appended,
+        'rows_not_rechecked': window_start,
+        'syncs_until_full': FULL_SYNC_EVERY - state['syncs_since_full'] - 1
+    }
+
+    type_report = df.attrs.get('type_report', {})
+    padded_rows = [list(row) + [''] * (len(header) - len(row)) for row in tail_rows]
+    tail_df = apply_type_report(pd.DataFrame(padded_rows, columns=header), type_report)
+
+    df = pd.concat([df.iloc[:window_start], tail_df], ignore_index=True)
+    for position, col in enumerate(df.columns):
+        # Categories of the old and new rows may differ, which concat turns into object
+        if type_report.get(col, {}).get('kind') == 'category' and df.iloc[:, position].dtype.name != 'category':
+            df.isetitem(position, df.iloc[:, position].astype('category'))
+    df.attrs['type_report'] = type_report
+
+    with _sync_lock:
+        _sync_states[(spreadsheet_id, worksheet_name)] = {
+            'header': header,
+            'row_hashes': np.concatenate([state['row_hashes'][:window_start], tail_hashes]),
+            'revision': revision,
+            'syncs_since_full': state['syncs_since_full'] + 1
+        }
+
+    return df, report
+
+
+def incremental_load(worksheet, spreadsheet_id, worksheet_name, revision):
+    """Try to update the newest cached copy of a worksheet incrementally to `revision`
+
+    Returns (df, report), or (None, reason) when a full reload is required.
+    """
+    cached_revision, cached_df = shared_sheet_cache.latest(spreadsheet_id, worksheet_name)
+    if cached_df is None:
+        return None, "nothing cached"
+    return sync_worksheet(worksheet, spreadsheet_id, worksheet_name, cached_df, revision)
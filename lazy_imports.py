@@ -0,0 +1,86 @@
+import importlib
+import sys
+import threading
+import time
+
+from api_metrics import current_page
+from perf_spans import span
+
+# First import of each lazily loaded module: name -> (seconds, page that triggered it)
+_import_times = {}
+_lock = threading.Lock()
+
+
+def _import(name):
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    started = time.perf_counter()
+    with span(f"import {name}", 'import'):
+        module = importlib.import_module(name)
+    elapsed = time.perf_counter() - started
+
+    with _lock:
+        _import_times.setdefault(name, (elapsed, current_page()))
+    return module
+
+
+class LazyModule:
+    """Stand-in for a module, or one attribute of it, that is imported on first use
+
+    Attribute access and calls are forwarded to the real object, so
+    `px = lazy_module('plotly.express')` and
+    `Flow = lazy_attribute('google_auth_oauthlib.flow', 'Flow')` can be used
+    in place of the usual import statements.
+    """
+
+    def __init__(self, module_name, attribute=None):
+        self.__dict__['_module_name'] = module_name
+        self.__dict__['_attribute'] = attribute
+        self.__dict__['_target'] = None
+
+    def _load(self):
+        target = self.__dict__['_target']
+        if target is None:
+            target = _import(self._module_name)
+            if self._attribute is not None:
+                target = getattr(target, self._attribute)
+            self.__dict__['_target'] = target
+        return target
+
+    @property
+    def loaded(self):
+        return self.__dict__['_target'] is not None
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+    def __repr__(self):
+        name = self._module_name if self._attribute is None else f"{self._module_name}.{self._attribute}"
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f"<lazy {name} ({state})>"
+
+
+def lazy_module(name):
+    """Return a module that is imported the first time one of its attributes is used"""
+    return LazyModule(name)
+
+
+def lazy_attribute(module_name, attribute):
+    """Return a class or function that is imported the first time it is used"""
+    return LazyModule(module_name, attribute)
+
+
+def import_report():
+    """Return (module, milliseconds, page) for each lazily imported module, slowest first"""
+    with _lock:
+        items = list(_import_times.items())
+    return sorted(
+        ((name, seconds * 1000, where) for name, (seconds, where) in items),
+        key=lambda row: row[1],
+        reverse=True
+    )
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import streamlit as st
+
+from dense_charts import line_figure, x_bounds
+
+# Steps of the zoom slider across the full x range
+ZOOM_STEPS = 1000
+
+
+def zoom_window(df, x_col, key):
+    """Render a range slider over a numeric or datetime x column; return the chosen (low, high), or None for all of it"""
+    bounds = x_bounds(df, x_col)
+    if bounds is None:
+        return None
+    low, high = bounds
+    zoom_key = f"{key}_zoom_{x_col}"
+
+    # Start over when the data no longer covers the stored range (e.g. after a reload)
+    stored = st.session_state.get(zoom_key)
+    if stored is not None and (stored[0] < low or stored[1] > high):
+        del st.session_state[zoom_key]
+
+    step = (high - low) / ZOOM_STEPS
+    value = st.slider(
+        f"Zoom to {x_col} range:",
+        min_value=low,
+        max_value=high,
+        value=(low, high),
+        step=step,
+        format="YYYY-MM-DD HH:mm" if isinstance(low, datetime) else None,
+        key=zoom_key
+    )
+    return None if tuple(value) == (low, high) else tuple(value)
+
+
+def line_chart_panel(df, x_col, y_cols, key, title, y_title="Value", mode='lines', render=st.plotly_chart):
+    """Render a zoomable line chart that sends at most a pixel's worth of points per series
+
+    Each series is downsampled with LTTB over the zoomed x range; narrowing the
+    range re-queries the rows in it, down to full resolution. Zoom is kept in
+    st.session_state under keys prefixed by `key`.
+    """
+    x_range = zoom_window(df, x_col, key)
+    fig, shown, total = line_figure(df, x_col, y_cols, x_range=x_range, mode=mode)
+    fig.update_layout(title=title, xaxis_title=x_col, yaxis_title=y_title, legend_title="Variables")
+    render(fig, use_container_width=True)
+    if shown < total:
+        st.caption(f"Showing {shown:,} of {total:,} points, downsampled to keep peaks and troughs. Zoom in for full resolution.")
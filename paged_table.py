@@ -0,0 +1,66 @@
+import math
+
+import streamlit as st
+
+from filter_index import filter_indexes
+
+# Choices for the number of rows sent to the browser per page
+PAGE_SIZES = [25, 50, 100, 250, 500]
+DEFAULT_PAGE_SIZE = 50
+
+NATURAL_ORDER = "(sheet order)"
+
+
+def paged_table(df, key, rows=None, columns=None):
+    """Render one page of a DataFrame, sorted and sliced on the server
+
+    `rows` holds the positions of the rows to show (e.g. filter matches) and
+    defaults to every row; `columns` defaults to every column. Only the visible
+    page is sent to the browser, so the payload does not grow with the sheet.
+    Sort and page are kept in st.session_state under keys prefixed by `key`.
+    """
+    columns = list(df.columns) if columns is None else list(columns)
+    total = len(df) if rows is None else len(rows)
+
+    sort_key, direction_key = f"{key}_sort_by", f"{key}_sort_direction"
+    size_key, page_key = f"{key}_page_size", f"{key}_page"
+
+    # Drop a sort column that is no longer shown, and keep the page in range when the row count shrinks
+    if st.session_state.get(sort_key, NATURAL_ORDER) not in [NATURAL_ORDER] + columns:
+        st.session_state[sort_key] = NATURAL_ORDER
+    page_size = st.session_state.get(size_key, DEFAULT_PAGE_SIZE)
+    page_count = max(1, math.ceil(total / page_size))
+    if st.session_state.get(page_key, 1) > page_count:
+        st.session_state[page_key] = page_count
+
+    def first_page():
+        st.session_state[page_key] = 1
+
+    sort_col, direction_col, size_col, page_col = st.columns([3, 2, 2, 2])
+    with sort_col:
+        sort_by = st.selectbox("Sort by:", [NATURAL_ORDER] + columns, key=sort_key, on_change=first_page)
+    with direction_col:
+        direction = st.selectbox("Order:", ["Ascending", "Descending"], key=direction_key, on_change=first_page)
+    with size_col:
+        page_size = st.selectbox(
+            "Rows per page:", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE), key=size_key, on_change=first_page
+        )
+    page_count = max(1, math.ceil(total / page_size))
+    with page_col:
+        page = st.number_input(f"Page (of {page_count}):", min_value=1, max_value=page_count, step=1, key=page_key)
+
+    ordered = filter_indexes.for_frame(df).ordered_rows(
+        df,
+        rows,
+        sort_by=None if sort_by == NATURAL_ORDER else sort_by,
+        ascending=direction == "Ascending"
+    )
+    start = (page - 1) * page_size
+    stop = min(start + page_size, total)
+    window = slice(start, stop) if ordered is None else ordered[start:stop]
+
+    st.dataframe(df.iloc[window][columns], use_container_width=True)
+    if total:
+        st.caption(f"Rows {start + 1:,}–{stop:,} of {total:,}")
+    else:
+        st.caption("No rows to show")
@@ -0,0 +1,196 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Reruns kept per session for the performance panel and trace export
+TRACE_HISTORY = 20
+
+_active = contextvars.ContextVar('perf_span', default=None)
+
+
+class Span:
+    """A named, timed region of a rerun; children are nested regions"""
+
+    def __init__(self, name, category, parent=None, args=None):
+        self.name = name
+        self.category = category
+        self.parent = parent
+        self.args = args or {}
+        self.thread_id = threading.get_ident()
+        self.start = time.perf_counter()
+        self.end = None
+        self.children = []
+
+    @property
+    def duration(self):
+        end = self.end if self.end is not None else time.perf_counter()
+        return end - self.start
+
+    def last_end(self):
+        """Latest end time of this span and everything below it"""
+        ends = [self.end or self.start] + [child.last_end() for child in self.children]
+        return max(ends)
+
+
+class Trace:
+    """Span tree of one script rerun
+
+    Sections are sequential regions of the script marked with section() and
+    subsection(); spans are nested regions opened with span(). Spans opened in
+    worker threads that run in a copy of the rerun's context join the same tree.
+    """
+
+    def __init__(self, name):
+        self.root = Span(name, 'rerun')
+        self._open_sections = []
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.root.end is not None
+
+    def open(self, name, category, parent, args=None):
+        span = Span(name, category, parent, args)
+        with self._lock:
+            parent.children.append(span)
+        return span
+
+    def close(self, span, end=None):
+        span.end = end if end is not None else time.perf_counter()
+
+    def section(self, name, level=0):
+        """End the open section at `level` (and any below it) and start a new one"""
+        while len(self._open_sections) > level:
+            self.close(self._open_sections.pop())
+        parent = self._open_sections[-1] if self._open_sections else self.root
+        section = self.open(name, 'section', parent)
+        self._open_sections.append(section)
+        return section
+
+    def finish(self, at_last_activity=False):
+        """Close every open span, now or, for a rerun cut short by st.rerun() or st.stop(), at its last activity"""
+        if self.finished:
+            return
+        end = self.root.last_end() if at_last_activity else time.perf_counter()
+        for span in self._walk(self.root):
+            if span.end is None:
+                span.end = max(end, span.start)
+        self._open_sections = []
+
+    def rows(self):
+        """Return (depth, name, category, milliseconds, share of the rerun) for every span, depth first"""
+        total = self.root.duration or 1e-9
+        rows = []
+
+        def visit(span, depth):
+            rows.append((depth, span.name, span.category, span.duration * 1000, span.duration / total))
+            for child in sorted(span.children, key=lambda s: s.start):
+                visit(child, depth + 1)
+
+        visit(self.root, 0)
+        return rows
+
+    def chrome_events(self):
+        """Return the spans as Chrome trace 'complete' events"""
+        pid = os.getpid()
+        return [
+            {
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': span.start * 1e6,
+                'dur': span.duration * 1e6,
+                'pid': pid,
+                'tid': span.thread_id,
+                'args': {key: str(value) for key, value in span.args.items()}
+            }
+            for span in self._walk(self.root)
+        ]
+
+    def _walk(self, span):
+        yield span
+        for child in list(span.children):
+            yield from self._walk(child)
+
+
+def start_trace(name):
+    """Start timing a rerun in the current context and return its Trace"""
+    trace = Trace(name)
+    _active.set((trace, trace.root))
+    return trace
+
+
+def current_trace():
+    active = _active.get()
+    return active[0] if active else None
+
+
+def current_section_name():
+    """Return the name of the top-level section the current code runs in, or None outside a traced rerun"""
+    active = _active.get()
+    if active is None:
+        return None
+    trace, current = active
+    if current is trace.root:
+        return None
+    while current.parent is not trace.root:
+        current = current.parent
+    return current.name
+
+
+def section(name):
+    """Mark the start of a top-level section of the script (ends the previous one)"""
+    active = _active.get()
+    if active is None:
+        return
+    trace = active[0]
+    _active.set((trace, trace.section(name, level=0)))
+
+
+def subsection(name):
+    """Mark the start of a section within the current top-level section"""
+    active = _active.get()
+    if active is None:
+        return
+    trace = active[0]
+    _active.set((trace, trace.section(name, level=1)))
+
+
+@contextmanager
+def span(name, category='section', **args):
+    """Time the enclosed block as a child of the current span; a no-op outside a traced rerun"""
+    active = _active.get()
+    if active is None:
+        yield None
+        return
+
+    trace, parent = active
+    current = trace.open(name, category, parent, args)
+    token = _active.set((trace, current))
+    try:
+        yield current
+    finally:
+        _active.reset(token)
+        trace.close(current)
+
+
+def traced(name, category='section'):
+    """Decorator timing every call of a function as a span"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, category):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def chrome_trace(traces):
+    """Combine finished traces into one Chrome trace document (chrome://tracing, Perfetto)"""
+    events = []
+    for trace in traces:
+        events.extend(trace.chrome_events())
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
@@ -0,0 +1,224 @@
+import contextvars
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# Request priorities; interactive page loads are served before background work
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# (requests per second, burst) per project, shared by every user of this process
+PROJECT_RATES = {
+    'sheets': (300 / 60, 300),
+    'drive': (12000 / 60, 1000),
+    'calendar': (600 / 60, 600),
+    'other': (600 / 60, 600)
+}
+
+# (requests per second, burst) per user and API
+USER_RATES = {
+    'sheets': (60 / 60, 60),
+    'drive': (2400 / 60, 400),
+    'calendar': (300 / 60, 300),
+    'other': (300 / 60, 300)
+}
+
+# Share of a bucket that background requests leave untouched for interactive ones
+BACKGROUND_RESERVE = 0.2
+
+# Retries of throttled or failed requests, with full-jitter exponential backoff
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 32.0
+
+# Responses that are worth retrying; 5xx only for requests that are safe to repeat
+THROTTLED_STATUSES = {429}
+RETRYABLE_SERVER_STATUSES = {500, 502, 503, 504}
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+_priority = contextvars.ContextVar('request_priority', default=INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority):
+    """Run the enclosed Google API calls at the given priority"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    """Return the priority of Google API calls made from the current context"""
+    return _priority.get()
+
+
+def api_for_url(url):
+    """Classify a Google API URL into the quota group it is billed against"""
+    parsed = urlparse(url)
+    if parsed.netloc.startswith('sheets.'):
+        return 'sheets'
+    if parsed.netloc.startswith('calendar') or parsed.path.startswith('/calendar/'):
+        return 'calendar'
+    if parsed.netloc.startswith('drive') or '/drive/' in parsed.path:
+        return 'drive'
+    return 'other'
+
+
+class TokenBucket:
+    """Refills at a fixed rate up to a burst capacity; callers must hold the scheduler lock"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, reserve=0.0):
+        """Seconds until a token is available while keeping `reserve` tokens back"""
+        missing = 1 + reserve - self.tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def drain(self):
+        """Empty the bucket, e.g. after the server reported the quota exhausted"""
+        self.tokens = min(self.tokens, 0.0)
+
+
+class QuotaScheduler:
+    """Admits Google API requests through per-project and per-user token buckets
+
+    Interactive requests are admitted before any waiting background request,
+    and background requests never spend the last BACKGROUND_RESERVE of a bucket.
+    """
+
+    def __init__(self, project_rates=PROJECT_RATES, user_rates=USER_RATES):
+        self.project_rates = project_rates
+        self.user_rates = user_rates
+        self._project_buckets = {}
+        self._user_buckets = {}
+        self._waiting = {INTERACTIVE: 0, BACKGROUND: 0}
+        self._condition = threading.Condition()
+        self._stats = {
+            'requests': 0,
+            'throttled': 0,
+            'wait_seconds': 0.0,
+            'retries': 0,
+            'rate_limited_responses': 0,
+            'failed': 0
+        }
+
+    def _buckets(self, user_key, api):
+        project_bucket = self._project_buckets.get(api)
+        if project_bucket is None:
+            project_bucket = TokenBucket(*self.project_rates.get(api, self.project_rates['other']))
+            self._project_buckets[api] = project_bucket
+
+        user_bucket = self._user_buckets.get((user_key, api))
+        if user_bucket is None:
+            user_bucket = TokenBucket(*self.user_rates.get(api, self.user_rates['other']))
+            self._user_buckets[(user_key, api)] = user_bucket
+
+        return project_bucket, user_bucket
+
+    def acquire(self, user_key, api, priority=None):
+        """Block until the request may be sent; returns the seconds spent waiting"""
+        if priority is None:
+            priority = current_priority()
+        started = time.monotonic()
+
+        with self._condition:
+            self._waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    buckets = self._buckets(user_key, api)
+                    for bucket in buckets:
+                        bucket.refill(now)
+
+                    if priority == BACKGROUND:
+                        wait = max(bucket.wait_time(bucket.capacity * BACKGROUND_RESERVE) for bucket in buckets)
+                        if self._waiting[INTERACTIVE]:
+                            wait = max(wait, 0.05)
+                    else:
+                        wait = max(bucket.wait_time() for bucket in buckets)
+
+                    if wait <= 0:
+                        for bucket in buckets:
+                            bucket.tokens -= 1
+                        break
+                    self._condition.wait(wait)
+            finally:
+                self._waiting[priority] -= 1
+                # Wake waiters that may have been held back for this request
+                self._condition.notify_all()
+
+            waited = time.monotonic() - started
+            self._stats['requests'] += 1
+            self._stats['wait_seconds'] += waited
+            if waited > 0.001:
+                self._stats['throttled'] += 1
+        return waited
+
+    def report_rate_limited(self, user_key, api):
+        """Drain the buckets of a request the server rejected so every caller backs off"""
+        with self._condition:
+            for bucket in self._buckets(user_key, api):
+                bucket.drain()
+            self._stats['rate_limited_responses'] += 1
+
+    def record_retry(self):
+        with self._condition:
+            self._stats['retries'] += 1
+
+    def record_failure(self):
+        with self._condition:
+            self._stats['failed'] += 1
+
+    def stats(self):
+        """Return scheduler counters for display"""
+        with self._condition:
+            stats = dict(self._stats)
+            stats['waiting_interactive'] = self._waiting[INTERACTIVE]
+            stats['waiting_background'] = self._waiting[BACKGROUND]
+            return stats
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Return a full-jitter exponential backoff delay, never shorter than a server Retry-After"""
+    delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def parse_retry_after(value):
+    """Return the seconds requested by a Retry-After header, or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def should_retry(method, status_code):
+    """Return True if a response status is worth retrying for this method"""
+    if status_code in THROTTLED_STATUSES:
+        return True
+    return status_code in RETRYABLE_SERVER_STATUSES and method.upper() in IDEMPOTENT_METHODS
+
+
+# Shared by every session served by this process
+quota_scheduler = QuotaScheduler()
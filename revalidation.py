@@ -0,0 +1,85 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from google_clients import credential_key
+from quota_scheduler import BACKGROUND, request_priority
+from sheet_cache import get_spreadsheet_revision, shared_sheet_cache
+from sheet_loader import load_worksheet_frame
+
+# Minimum seconds between background revision checks of one worksheet
+REVALIDATE_INTERVAL = 30
+
+# Worksheets refreshed at the same time
+REVALIDATE_MAX_WORKERS = 2
+
+
+class Revalidator:
+    """Refreshes loaded worksheets in the background so pages can keep rendering stale data
+
+    schedule() queues a revision check that returns immediately; when the sheet
+    has changed, the new revision is loaded into the shared cache and reported
+    by latest_revision() for sessions to swap in on their next rerun. Checks
+    are kept per credential, so a session only sees revisions its own
+    credentials could read.
+    """
+
+    def __init__(self, interval=REVALIDATE_INTERVAL, max_workers=REVALIDATE_MAX_WORKERS):
+        self.interval = interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sheet-revalidate')
+        self._pending = set()
+        self._checked = {}
+        self._latest = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def schedule(self, credentials, spreadsheet_id, worksheet_name):
+        """Queue a background refresh unless one is running or the sheet was checked recently"""
+        key = (credential_key(credentials), spreadsheet_id, worksheet_name)
+        with self._lock:
+            if key in self._pending or time.monotonic() - self._checked.get(key, float('-inf')) < self.interval:
+                return False
+            self._pending.add(key)
+
+        self._executor.submit(self._refresh, key, credentials, spreadsheet_id, worksheet_name)
+        return True
+
+    def latest_revision(self, credentials, spreadsheet_id, worksheet_name):
+        """Return the newest revision these credentials refreshed into the shared cache, or None"""
+        with self._lock:
+            return self._latest.get((credential_key(credentials), spreadsheet_id, worksheet_name))
+
+    def last_error(self, credentials, spreadsheet_id, worksheet_name):
+        """Return the error of the last failed refresh with these credentials, or None"""
+        with self._lock:
+            return self._errors.get((credential_key(credentials), spreadsheet_id, worksheet_name))
+
+    def _refresh(self, key, credentials, spreadsheet_id, worksheet_name):
+        error = None
+        try:
+            # Yield API quota to interactive page loads
+            with request_priority(BACKGROUND):
+                revision = get_spreadsheet_revision(credentials, spreadsheet_id)
+                if revision is None:
+                    error = "Could not read the spreadsheet revision from Drive"
+                elif not shared_sheet_cache.contains(spreadsheet_id, worksheet_name, revision):
+                    df, _ = load_worksheet_frame(credentials, spreadsheet_id, worksheet_name, revision)
+                    if df is None:
+                        revision = None
+        except Exception as e:
+            revision = None
+            error = str(e)
+
+        with self._lock:
+            self._pending.discard(key)
+            self._checked[key] = time.monotonic()
+            if revision is not None:
+                self._latest[key] = revision
+            if error:
+                self._errors[key] = error
+            else:
+                self._errors.pop(key, None)
+
+
+# Shared by every session served by this process
+sheet_revalidator = Revalidator()
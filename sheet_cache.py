@@ -0,0 +1,196 @@
+import threading
+import time
+from collections import OrderedDict
+
+from google_clients import credential_key, get_service
+from snapshot_store import SnapshotStore
+
+# Defaults for the process-wide worksheet cache
+DEFAULT_MAX_ENTRIES = 32
+DEFAULT_TTL_SECONDS = 600
+
+# How long a Drive revision lookup is trusted before asking Drive again
+REVISION_CHECK_INTERVAL = 15
+
+# Worksheet slot under which a spreadsheet's worksheet titles are cached
+WORKSHEET_TITLES = '__worksheet_titles__'
+
+
+class SheetCache:
+    """Process-wide LRU cache of worksheet DataFrames keyed by spreadsheet revision
+
+    When a snapshot store is attached, worksheets are also written to disk and
+    memory misses are served from a snapshot of the same revision.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS, snapshot_store=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.snapshot_store = snapshot_store
+        self.hits = 0
+        self.misses = 0
+        self.snapshot_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, spreadsheet_id, worksheet_name, revision):
+        """Return a copy of the cached DataFrame, or None if missing or expired"""
+        key = (spreadsheet_id, worksheet_name, revision)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+
+        if entry is None:
+            if not self.restore(spreadsheet_id, worksheet_name, revision):
+                with self._lock:
+                    self.misses += 1
+                return None
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+        # Hand out a copy so edits in one session never leak into another
+        return entry[0].copy()
+
+    def restore(self, spreadsheet_id, worksheet_name, revision):
+        """Load a worksheet revision from its on-disk snapshot into memory"""
+        if self.snapshot_store is None or worksheet_name == WORKSHEET_TITLES:
+            return False
+
+        df = self.snapshot_store.load(spreadsheet_id, worksheet_name, revision)
+        if df is None:
+            return False
+
+        self._store(spreadsheet_id, worksheet_name, revision, df)
+        with self._lock:
+            self.snapshot_hits += 1
+        return True
+
+    def put(self, spreadsheet_id, worksheet_name, revision, df):
+        """Store a DataFrame for one revision of a worksheet"""
+        self._store(spreadsheet_id, worksheet_name, revision, df)
+
+        if self.snapshot_store is not None and worksheet_name != WORKSHEET_TITLES:
+            self.snapshot_store.save(spreadsheet_id, worksheet_name, revision, df)
+
+    def _store(self, spreadsheet_id, worksheet_name, revision, df):
+        key = (spreadsheet_id, worksheet_name, revision)
+        with self._lock:
+            # Older revisions of the same worksheet can never be served again
+            stale_keys = [k for k in self._entries if k[:2] == key[:2] and k != key]
+            for stale_key in stale_keys:
+                del self._entries[stale_key]
+
+            self._entries[key] = (df.copy(), time.monotonic())
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def latest(self, spreadsheet_id, worksheet_name):
+        """Return (revision, DataFrame copy) of the newest cached revision of a worksheet, or (None, None)"""
+        with self._lock:
+            for key in reversed(self._entries):
+                if key[0] == spreadsheet_id and key[1] == worksheet_name:
+                    return key[2], self._entries[key][0].copy()
+        return None, None
+
+    def contains(self, spreadsheet_id, worksheet_name, revision):
+        """Return True if a live entry exists, without counting a hit or copying"""
+        key = (spreadsheet_id, worksheet_name, revision)
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() - entry[1] <= self.ttl_seconds
+
+    def get_worksheet_titles(self, spreadsheet_id, revision):
+        """Return the cached worksheet titles of a spreadsheet revision, or None"""
+        return self.get(spreadsheet_id, WORKSHEET_TITLES, revision)
+
+    def put_worksheet_titles(self, spreadsheet_id, revision, titles):
+        """Store the worksheet titles of a spreadsheet revision"""
+        self.put(spreadsheet_id, WORKSHEET_TITLES, revision, list(titles))
+
+    def invalidate(self, spreadsheet_id, worksheet_name=None):
+        """Drop cached data for a spreadsheet, or for one of its worksheets"""
+        with self._lock:
+            stale_keys = [
+                k for k in self._entries
+                if k[0] == spreadsheet_id and (worksheet_name is None or k[1] == worksheet_name)
+            ]
+            for stale_key in stale_keys:
+                del self._entries[stale_key]
+
+        if self.snapshot_store is not None and worksheet_name is not None:
+            self.snapshot_store.delete(spreadsheet_id, worksheet_name)
+
+        forget_revision(spreadsheet_id)
+
+    def clear(self):
+        """Remove every cached worksheet"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return cache counters for display"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'snapshot_hits': self.snapshot_hits,
+                'misses': self.misses
+            }
+
+
+# Revision lookups are remembered per (credential, spreadsheet) so that each
+# user still proves access to the file before being served shared data
+_revision_memo = {}
+_revision_lock = threading.Lock()
+
+
+def get_spreadsheet_revision(credentials, spreadsheet_id):
+    """Return the current Drive revision marker of a spreadsheet, or None if unavailable"""
+    memo_key = (credential_key(credentials), spreadsheet_id)
+    now = time.monotonic()
+
+    with _revision_lock:
+        memo = _revision_memo.get(memo_key)
+        if memo and now - memo[1] < REVISION_CHECK_INTERVAL:
+            return memo[0]
+
+    try:
+        drive_service = get_service(credentials, 'drive', 'v3')
+        metadata = drive_service.files().get(
+            fileId=spreadsheet_id,
+            fields='version,modifiedTime'
+        ).execute()
+    except Exception:
+        return None
+
+    revision = f"{metadata.get('version', '')}:{metadata.get('modifiedTime', '')}"
+
+    with _revision_lock:
+        # Drop expired lookups so the memo stays bounded
+        for key in [k for k, v in _revision_memo.items() if now - v[1] >= REVISION_CHECK_INTERVAL]:
+            del _revision_memo[key]
+        _revision_memo[memo_key] = (revision, now)
+
+    return revision
+
+
+def forget_revision(spreadsheet_id):
+    """Force the next revision lookup for a spreadsheet to ask Drive again"""
+    with _revision_lock:
+        for key in [k for k in _revision_memo if k[1] == spreadsheet_id]:
+            del _revision_memo[key]
+
+
+# Shared by every session served by this process
+shared_sheet_cache = SheetCache(snapshot_store=SnapshotStore())
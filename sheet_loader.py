@@ -0,0 +1,73 @@
+import pandas as pd
+
+from chunked_fetch import fetch_all_values
+from column_stats import column_stats_cache
+from google_clients import credential_key, open_worksheet
+from incremental_sync import incremental_load, remember_rows
+from sheet_cache import get_spreadsheet_revision, shared_sheet_cache
+from single_flight import SingleFlight
+from type_inference import convert_column_types
+
+# Concurrent loads of the same worksheet revision share one fetch
+worksheet_loads = SingleFlight()
+
+
+def _load_worksheet(credentials, spreadsheet_id, worksheet_name, revision, on_chunk):
+    worksheet = open_worksheet(credentials, spreadsheet_id, worksheet_name)
+
+    # Refetch only the recent and appended rows of a sheet loaded before
+    if revision is not None:
+        df, sync_report = incremental_load(worksheet, spreadsheet_id, worksheet_name, revision)
+        if df is not None:
+            column_stats_cache.put(spreadsheet_id, worksheet_name, revision, df)
+            shared_sheet_cache.put(spreadsheet_id, worksheet_name, revision, df)
+            return df, sync_report
+
+    # Get all values (large sheets are fetched in parallel chunks)
+    data = fetch_all_values(worksheet, on_chunk=on_chunk)
+    remember_rows(spreadsheet_id, worksheet_name, data, revision)
+    if not data:
+        return None, None
+
+    # First row contains headers; detect and convert column types
+    df = pd.DataFrame(data[1:], columns=data[0])
+    df, _ = convert_column_types(df)
+
+    if revision is not None:
+        # Distinct counts, frequent values and ranges for filter widgets, once per revision
+        column_stats_cache.put(spreadsheet_id, worksheet_name, revision, df)
+        shared_sheet_cache.put(spreadsheet_id, worksheet_name, revision, df)
+
+    return df, None
+
+
+def load_worksheet_frame(credentials, spreadsheet_id, worksheet_name, revision, on_chunk=None):
+    """Fetch a worksheet into a typed DataFrame and publish it to the shared cache
+
+    Returns (df, sync_report); df is None for an empty sheet and sync_report
+    is None unless the sheet was updated incrementally. Callers asking for the
+    same revision while a load is in flight wait for it instead of fetching
+    again; only the first caller's on_chunk sees the chunks arrive.
+    """
+    # Without a revision, access has not been checked, so only the same user may share the load
+    scope = revision if revision is not None else ('unversioned', credential_key(credentials))
+    (df, sync_report), shared = worksheet_loads.do(
+        (spreadsheet_id, worksheet_name, scope),
+        _load_worksheet, credentials, spreadsheet_id, worksheet_name, revision, on_chunk
+    )
+
+    # Hand out a copy so edits in one session never leak into another
+    if shared and df is not None:
+        df = df.copy()
+    return df, sync_report
+
+
+def get_worksheet_frame(credentials, spreadsheet_id, worksheet_name, on_chunk=None):
+    """Return (df, revision, sync_report) for a worksheet, from the shared cache while its revision is unchanged"""
+    revision = get_spreadsheet_revision(credentials, spreadsheet_id)
+    if revision is not None:
+        df = shared_sheet_cache.get(spreadsheet_id, worksheet_name, revision)
+        if df is not None:
+            return df, revision, None
+    df, sync_report = load_worksheet_frame(credentials, spreadsheet_id, worksheet_name, revision, on_chunk=on_chunk)
+    return df, revision, sync_report
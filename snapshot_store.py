@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pyarrow as pa
+
+# Where worksheet snapshots are kept between restarts
+SNAPSHOT_DIR = Path(os.environ.get('SHEET_SNAPSHOT_DIR', './snapshots'))
+
+# Bumped whenever the snapshot layout changes; older files are ignored
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Schema metadata key holding the snapshot header
+_HEADER_KEY = b'sheet_snapshot'
+
+
+class SnapshotStore:
+    """Stores worksheets as uncompressed Arrow IPC files that are memory-mapped on load"""
+
+    def __init__(self, directory=SNAPSHOT_DIR):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+
+    def path_for(self, spreadsheet_id, worksheet_name):
+        """Return the snapshot file path of a worksheet"""
+        digest = hashlib.sha1(f"{spreadsheet_id}\0{worksheet_name or ''}".encode()).hexdigest()
+        return self.directory / f"{digest}.arrow"
+
+    def read_header(self, spreadsheet_id, worksheet_name):
+        """Return the header of a stored snapshot without reading its columns, or None"""
+        path = self.path_for(spreadsheet_id, worksheet_name)
+        if not path.exists():
+            return None
+        try:
+            with pa.memory_map(str(path), 'r') as source:
+                schema = pa.ipc.open_file(source).schema
+            return self._parse_header(schema)
+        except Exception:
+            return None
+
+    def load(self, spreadsheet_id, worksheet_name, revision=None):
+        """Return the stored DataFrame, or None if missing, unreadable or of another revision"""
+        path = self.path_for(spreadsheet_id, worksheet_name)
+        if not path.exists():
+            return None
+        try:
+            with pa.memory_map(str(path), 'r') as source:
+                reader = pa.ipc.open_file(source)
+                header = self._parse_header(reader.schema)
+                if header is None or (revision is not None and header['revision'] != revision):
+                    return None
+                table = reader.read_all()
+                df = table.to_pandas()
+        except Exception:
+            return None
+
+        # Text columns come back as Arrow strings; keep the dtype they were saved with
+        for position in header.get('object_columns', []):
+            df.isetitem(position, df.iloc[:, position].astype(object))
+
+        df.attrs['type_report'] = header.get('type_report', {})
+        return df
+
+    def save(self, spreadsheet_id, worksheet_name, revision, df):
+        """Write a DataFrame snapshot atomically; returns False if it cannot be stored"""
+        header = {
+            'format_version': SNAPSHOT_FORMAT_VERSION,
+            'spreadsheet_id': spreadsheet_id,
+            'worksheet': worksheet_name,
+            'revision': revision,
+            'saved_at': time.time(),
+            'rows': len(df),
+            'object_columns': [i for i, dtype in enumerate(df.dtypes) if dtype == object],
+            'type_report': df.attrs.get('type_report', {})
+        }
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            metadata = dict(table.schema.metadata or {})
+            metadata[_HEADER_KEY] = json.dumps(header, default=str).encode()
+            table = table.replace_schema_metadata(metadata)
+        except Exception:
+            # Duplicate headers or mixed-type cells cannot be stored column-wise
+            return False
+
+        path = self.path_for(spreadsheet_id, worksheet_name)
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as sink:
+                    with pa.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+                os.replace(temp_path, path)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                return False
+        return True
+
+    def delete(self, spreadsheet_id, worksheet_name=None):
+        """Remove the snapshot of a worksheet"""
+        path = self.path_for(spreadsheet_id, worksheet_name)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _parse_header(self, schema):
+        metadata = schema.metadata or {}
+        if _HEADER_KEY not in metadata:
+            return None
+        header = json.loads(metadata[_HEADER_KEY])
+        if header.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+            return None
+        return header
@@ -0,0 +1,168 @@
+import math
+
+import numpy as np
+
+# Quantiles from a QuantileSketch are within this relative error of the exact value
+QUANTILE_RELATIVE_ACCURACY = 0.01
+
+# Sheets with at least this many rows open the Analysis page in approximate mode
+APPROXIMATE_STATS_ROWS = 200000
+
+# Values folded into the running statistics per step
+STATS_CHUNK_ROWS = 50000
+
+# Magnitudes below this are counted as zero by the quantile sketch
+_ZERO_THRESHOLD = 1e-12
+
+
+class RunningMoments:
+    """Count, mean, variance, min and max of a stream of values, updated chunk by chunk
+
+    Chunks are combined with the parallel form of Welford's algorithm, so
+    two partial results can also be merged.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        values = values[np.isfinite(values)]
+        if len(values):
+            chunk = RunningMoments()
+            chunk.count = len(values)
+            chunk.mean = float(values.mean())
+            chunk.m2 = float(((values - chunk.mean) ** 2).sum())
+            chunk.min = float(values.min())
+            chunk.max = float(values.max())
+            self.merge(chunk)
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self):
+        """Sample standard deviation, as pandas computes it"""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with relative-error guarantees (DDSketch)
+
+    Values are counted in logarithmic buckets; any quantile is returned within
+    `relative_accuracy` of the exact value, using memory that grows with the
+    logarithm of the value range rather than with the number of values.
+    """
+
+    def __init__(self, relative_accuracy=QUANTILE_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+
+    def update(self, values):
+        values = values[np.isfinite(values)]
+        positive = values[values > _ZERO_THRESHOLD]
+        negative = -values[values < -_ZERO_THRESHOLD]
+        self.zeros += len(values) - len(positive) - len(negative)
+        self.count += len(values)
+        for buckets, magnitudes in ((self.positive, positive), (self.negative, negative)):
+            if len(magnitudes):
+                keys, counts = np.unique(np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64), return_counts=True)
+                for key, count in zip(keys.tolist(), counts.tolist()):
+                    buckets[key] = buckets.get(key, 0) + count
+
+    def merge(self, other):
+        for buckets, other_buckets in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_buckets.items():
+                buckets[key] = buckets.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def _at_rank(self, rank):
+        seen = 0
+        # From the most negative value up to the largest positive one
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def quantile(self, q):
+        """Return the approximate q-quantile (0 <= q <= 1), or NaN if empty
+
+        Interpolates linearly between neighbouring ranks, like pandas' quantile().
+        """
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        below = self._at_rank(math.floor(rank))
+        fraction = rank - math.floor(rank)
+        if fraction == 0:
+            return below
+        return below + (self._at_rank(math.ceil(rank)) - below) * fraction
+
+
+class ColumnSketch:
+    """Running moments and a quantile sketch of one numeric column"""
+
+    def __init__(self, relative_accuracy=QUANTILE_RELATIVE_ACCURACY):
+        self.moments = RunningMoments()
+        self.quantiles = QuantileSketch(relative_accuracy)
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        self.moments.update(values)
+        self.quantiles.update(values)
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.quantiles.merge(other.quantiles)
+
+    def summary(self):
+        """Return the keys of analysis_cache.column_summary(), from the sketch"""
+        q1, median, q3 = (self.quantiles.quantile(q) for q in (0.25, 0.5, 0.75))
+        return {
+            'mean': self.moments.mean if self.moments.count else math.nan,
+            'median': median,
+            'std': self.moments.std,
+            'q1': q1,
+            'q3': q3,
+            'iqr': q3 - q1,
+            'lower_bound': q1 - 1.5 * (q3 - q1),
+            'upper_bound': q3 + 1.5 * (q3 - q1),
+            'relative_accuracy': self.quantiles.relative_accuracy
+        }
+
+
+def sketch_column(series, chunk_rows=STATS_CHUNK_ROWS, relative_accuracy=QUANTILE_RELATIVE_ACCURACY):
+    """Build the ColumnSketch of a numeric column one chunk at a time"""
+    sketch = ColumnSketch(relative_accuracy)
+    for start in range(0, len(series), chunk_rows):
+        chunk = series.iloc[start:start + chunk_rows]
+        sketch.update(chunk.to_numpy(dtype='float64', na_value=np.nan))
+    return sketch
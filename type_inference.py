@@ -0,0 +1,243 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:
+    # pandas < 2.0
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
+# Number of non-empty values inspected per column when picking a parser
+SAMPLE_SIZE = 1000
+
+# Share of sampled values that must parse for a parser to be chosen
+MATCH_THRESHOLD = 0.95
+
+# Text columns with at most this share of distinct values become categoricals
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+# Cell contents treated as "no value" rather than as a parse failure
+MISSING_VALUES = {
+    '', '-', '--', 'na', 'n/a', 'nan', 'none', 'null', '#n/a',
+    'NA', 'N/A', 'NaN', 'None', 'NULL', '#N/A', 'Na', 'N/a', 'Null'
+}
+
+BOOL_VALUES = {
+    'true': True, 'false': False,
+    'yes': True, 'no': False,
+    'y': True, 'n': False
+}
+
+DATE_FORMATS = [
+    '%Y-%m-%d',
+    '%m/%d/%Y',
+    '%d/%m/%Y',
+    '%Y/%m/%d',
+    '%m-%d-%Y',
+    '%d-%m-%Y',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%dT%H:%M:%SZ',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M',
+    '%d/%m/%Y %H:%M',
+    '%b %d, %Y',
+    '%B %d, %Y',
+    '%d %b %Y',
+    '%d-%b-%Y',
+    '%m/%d/%y'
+]
+
+CURRENCY_SYMBOLS = '$€£¥'
+
+_CURRENCY_PATTERN = re.compile(r'^\(?-?\s*[' + re.escape(CURRENCY_SYMBOLS) + r']')
+_NUMBER_CLEANUP_PATTERN = '[' + re.escape(CURRENCY_SYMBOLS) + r',\s]'
+_LEADING_ZERO_PATTERN = re.compile(r'^0\d')
+
+
+def _sample(values, sample_size):
+    """Return an evenly spaced sample of a Series"""
+    if len(values) <= sample_size:
+        return values
+    positions = np.linspace(0, len(values) - 1, sample_size).astype(int)
+    return values.iloc[positions]
+
+
+def _clean_numbers(values):
+    """Strip currency symbols and thousands separators, turning (x) into -x"""
+    cleaned = values.str.replace(_NUMBER_CLEANUP_PATTERN, '', regex=True)
+    return cleaned.str.replace(r'^\((.*)\)$', r'-\1', regex=True)
+
+
+def _match_ratio(parsed):
+    """Share of values a parser handled"""
+    if len(parsed) == 0:
+        return 0.0
+    return parsed.notna().sum() / len(parsed)
+
+
+def _best_date_format(sample, formats=DATE_FORMATS):
+    """Return the candidate date format that parses the sample best, or None"""
+    best_format, best_ratio = None, 0.0
+    for date_format in formats:
+        ratio = _match_ratio(pd.to_datetime(sample, format=date_format, errors='coerce'))
+        if ratio > best_ratio:
+            best_format, best_ratio = date_format, ratio
+        if ratio == 1.0:
+            break
+    return best_format if best_ratio >= MATCH_THRESHOLD else None
+
+
+def infer_column_kind(sample):
+    """Pick a parser for a column from a sample of its non-empty values
+
+    Returns a (kind, options) tuple where kind is one of 'bool', 'numeric',
+    'currency', 'percent', 'date', 'category' or 'text'.
+    """
+    if len(sample) == 0:
+        return 'text', {}
+
+    lowered = sample.str.lower()
+    if lowered.isin(BOOL_VALUES.keys()).mean() >= MATCH_THRESHOLD:
+        return 'bool', {}
+
+    if sample.str.endswith('%').mean() >= MATCH_THRESHOLD:
+        numbers = pd.to_numeric(_clean_numbers(sample.str.rstrip('%')), errors='coerce')
+        if _match_ratio(numbers) >= MATCH_THRESHOLD:
+            return 'percent', {}
+
+    numbers = pd.to_numeric(_clean_numbers(sample), errors='coerce')
+    if _match_ratio(numbers) >= MATCH_THRESHOLD:
+        # Zero-padded codes (zip codes, IDs) must keep their leading zeros
+        if sample.str.match(_LEADING_ZERO_PATTERN).any():
+            return 'text', {}
+        if sample.str.match(_CURRENCY_PATTERN).mean() >= 0.5:
+            return 'currency', {}
+        return 'numeric', {}
+
+    date_format = _best_date_format(sample)
+    if date_format:
+        return 'date', {'format': date_format}
+
+    if len(sample) >= 20 and sample.nunique() / len(sample) <= CATEGORY_MAX_UNIQUE_RATIO:
+        return 'category', {}
+
+    return 'text', {}
+
+
+def convert_column(values, kind, options=None, missing=None):
+    """Convert a whole column with the chosen parser in one vectorized pass"""
+    options = options or {}
+    if missing is None:
+        missing = values.isin(MISSING_VALUES)
+    present = values.where(~missing)
+
+    if kind == 'bool':
+        return present.str.lower().map(BOOL_VALUES).astype('boolean')
+    if kind == 'percent':
+        return pd.to_numeric(_clean_numbers(present.str.rstrip('%')), errors='coerce') / 100
+    if kind in ('numeric', 'currency'):
+        return pd.to_numeric(_clean_numbers(present), errors='coerce')
+    if kind == 'date':
+        return pd.to_datetime(present, format=options.get('format'), errors='coerce')
+    if kind == 'category':
+        return values.astype('category')
+    return values
+
+
+def detect_date_format(series, preferred=None, sample_size=SAMPLE_SIZE):
+    """Return the date format that parses a sample of a column's non-empty cells, or None
+
+    `preferred` (e.g. the format found for an earlier revision) is tried
+    first. After the usual candidates, the formats pandas guesses from the
+    first sampled value (month first and day first) are tried too.
+    """
+    values = _sample(series.dropna(), 4 * sample_size).astype(str).str.strip()
+    sample = _sample(values[~values.isin(MISSING_VALUES)], sample_size)
+    if len(sample) == 0:
+        return None
+    if preferred and _match_ratio(pd.to_datetime(sample, format=preferred, errors='coerce')) >= MATCH_THRESHOLD:
+        return preferred
+
+    formats = list(DATE_FORMATS)
+    for dayfirst in (False, True):
+        guessed = guess_datetime_format(sample.iloc[0], dayfirst=dayfirst)
+        if guessed and guessed not in formats:
+            formats.append(guessed)
+    return _best_date_format(sample, formats)
+
+
+def convert_column_types(df, sample_size=SAMPLE_SIZE):
+    """Infer and convert the dtype of every text column of a DataFrame
+
+    Returns the converted DataFrame and a report with the chosen kind and
+    coercion counts per column. The report is also kept in
+    df.attrs['type_report'] so it travels with cached copies.
+    """
+    converted = {}
+    report = {}
+
+    # Work by position because sheet headers are not guaranteed to be unique
+    for position, col in enumerate(df.columns):
+        original = df.iloc[:, position]
+        if original.dtype != 'object' and not pd.api.types.is_string_dtype(original):
+            converted[position] = original
+            continue
+
+        values = original.astype(str).str.strip()
+        missing = values.isin(MISSING_VALUES)
+        kind, options = infer_column_kind(_sample(values[~missing], sample_size))
+
+        if kind in ('text', 'category'):
+            # Text keeps its original cells, including blanks
+            result = original.astype('category') if kind == 'category' else original
+            coerced = 0
+        else:
+            result = convert_column(values, kind, options, missing)
+            coerced = int((result.isna() & ~missing).sum())
+
+        converted[position] = result
+        missing_count = int(missing.sum())
+        report[col] = {
+            'kind': kind,
+            'dtype': str(result.dtype),
+            'parsed': len(values) - missing_count - coerced,
+            'missing': missing_count,
+            'coerced': coerced,
+            **options
+        }
+
+    result_df = pd.DataFrame(converted, index=df.index)
+    result_df.columns = df.columns
+    result_df.attrs['type_report'] = report
+    return result_df, report
+
+
+def apply_type_report(df, report):
+    """Convert raw text columns with the kinds already chosen for an earlier load of the same sheet"""
+    converted = {}
+    for position, col in enumerate(df.columns):
+        original = df.iloc[:, position]
+        entry = report.get(col)
+        if entry is None or entry['kind'] == 'text':
+            converted[position] = original
+        elif entry['kind'] == 'category':
+            converted[position] = original.astype('category')
+        else:
+            converted[position] = convert_column(original.astype(str).str.strip(), entry['kind'], entry)
+
+    result_df = pd.DataFrame(converted, index=df.index)
+    result_df.columns = df.columns
+    result_df.attrs['type_report'] = report
+    return result_df
+
+
+def type_report_frame(df):
+    """Return the type inference report of a DataFrame as a table for display"""
+    report = df.attrs.get('type_report', {})
+    if not report:
+        return pd.DataFrame()
+    return pd.DataFrame.from_dict(report, orient='index')
@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from google.oauth2 import service_account
+
+from google_clients import open_spreadsheet
+from quota_scheduler import BACKGROUND, request_priority
+from sheet_cache import get_spreadsheet_revision, shared_sheet_cache
+from sheet_loader import load_worksheet_frame
+
+# Service account used to prefetch sheets before anyone signs in
+WARMUP_CREDENTIALS_ENV = 'WARMUP_SERVICE_ACCOUNT_FILE'
+
+# Seconds between background refreshes of the prefetched sheets
+WARMUP_REFRESH_SECONDS = 300
+
+# Spreadsheets prefetched at the same time
+WARMUP_MAX_WORKERS = 4
+
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+_warmup_status = {
+    'started': None,
+    'last_run': None,
+    'loaded': {},
+    'errors': {}
+}
+
+
+def warmup_credentials(scopes):
+    """Load the warm-up service account configured in the environment, if any"""
+    path = os.environ.get(WARMUP_CREDENTIALS_ENV) or os.environ.get('GOOGLE_APPLICATION_CREDENTIALS')
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return service_account.Credentials.from_service_account_file(path, scopes=scopes)
+    except Exception:
+        return None
+
+
+def prefetch_spreadsheet(credentials, spreadsheet_id):
+    """Publish the worksheet titles and first worksheet of a spreadsheet to the shared cache"""
+    revision = get_spreadsheet_revision(credentials, spreadsheet_id)
+    if revision is None:
+        raise RuntimeError("Could not read the spreadsheet revision from Drive")
+
+    titles = shared_sheet_cache.get_worksheet_titles(spreadsheet_id, revision)
+    if titles is None:
+        spreadsheet = open_spreadsheet(credentials, spreadsheet_id)
+        titles = [sheet.title for sheet in spreadsheet.worksheets()]
+        shared_sheet_cache.put_worksheet_titles(spreadsheet_id, revision, titles)
+
+    if not titles:
+        return None
+
+    # Unchanged sheets are already in the cache or in an on-disk snapshot
+    if (
+        shared_sheet_cache.contains(spreadsheet_id, titles[0], revision)
+        or shared_sheet_cache.restore(spreadsheet_id, titles[0], revision)
+    ):
+        return titles[0]
+
+    load_worksheet_frame(credentials, spreadsheet_id, titles[0], revision)
+
+    return titles[0]
+
+
+def run_warmup(spreadsheets, credentials):
+    """Prefetch every predefined spreadsheet concurrently once"""
+    def prefetch(item):
+        key, sheet_info = item
+        try:
+            # Yield API quota to interactive page loads
+            with request_priority(BACKGROUND):
+                worksheet = prefetch_spreadsheet(credentials, sheet_info['id'])
+            return key, worksheet, None
+        except Exception as e:
+            return key, None, str(e)
+
+    with ThreadPoolExecutor(max_workers=WARMUP_MAX_WORKERS) as executor:
+        results = list(executor.map(prefetch, spreadsheets.items()))
+
+    with _warmup_lock:
+        for key, worksheet, error in results:
+            if error:
+                _warmup_status['errors'][key] = error
+                _warmup_status['loaded'].pop(key, None)
+            else:
+                _warmup_status['loaded'][key] = worksheet
+                _warmup_status['errors'].pop(key, None)
+        _warmup_status['last_run'] = datetime.now()
+
+
+def _warmup_loop(spreadsheets, credentials, refresh_seconds):
+    while True:
+        run_warmup(spreadsheets, credentials)
+        time.sleep(refresh_seconds)
+
+
+def warmup_running():
+    """Return True if the background prefetch thread is alive"""
+    with _warmup_lock:
+        return _warmup_thread is not None and _warmup_thread.is_alive()
+
+
+def start_warmup(spreadsheets, credentials, refresh_seconds=WARMUP_REFRESH_SECONDS):
+    """Start the background prefetch thread once per process
+
+    Returns True if a thread is running after the call.
+    """
+    global _warmup_thread
+
+    if credentials is None:
+        return False
+
+    with _warmup_lock:
+        if _warmup_thread is not None and _warmup_thread.is_alive():
+            return True
+
+        _warmup_thread = threading.Thread(
+            target=_warmup_loop,
+            args=(dict(spreadsheets), credentials, refresh_seconds),
+            name="sheet-warmup",
+            daemon=True
+        )
+        _warmup_thread.start()
+        _warmup_status['started'] = datetime.now()
+
+    return True
+
+
+def warmup_status():
+    """Return a snapshot of the warm-up progress for display"""
+    with _warmup_lock:
+        return {
+            'started': _warmup_status['started'],
+            'last_run': _warmup_status['last_run'],
+            'loaded': dict(_warmup_status['loaded']),
+            'errors': dict(_warmup_status['errors'])
+        }